@@ -0,0 +1,36 @@
+"""Compare extracting all the syntaxes with extruct against the selective extraction of the MetadataHarvester"""
+import extruct
+from measure import measure, print_results
+
+from fair_test.metadata_harvester import MetadataHarvester
+
+JSONLD = """<script type="application/ld+json">
+{"@context": {"@vocab": "http://schema.org/"}, "@id": "https://example.org/dataset", "@type": "Dataset", "name": "Test"}
+</script>"""
+
+
+def generate_page(size: int) -> bytes:
+    """Generate a landing page with JSON-LD metadata, and a big body annotated with RDFa and microdata"""
+    rows = "".join(
+        f'<tr itemscope itemtype="http://schema.org/Thing" property="http://schema.org/hasPart">'
+        f'<td itemprop="name" property="http://schema.org/name">File {i}</td>'
+        f'<td><a href="https://example.org/files/{i}" itemprop="url">Download</a></td></tr>'
+        for i in range(size)
+    )
+    return f"<html><head><title>Dataset</title>{JSONLD}</head><body><table>{rows}</table></body></html>".encode()
+
+
+if __name__ == "__main__":
+    results = []
+    for size in [100, 1000, 10000]:
+        html = generate_page(size)
+        harvester = MetadataHarvester()
+        results.append(
+            {
+                "rows": size,
+                "page_kb": len(html) / 1024,
+                "all_syntaxes_ms": measure(lambda: extruct.extract(html), repeat=3)["time_ms"],
+                "json_ld_only_ms": measure(lambda: harvester.extruct_syntax(html, "json-ld", {}), repeat=3)["time_ms"],
+            }
+        )
+    print_results("Extract metadata embedded in a HTML page with extruct", results)
@@ -0,0 +1,72 @@
+"""Compare the time and memory used to parse RDF documents with each graph backend (rdflib, oxigraph)"""
+import multiprocessing
+import resource
+import time
+from typing import Dict, Tuple
+
+from measure import print_results
+from rdflib import BNode, ConjunctiveGraph, Literal, URIRef
+from rdflib.namespace import DCTERMS, RDF, RDFS
+
+from fair_test.graph_backend import get_graph_backend, new_graph, parser_format
+
+FORMATS = ["turtle", "xml", "ntriples", "json-ld"]
+
+
+def generate_documents(size: int) -> Dict[str, str]:
+    """Generate a metadata document with `size` triples, serialized in each format"""
+    g = ConjunctiveGraph()
+    dataset = URIRef("https://w3id.org/fair-enough/dataset")
+    for i in range(size // 5):
+        entry = URIRef(f"https://w3id.org/fair-enough/dataset/{i}")
+        g.add((dataset, DCTERMS.hasPart, entry))
+        g.add((entry, RDF.type, URIRef("http://www.w3.org/ns/dcat#Distribution")))
+        g.add((entry, RDFS.label, Literal(f"Distribution {i}", lang="en")))
+        g.add((entry, DCTERMS.description, Literal("Lorem ipsum dolor sit amet, consectetur adipiscing elit")))
+        g.add((entry, DCTERMS.creator, BNode(f"creator{i % 100}")))
+    return {fmt: g.serialize(format=fmt) for fmt in FORMATS}
+
+
+def parse_in_process(backend: str, rdf_format: str, data: str, queue: multiprocessing.Queue) -> None:
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    g = new_graph(backend)
+    g.parse(data=data, format=parser_format(rdf_format, backend))
+    duration = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((len(g), duration * 1000, (rss_after - rss_before) / 1024))
+
+
+def run(backend: str, rdf_format: str, data: str) -> Tuple[int, float, float]:
+    """Parse in a new process to measure the peak memory (RSS) of the parser and store, including native code"""
+    queue: multiprocessing.Queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=parse_in_process, args=(backend, rdf_format, data, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == "__main__":
+    backends = ["rdflib", "oxigraph"]
+    if get_graph_backend("oxigraph") != "oxigraph":
+        print("⚠️  oxrdflib is not installed, only the rdflib backend will be benchmarked")
+        backends = ["rdflib"]
+
+    results = []
+    for size in [10000, 100000]:
+        documents = generate_documents(size)
+        for rdf_format in FORMATS:
+            for backend in backends:
+                triples, time_ms, rss_mb = run(backend, rdf_format, documents[rdf_format])
+                results.append(
+                    {
+                        "format": rdf_format,
+                        "doc_mb": len(documents[rdf_format]) / 1024 / 1024,
+                        "triples": triples,
+                        "backend": backend,
+                        "time_ms": time_ms,
+                        "rss_mb": rss_mb,
+                    }
+                )
+    print_results("Parse RDF documents with each graph backend", results)
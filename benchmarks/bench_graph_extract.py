@@ -0,0 +1,90 @@
+"""Compare the extract helpers of FairTestEvaluation using the graph index against scanning the RDFLib store"""
+from typing import Any, List, Optional
+
+from measure import measure, print_results
+from rdflib import BNode, ConjunctiveGraph, Literal, URIRef
+from rdflib.namespace import DCTERMS, RDF, RDFS
+
+from fair_test import FairTestEvaluation
+
+SUBJECT = "https://purl.uniprot.org/uniprot/P51587"
+SCHEMA = "http://schema.org/"
+
+
+def generate_graph(size: int) -> ConjunctiveGraph:
+    """Generate a graph similar to a UniProt record, with many annotations and cross-references"""
+    g = ConjunctiveGraph()
+    subj = URIRef(SUBJECT)
+    g.add((subj, RDF.type, URIRef("http://purl.uniprot.org/core/Protein")))
+    g.add((subj, RDFS.label, Literal("Breast cancer type 2 susceptibility protein")))
+    g.add((subj, DCTERMS.license, URIRef("https://creativecommons.org/licenses/by/4.0/")))
+    g.add((subj, URIRef(SCHEMA + "distribution"), BNode("dist")))
+    g.add((BNode("dist"), URIRef(SCHEMA + "contentUrl"), URIRef(SUBJECT + ".ttl")))
+    for i in range(size // 5):
+        annotation = URIRef(f"{SUBJECT}#annotation-{i}")
+        g.add((subj, URIRef("http://purl.uniprot.org/core/annotation"), annotation))
+        g.add((annotation, RDF.type, URIRef("http://purl.uniprot.org/core/Annotation")))
+        g.add((annotation, RDFS.comment, Literal(f"Annotation {i}")))
+        g.add((annotation, URIRef(SCHEMA + "name"), Literal(f"Name {i}")))
+        g.add((annotation, RDFS.seeAlso, URIRef(f"http://purl.uniprot.org/xref/{i}")))
+    return g
+
+
+class ScanEvaluation(FairTestEvaluation):
+    """The extract helpers scanning the store for each predicate/subject combination"""
+
+    def extract_prop(self, g: Any, preds: List[Any], subj: Optional[Any] = None) -> List[Any]:
+        values = set()
+        check_preds = set()
+        for pred in preds:
+            check_preds.add(URIRef(str(pred)))
+            if str(pred).startswith("http://"):
+                check_preds.add(URIRef(str(pred).replace("http://", "https://")))
+            elif str(pred).startswith("https://"):
+                check_preds.add(URIRef(str(pred).replace("https://", "http://")))
+        for pred in list(check_preds):
+            if not isinstance(subj, list):
+                subj = [subj]
+            for test_subj in subj:
+                for _s, _p, o in g.triples((test_subj, URIRef(str(pred)), None)):
+                    self.info(f"Found a value for a property {str(pred)} => {str(o)}")
+                    values.add(o)
+        return list(values)
+
+
+def run_metrics_extract(evl: FairTestEvaluation, g: ConjunctiveGraph) -> None:
+    """Calls to the extract helpers similar to the ones done by the f3, r1 and i1 metrics"""
+    subject_uri = URIRef(SUBJECT)
+    for preds in [
+        [RDFS.label, URIRef(SCHEMA + "name")],
+        [DCTERMS.description, URIRef(SCHEMA + "description")],
+        [DCTERMS.created, URIRef(SCHEMA + "dateCreated"), URIRef(SCHEMA + "datePublished")],
+        [DCTERMS.license, URIRef(SCHEMA + "license")],
+    ]:
+        evl.extract_prop(g, preds, subject_uri)
+    evl.extract_data_subject(g, [subject_uri])
+    # Values for a list of subjects
+    annotations = [URIRef(f"{SUBJECT}#annotation-{i}") for i in range(100)]
+    evl.extract_prop(g, [URIRef(SCHEMA + "name"), RDFS.comment, RDFS.seeAlso], annotations)
+
+
+if __name__ == "__main__":
+    results = []
+    for size in [1000, 10000, 50000]:
+        g = generate_graph(size)
+        for name, eval_class in [("scan", ScanEvaluation), ("index", FairTestEvaluation)]:
+            # First call on a new evaluation builds the index, the following ones reuse it
+            first = measure(lambda: run_metrics_extract(eval_class(SUBJECT, "f3"), g))  # noqa: B023
+            evl = eval_class(SUBJECT, "f3")
+            run_metrics_extract(evl, g)
+            again = measure(lambda: run_metrics_extract(evl, g))  # noqa: B023
+            results.append(
+                {
+                    "triples": len(g),
+                    "helpers": name,
+                    "first_ms": first["time_ms"],
+                    "next_ms": again["time_ms"],
+                    "peak_mb": first["peak_mb"],
+                }
+            )
+    print_results("Extract properties values from a UniProt-like graph", results)
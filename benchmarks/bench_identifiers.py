@@ -0,0 +1,39 @@
+"""Compare the validation of the subject identifiers with idutils for each call, as done by the evaluation
+and each harvesting step, against the memoized classification of the identifiers module"""
+import idutils
+from measure import measure, print_results
+
+from fair_test.identifiers import parse_identifier
+
+IDENTIFIERS = {
+    "url": "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972",
+    "doi": "10.1594/PANGAEA.908011",
+    "handle": "hdl:20.1000/100",
+    "inchikey": "BSYNRYMUTXBXSQ-UHFFFAOYSA-N",
+}
+# Number of times an identifier is validated, e.g. by the evaluation, then each retrieve_metadata
+CALLS = 10000
+
+
+def legacy_get_url(id: str):
+    """The identifier validation done by the MetadataHarvester before the identifiers module"""
+    if idutils.is_url(id):
+        return id
+    if idutils.is_doi(id):
+        return idutils.to_url(id, "doi", "https")
+    if idutils.is_handle(id):
+        return idutils.to_url(id, "handle", "https")
+    return None
+
+
+if __name__ == "__main__":
+    results = []
+    for scheme, identifier in IDENTIFIERS.items():
+        results.append(
+            {
+                "identifier": scheme,
+                "idutils_ms": measure(lambda: [legacy_get_url(identifier) for _ in range(CALLS)])["time_ms"],
+                "memoized_ms": measure(lambda: [parse_identifier(identifier) for _ in range(CALLS)])["time_ms"],
+            }
+        )
+    print_results(f"Validate an identifier {CALLS} times", results)
@@ -0,0 +1,50 @@
+"""Compare parsing expanded JSON-LD through a JSON text round-trip against converting the objects directly to RDF"""
+import json
+
+from measure import measure, print_results
+from pyld import jsonld
+
+from fair_test.graph_backend import new_graph
+from fair_test.metadata_harvester import MetadataHarvester
+
+CONTEXT = {"@vocab": "http://schema.org/"}
+
+
+def generate_jsonld(size: int) -> dict:
+    """Generate a JSON-LD dataset description with many distributions"""
+    return {
+        "@context": CONTEXT,
+        "@id": "https://example.org/dataset",
+        "@type": "Dataset",
+        "name": "Dataset",
+        "distribution": [
+            {"@id": f"https://example.org/files/{i}", "name": f"File {i}", "contentSize": i} for i in range(size)
+        ],
+    }
+
+
+def text_round_trip(doc: dict) -> None:
+    g = new_graph()
+    g.parse(data=json.dumps(jsonld.expand(doc)), format="json-ld")
+
+
+def direct(doc: dict) -> None:
+    MetadataHarvester().parse_rdf(doc, "json-ld")
+
+
+if __name__ == "__main__":
+    results = []
+    for size in [100, 1000, 10000]:
+        doc = generate_jsonld(size)
+        round_trip = measure(lambda: text_round_trip(doc), repeat=3)
+        objects = measure(lambda: direct(doc), repeat=3)
+        results.append(
+            {
+                "distributions": size,
+                "round_trip_ms": round_trip["time_ms"],
+                "direct_ms": objects["time_ms"],
+                "round_trip_peak_mb": round_trip["peak_mb"],
+                "direct_peak_mb": objects["peak_mb"],
+            }
+        )
+    print_results("Parse JSON-LD to a RDFLib graph", results)
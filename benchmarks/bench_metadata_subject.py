@@ -0,0 +1,97 @@
+"""Compare the resolution of the metadata subject in a graph against the previous implementation,
+which queried the store for each alternative URI, identifier predicate, and URI or Literal object"""
+from typing import Any, List
+
+from measure import measure, print_results
+from rdflib import ConjunctiveGraph, Literal, URIRef
+from rdflib.namespace import RDFS
+
+from fair_test import FairTestEvaluation
+
+SUBJECT = "https://doi.org/10.1594/PANGAEA.908011"
+ALT_URIS = [
+    SUBJECT,
+    "http://doi.org/10.1594/PANGAEA.908011",
+    "http://dx.doi.org/10.1594/PANGAEA.908011",
+    "https://doi.pangaea.de/10.1594/PANGAEA.908011",
+    "http://doi.pangaea.de/10.1594/PANGAEA.908011",
+]
+
+
+def generate_graph(size: int, hub: bool = False) -> ConjunctiveGraph:
+    """Generate a graph where the subject is only referenced with schema:identifier as Literal (slowest case).
+    With hub, all entities also point to the subject URI with schema:isPartOf"""
+    g = ConjunctiveGraph()
+    dataset = URIRef("https://doi.pangaea.de/10.1594/PANGAEA.908011#dataset")
+    g.add((dataset, URIRef("http://schema.org/identifier"), Literal(SUBJECT)))
+    for i in range(size // 3):
+        entity = URIRef(f"https://doi.pangaea.de/10.1594/PANGAEA.908011#entity-{i}")
+        g.add((dataset, URIRef("http://schema.org/hasPart"), entity))
+        g.add((entity, RDFS.label, Literal(f"Entity {i}")))
+        g.add((entity, URIRef("http://schema.org/identifier"), Literal(f"https://doi.org/10.1594/PANGAEA.{i}")))
+        if hub:
+            g.add((entity, URIRef("http://schema.org/isPartOf"), URIRef(SUBJECT)))
+    return g
+
+
+def legacy_extract_metadata_subject(evl: FairTestEvaluation, g: Any, alt_uris: List[str]) -> Any:
+    """Previous implementation of FairTestEvaluation.extract_metadata_subject"""
+    subject_uri = None
+    preds_id = [
+        "https://purl.org/dc/terms/identifier",
+        "https://purl.org/dc/elements/1.1/identifier",
+        "https://schema.org/identifier",
+        "https://schema.org/sameAs",
+        "http://ogp.me/ns#url",
+    ]
+    all_preds_id = [p.replace("https://", "http://") for p in preds_id] + preds_id
+    all_preds_uris = [URIRef(str(s)) for s in all_preds_id]
+    resource_properties = {}
+    resource_linked_to = {}
+    for alt_uri in alt_uris:
+        uri_ref = URIRef(str(alt_uri))
+        for s, p, o in g.triples((uri_ref, None, None)):
+            evl.info(f"Found the subject URI in the metadata: {s}")
+            resource_properties[str(p)] = str(o)
+            subject_uri = uri_ref
+        if not subject_uri:
+            for pred in all_preds_uris:
+                for s, p, _o in g.triples((None, pred, uri_ref)):
+                    evl.info(f"Found the subject URI in the metadata: {s}")
+                    resource_linked_to[str(s)] = str(p)
+                    subject_uri = s
+                if not subject_uri:
+                    for s, p, _o in g.triples((None, pred, Literal(str(uri_ref)))):
+                        evl.info(f"Found the subject URI in the metadata: {s}")
+                        resource_linked_to[str(s)] = str(p)
+                        subject_uri = s
+    evl.data["identifier_in_metadata"] = {"properties": resource_properties, "linked_to": resource_linked_to}
+    return subject_uri
+
+
+def resolve_without_cache(evl: FairTestEvaluation, g: Any) -> Any:
+    evl._graph_indexes.clear()
+    return evl.extract_metadata_subject(g, ALT_URIS)
+
+
+if __name__ == "__main__":
+    results = []
+    for size, hub in [(1000, False), (10000, False), (100000, False), (100000, True)]:
+        g = generate_graph(size, hub)
+        legacy_eval = FairTestEvaluation(SUBJECT, "f3")
+        new_eval = FairTestEvaluation(SUBJECT, "f3")
+        assert legacy_extract_metadata_subject(legacy_eval, g, ALT_URIS) == new_eval.extract_metadata_subject(
+            g, ALT_URIS
+        )
+        assert (
+            legacy_eval.data["identifier_in_metadata"]["linked_to"]
+            == new_eval.data["identifier_in_metadata"]["linked_to"]
+        )
+        legacy = measure(lambda: legacy_extract_metadata_subject(legacy_eval, g, ALT_URIS))  # noqa: B023
+        results.append({"triples": len(g), "hub": hub, "implementation": "legacy", **legacy})
+        # First resolution on a new graph index, then memoized resolution for the following calls in the evaluation
+        first = measure(lambda: resolve_without_cache(new_eval, g))  # noqa: B023
+        results.append({"triples": len(g), "hub": hub, "implementation": "index", **first})
+        memoized = measure(lambda: new_eval.extract_metadata_subject(g, ALT_URIS))  # noqa: B023
+        results.append({"triples": len(g), "hub": hub, "implementation": "memoized", **memoized})
+    print_results("Resolve the metadata subject in a graph", results)
@@ -0,0 +1,73 @@
+"""Compare the namespaces extraction and matching against LOV of the i2 metric: serializing the graph to Turtle
+and checking each vocabulary with startswith, against collecting the namespaces from the terms and a prefix index"""
+import io
+import re
+from typing import Any, List, Set
+
+from measure import measure, print_results
+from rdflib import ConjunctiveGraph, Literal, URIRef
+from rdflib.namespace import DCTERMS, RDF, RDFS, XSD
+
+from fair_test import FairTestEvaluation
+from fair_test.namespace_index import PrefixIndex
+
+SCHEMA = "https://schema.org/"
+# Similar to the size of the list of vocabularies in LOV
+LOV_NAMESPACES = [f"http://vocab-{i}.example.org/ns#" for i in range(800)] + [
+    "http://schema.org/",
+    "http://purl.org/dc/terms/",
+    "http://www.w3.org/2000/01/rdf-schema#",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+]
+
+
+def generate_graph(size: int) -> ConjunctiveGraph:
+    """Generate a graph using a few vocabularies, with typed literals"""
+    g = ConjunctiveGraph()
+    g.bind("schema", SCHEMA)
+    for i in range(size // 4):
+        item = URIRef(f"https://example.org/dataset/{i}")
+        g.add((item, RDF.type, URIRef(SCHEMA + "Dataset")))
+        g.add((item, RDFS.label, Literal(f"Dataset {i}")))
+        g.add((item, DCTERMS.created, Literal("2022-01-01", datatype=XSD.date)))
+        g.add((item, URIRef(f"http://vocab-{i % 50}.example.org/ns#prop"), Literal(i)))
+    return g
+
+
+def legacy_match(g: Any) -> Set[str]:
+    """The namespaces matching of the i2 metric before using the prefix index"""
+    rdflib_ns = list(g.namespace_manager.namespaces())
+    extracted_ns: List[str] = []
+    for row in io.StringIO(g.serialize(format="turtle")):
+        if row.startswith("@prefix"):
+            extracted_ns.append(re.compile("^.*<(.*?)>").search(row).group(1))  # type: ignore
+    validated_ns = set()
+    for lov_ns in LOV_NAMESPACES:
+        for ns in extracted_ns:
+            if lov_ns.startswith(ns):
+                validated_ns.add(ns)
+        for _prefix, ns in rdflib_ns:
+            if ns.startswith(lov_ns):
+                validated_ns.add(ns)
+    return validated_ns
+
+
+def index_match(g: Any, lov_index: PrefixIndex) -> Set[str]:
+    evl = FairTestEvaluation("https://example.org/dataset", "i2-bench")
+    return set(evl.match_namespaces(evl.extract_namespaces(g), lov_index))
+
+
+if __name__ == "__main__":
+    lov_index = PrefixIndex(LOV_NAMESPACES)
+    results = []
+    for size in [1000, 10000, 100000]:
+        g = generate_graph(size)
+        results.append(
+            {
+                "triples": len(g),
+                "turtle_startswith_ms": measure(lambda: legacy_match(g), repeat=3)["time_ms"],
+                "terms_prefix_index_ms": measure(lambda: index_match(g, lov_index), repeat=3)["time_ms"],
+                "build_index_ms": measure(lambda: PrefixIndex(LOV_NAMESPACES), repeat=3)["time_ms"],
+            }
+        )
+    print_results("Find the vocabularies used by a graph in a list of 800 vocabularies", results)
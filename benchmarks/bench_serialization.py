@@ -0,0 +1,73 @@
+"""Compare the JSON serializers available to return evaluations results with large `eval.data` payloads"""
+import json
+
+from measure import measure, print_results
+
+from fair_test import FairTestEvaluation
+from fair_test.json_serializer import get_json_dumps, orjson
+
+
+def generate_jsonld_entry(i: int) -> dict:
+    return {
+        "@context": "https://schema.org/",
+        "@type": "Dataset",
+        "@id": f"https://doi.org/10.1594/PANGAEA.{i}",
+        "name": f"Dataset {i} with a title that is quite long, as often found on landing pages ✔️",
+        "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20,
+        "identifier": f"https://doi.org/10.1594/PANGAEA.{i}",
+        "keywords": [f"keyword {k}" for k in range(30)],
+        "creator": [
+            {"@type": "Person", "name": f"Author {a}", "identifier": f"https://orcid.org/0000-0000-0000-{a:04d}"}
+            for a in range(20)
+        ],
+        "distribution": [
+            {
+                "@type": "DataDownload",
+                "contentUrl": f"https://download.pangaea.de/dataset/{i}/files/{d}.tab",
+                "encodingFormat": "text/tab-separated-values",
+                "contentSize": d * 1024,
+            }
+            for d in range(50)
+        ],
+        "spatialCoverage": {"@type": "Place", "geo": {"@type": "GeoShape", "box": "-90.0 -180.0 90.0 180.0"}},
+    }
+
+
+def generate_eval(size: int) -> FairTestEvaluation:
+    """Generate an evaluation with data similar to what is harvested from a heavy landing page"""
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "f2-machine-readable-metadata")
+    jsonld = [generate_jsonld_entry(i) for i in range(size)]
+    evl.data["extruct"] = {
+        "json-ld": jsonld,
+        "microdata": [{"type": "https://schema.org/Dataset", "properties": entry} for entry in jsonld],
+        "rdfa": [
+            {"@id": f"_:b{i}", "http://ogp.me/ns#title": [{"@value": f"Title {i}"}] * 10} for i in range(size * 20)
+        ],
+        "dublincore": [{"namespaces": {}, "elements": [], "terms": []}],
+    }
+    evl.data["json-ld"] = jsonld
+    evl.data["signposting_links"] = {
+        f"rel{i}": {"url": f"https://example.org/{i}", "rel": "describedby"} for i in range(size)
+    }
+    evl.data["metadata_yaml"] = {"values": list(range(size * 100)), "floats": [i / 3 for i in range(size * 100)]}
+    for i in range(size * 20):
+        evl.info(f"Found a value for a property http://schema.org/name => Dataset {i}")
+    return evl
+
+
+if __name__ == "__main__":
+    if orjson is None:
+        print("⚠️  orjson is not installed, only the stdlib json serializer will be benchmarked")
+
+    results = []
+    for size in [10, 100, 500]:
+        content = generate_eval(size).to_jsonld()
+        payload_mb = len(json.dumps(content)) / 1024 / 1024
+        for serializer in ["json", "orjson"]:
+            if serializer == "orjson" and orjson is None:
+                continue
+            dumps = get_json_dumps(serializer)
+            res = measure(lambda: dumps(content))  # noqa: B023
+            results.append({"entries": size, "payload_mb": payload_mb, "serializer": serializer, **res})
+
+    print_results("Serialization of evaluations results", results)
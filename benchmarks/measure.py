@@ -0,0 +1,40 @@
+"""Helpers shared by the benchmarks scripts, run them with `./scripts/bench.sh`"""
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+
+def measure(func: Callable[[], Any], repeat: int = 5) -> Dict[str, float]:
+    """Run a function a few times, and return its best time (in ms), and the peak memory allocated in Python (in MB)"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_ms": min(times) * 1000, "peak_mb": peak / 1024 / 1024}
+
+
+def print_results(title: str, results: List[Dict[str, Any]]) -> None:
+    """Print a list of benchmark results as a table"""
+    print(f"\n{title}")
+    if not results:
+        return
+    columns = list(results[0].keys())
+    widths = {col: max(len(col), *[len(_fmt(res[col])) for res in results]) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for res in results:
+        print("  ".join(_fmt(res[col]).ljust(widths[col]) for col in columns))
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
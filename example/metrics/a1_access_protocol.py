@@ -1,4 +1,3 @@
-import requests
 from rdflib.namespace import DCTERMS
 
 from fair_test import FairTest, FairTestEvaluation
@@ -13,6 +12,7 @@ For the protocol , do an HTTP get on the URL to see if it returns a valid docume
 Find information about authorization in metadata"""
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["http_response", "rdf"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://raw.githubusercontent.com/ejp-rd-vp/resource-metadata-schema/master/data/example-rdf/turtle/patientRegistry.ttl": 1,
@@ -22,7 +22,7 @@ Find information about authorization in metadata"""
     def evaluate(self, eval: FairTestEvaluation):
         eval.info(f"Access protocol: check resource URI protocol is resolvable for {eval.subject}")
         try:
-            r = requests.get(eval.subject, timeout=600)
+            r = eval.resolve_subject()
             r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
             eval.success("Successfully resolved " + eval.subject)
             if r.history:
@@ -1,5 +1,3 @@
-import requests
-
 from fair_test import FairTest, FairTestEvaluation
 
 
@@ -11,6 +9,7 @@ class MetricTest(FairTest):
     topics = ["metadata"]
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["http_response"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://raw.githubusercontent.com/ejp-rd-vp/resource-metadata-schema/master/data/example-rdf/turtle/patientRegistry.ttl": 1,
@@ -32,7 +31,8 @@ class MetricTest(FairTest):
             return eval.response()
 
         try:
-            r = requests.get(subject_url, timeout=600)
+            # Only the status and headers are received
+            r = eval.resolve_subject()
             r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
             eval.success(f"Successfully resolved {subject_url}")
             if r.history:
@@ -12,6 +12,7 @@ class MetricTest(FairTest):
     topics = ["metadata"]
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["rdf"]
     test_test = {
         "https://doi.org/10.1594/PANGAEA.908011": 1,
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
@@ -13,6 +13,7 @@ Parse the metadata to search for the given digital resource GUID.
 If found, retrieve informations about this resource (title, description, date created, etc)"""
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["rdf"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://doi.org/10.1594/PANGAEA.908011": 1,
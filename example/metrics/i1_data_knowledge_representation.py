@@ -10,6 +10,7 @@ This particular test takes a broad view of what defines a 'knowledge representat
 Any form of ontologically-grounded linked data will pass this test."""
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["data_uris"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://doi.org/10.1594/PANGAEA.908011": 0,
@@ -27,8 +28,7 @@ Any form of ontologically-grounded linked data will pass this test."""
             eval.failure("Could not find data URI in the metadata.")
 
         # Check if RDF data can be found at the data URI
-        for value in data_res:
-            data_g = eval.retrieve_metadata(value)
+        for value, data_g in eval.retrieve_metadata_many(data_res).items():
             if len(data_g) > 1:
                 eval.success(f"Successfully retrieved RDF for the data URI: {value}. It contains {str(len(g))} triples")
             else:
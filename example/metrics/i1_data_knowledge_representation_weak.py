@@ -1,4 +1,3 @@
-import requests
 import yaml
 
 from fair_test import FairTest, FairTestEvaluation
@@ -12,6 +11,7 @@ class MetricTest(FairTest):
 This particular test takes a broad view of what defines a 'knowledge representation language'; in this evaluation, anything that can be represented as structured data will be accepted"""
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["data_uris"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://doi.org/10.1594/PANGAEA.908011": 0,
@@ -30,29 +30,36 @@ This particular test takes a broad view of what defines a 'knowledge representat
         else:
             eval.data["data_uri"] = data_res
 
-        # Check if structured data can be found at the data URI
-        for value in data_res:
-            eval.info(f"Found data URI: {value}. Try retrieving RDF")
-            data_g = eval.retrieve_metadata(value)
+        # Check if structured data can be found at the data URIs, RDF first, then JSON, then YAML
+        no_rdf = []
+        for value, data_g in eval.retrieve_metadata_many(data_res).items():
             if len(data_g) > 1:
                 eval.info(f"Successfully retrieved RDF for the data URI: {value}. It contains {str(len(g))} triples")
                 eval.success(f"Successfully found and parsed RDF data for {value}")
-
             else:
                 eval.warn(f"No RDF data found for {value}, searching for JSON")
-                try:
-                    r = requests.get(value, headers={"accept": "application/json"}, timeout=600)
-                    metadata = r.json()
-                    eval.data["metadata_json"] = metadata
-                    eval.success(f"Successfully found and parsed JSON data for {value}")
-                except Exception as e1:
-                    eval.warn(f"No JSON metadata found for {value}: {e1}, searching for YAML")
-                    try:
-                        r = requests.get(value, headers={"accept": "text/yaml"}, timeout=600)
-                        metadata = yaml.safe_load(r.text)
-                        eval.data["metadata_yaml"] = metadata
-                        eval.success(f"Successfully found and parsed YAML data for {value}")
-                    except Exception as e2:
-                        eval.failure(f"No YAML metadata found for {value}: {e2}")
+                no_rdf.append(value)
+
+        no_json = []
+        for value, r in eval.fetch_many(no_rdf, headers={"accept": "application/json"}).items():
+            try:
+                if isinstance(r, Exception):
+                    raise r
+                metadata = r.json()
+                eval.data["metadata_json"] = metadata
+                eval.success(f"Successfully found and parsed JSON data for {value}")
+            except Exception as e1:
+                eval.warn(f"No JSON metadata found for {value}: {e1}, searching for YAML")
+                no_json.append(value)
+
+        for value, r in eval.fetch_many(no_json, headers={"accept": "text/yaml"}).items():
+            try:
+                if isinstance(r, Exception):
+                    raise r
+                metadata = yaml.safe_load(r.text)
+                eval.data["metadata_yaml"] = metadata
+                eval.success(f"Successfully found and parsed YAML data for {value}")
+            except Exception as e2:
+                eval.failure(f"No YAML metadata found for {value}: {e2}")
 
         return eval.response()
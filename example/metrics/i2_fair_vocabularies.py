@@ -1,9 +1,20 @@
-import io
-import re
+from fair_test import FairTest, FairTestEvaluation
+from fair_test.namespace_index import PrefixIndex
+from fair_test.reference_data import reference_data
 
-import requests
+# Namespaces of vocabularies not considered as FAIR vocabularies
+ignore_ns = []
+
+
+def index_lov_namespaces(lov_list):
+    """Index the namespaces of the vocabularies listed in LOV, once per download of the list"""
+    return PrefixIndex(vocab["nsp"] for vocab in lov_list if vocab["nsp"] not in ignore_ns)
 
-from fair_test import FairTest, FairTestEvaluation
+
+# LOV docs: https://lov.linkeddata.es/dataset/lov/api
+lov_api = "https://lov.linkeddata.es/dataset/lov/api/v2/vocabulary/list"
+# Registered when the metric test is imported, so that `fair-test serve` loads it once before forking the workers
+reference_data.register(lov_api, preprocess=index_lov_namespaces)
 
 
 class MetricTest(FairTest):
@@ -16,6 +27,7 @@ vocabularies published in an appropriate knowledge-exchange format.
 Resolve IRIs, check FAIRness of the returned documents."""
     author = "https://orcid.org/0000-0002-1501-1082"
     metric_version = "0.1.0"
+    requires = ["rdf"]
     test_test = {
         "https://w3id.org/ejp-rd/fairdatapoints/wp13/dataset/c5414323-eab1-483f-a883-77951f246972": 1,
         "https://doi.org/10.1594/PANGAEA.908011": 1,
@@ -23,8 +35,6 @@ Resolve IRIs, check FAIRness of the returned documents."""
     }
 
     def evaluate(self, eval: FairTestEvaluation):
-        # LOV docs: https://lov.linkeddata.es/dataset/lov/api
-        lov_api = "https://lov.linkeddata.es/dataset/lov/api/v2/vocabulary/list"
         # lod_cloudnet = "https://lod-cloud.net/lod-data.json"
 
         g = eval.retrieve_metadata(eval.subject)
@@ -35,49 +45,15 @@ Resolve IRIs, check FAIRness of the returned documents."""
         else:
             eval.info(f"RDF metadata containing {len(g)} triples found at the subject URL provided.")
 
-        # eval.info('Checking RDF metadata vocabularies')
-        rdflib_ns = list(g.namespace_manager.namespaces())
-        # print('Extracted with RDFLib: ', rdflib_ns)
-        # rdflib_ns = [n for n in g.namespaces()]
-        # print(rdflib_ns)
-        # Checkout the prefixes/namespaces
-        # for ns_prefix, namespace in g.namespaces():
-        #     print(ns_prefix, ' => ', namespace)
-
-        # Extract namespace manually because RDFLib can't do it
-        extracted_ns = []
-        try:
-            for row in io.StringIO(g.serialize(format="turtle")):
-                if row.startswith("@prefix"):
-                    pattern = re.compile("^.*<(.*?)>")
-                    ns = pattern.search(row).group(1)
-                    extracted_ns.append(ns)
-        except Exception as e:
-            eval.failure(f"RDF found at the subject URL provided is not valid: {e}")
+        # Namespaces of the IRIs used in the metadata, the namespaces declared but not used are ignored
+        tested_ns = eval.extract_namespaces(g)
+        if len(tested_ns) < 1:
+            eval.failure("No IRIs found in the metadata, the RDF found at the subject URL provided is not valid")
             return eval.response()
-        # print('Extracted manually: ', extracted_ns)
 
-        validated_ns = set()
-        tested_ns = set()
-        ignore_ns = []
         eval.info("Check if used vocabularies in Linked Open Vocabularies: " + lov_api)
-        lov_list = requests.get(lov_api, timeout=600).json()
-        for vocab in lov_list:
-            if vocab["nsp"] in ignore_ns:
-                continue
-
-            # Check for manually extracted ns
-            for ns in extracted_ns:
-                tested_ns.add(ns)
-                if vocab["nsp"].startswith(ns):
-                    validated_ns.add(ns)
-
-            # Check for RDFLib extracted ns
-            for _index, tuple in rdflib_ns:
-                tested_ns.add(tuple[1])
-                # if vocab['nsp'].startswith(tuple[1]):
-                if tuple[1].startswith(vocab["nsp"]):
-                    validated_ns.add(tuple[1])
+        lov_index = eval.get_reference_data(lov_api, preprocess=index_lov_namespaces)
+        validated_ns = eval.match_namespaces(tested_ns, lov_index)
 
         if len(validated_ns) > 0:
             eval.success(
@@ -1,6 +1,19 @@
-import requests
-
 from fair_test import FairTest, FairTestEvaluation
+from fair_test.reference_data import reference_data
+
+
+def index_osi_licenses(spdx_licenses):
+    """Index the SPDX licenses by URL, to check if they are approved by the Open Source Initiative"""
+    osi_licenses = {}
+    for spdx_license in spdx_licenses["licenses"]:
+        for license_url in spdx_license["seeAlso"]:
+            osi_licenses[license_url] = osi_licenses.get(license_url, False) or spdx_license["isOsiApproved"] is True
+    return osi_licenses
+
+
+spdx_licenses_url = "https://raw.github.com/spdx/license-list-data/master/json/licenses.json"
+# Registered when the metric test is imported, so that `fair-test serve` loads it once before forking the workers
+reference_data.register(spdx_licenses_url, preprocess=index_osi_licenses)
 
 
 class MetricTest(FairTest):
@@ -59,18 +72,13 @@ Resolve the licenses IRI"""
             )
 
         if "license" in eval.data:
+            # https://github.com/vemonet/fuji/blob/master/fuji_server/helper/preprocessor.py#L229
+            osi_licenses = eval.get_reference_data(spdx_licenses_url, preprocess=index_osi_licenses)
             for license_found in eval.data["license"]:
                 eval.info(
                     f"Check if license {eval.data['license']} is approved by the Open Source Initiative, in the SPDX licenses list"
                 )
-                # https://github.com/vemonet/fuji/blob/master/fuji_server/helper/preprocessor.py#L229
-                spdx_licenses_url = "https://raw.github.com/spdx/license-list-data/master/json/licenses.json"
-                spdx_licenses = requests.get(spdx_licenses_url, timeout=600).json()["licenses"]
-                for open_license in spdx_licenses:
-                    if license_found in open_license["seeAlso"]:
-                        if open_license["isOsiApproved"] is True:
-                            eval.bonus(
-                                "License approved by the Open Source Initiative (" + str(eval.data["license"]) + ")"
-                            )
+                if osi_licenses.get(str(license_found)) is True:
+                    eval.bonus("License approved by the Open Source Initiative (" + str(eval.data["license"]) + ")")
 
         return eval.response()
@@ -0,0 +1,11 @@
+#!/usr/bin/env bash
+
+set -e
+
+# Run all benchmarks, or only the ones given as args, e.g. ./scripts/bench.sh benchmarks/bench_serialization.py
+BENCHMARKS=${@:-benchmarks/bench_*.py}
+
+for bench in $BENCHMARKS; do
+    echo "⏱️  $bench"
+    python $bench
+done
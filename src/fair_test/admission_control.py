@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from fair_test.cancellation import EvaluationCancelled, current_cancel_token
+
+# Priority classes of the evaluation requests, lower values are admitted first
+priority_classes = {"interactive": 0, "batch": 1}
+
+
+class AdmissionController:
+    """
+    Limit the number of evaluations running at once. Requests beyond `max_in_flight` wait in a queue,
+    ordered by priority class (e.g. interactive evaluations before batch evaluations), then by arrival.
+    When the queue is full, the request with the lowest priority is rejected, so that batch clients
+    flooding the API cannot delay interactive users.
+    All the methods are called from the event loop of the API, no lock is needed.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.in_flight = 0
+        # Heap of the requests waiting: (priority, arrival, future resolved with True when admitted)
+        self.queue: List[Tuple[int, int, asyncio.Future]] = []
+        self.arrivals = itertools.count()
+        self.rejected: Dict[str, int] = dict.fromkeys(priority_classes, 0)
+
+    async def acquire(self, priority_class: str) -> bool:
+        """
+        Wait until an evaluation can be started
+
+        Parameters:
+            priority_class: Priority class of the request, one of `priority_classes`
+
+        Returns:
+            admitted: False if the request has been rejected because the queue is full
+        """
+        if self.in_flight < self.max_in_flight and not self.queue:
+            self.in_flight += 1
+            return True
+        priority = priority_classes[priority_class]
+        if len(self.queue) >= self.max_queue and not self.shed(priority):
+            self.rejected[priority_class] += 1
+            return False
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.arrivals), future))
+        try:
+            admitted = await future
+        except asyncio.CancelledError:
+            # The client disconnected while waiting, or the slot was given just before the cancellation
+            if future.done() and not future.cancelled() and future.result():
+                self.release()
+            else:
+                self.remove(future)
+            raise
+        if not admitted:
+            self.rejected[priority_class] += 1
+        return admitted
+
+    def shed(self, priority: int) -> bool:
+        """Reject the last request queued with a lower priority than a new request, to make room for it"""
+        if not self.queue:
+            return False
+        worst = max(self.queue, key=lambda entry: (entry[0], entry[1]))
+        if worst[0] <= priority:
+            return False
+        self.queue.remove(worst)
+        heapq.heapify(self.queue)
+        worst[2].set_result(False)
+        return True
+
+    def remove(self, future: asyncio.Future) -> None:
+        self.queue = [entry for entry in self.queue if entry[2] is not future]
+        heapq.heapify(self.queue)
+
+    def release(self) -> None:
+        """Free the slot of an evaluation done, and admit the next request in the queue"""
+        self.in_flight -= 1
+        while self.queue and self.in_flight < self.max_in_flight:
+            _priority, _arrival, future = heapq.heappop(self.queue)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(True)
+
+    def status(self) -> Dict[str, Any]:
+        """Get the number of evaluations running and waiting, and the number of requests rejected"""
+        queued = dict.fromkeys(priority_classes, 0)
+        class_names = {priority: name for name, priority in priority_classes.items()}
+        for priority, _arrival, _future in self.queue:
+            queued[class_names[priority]] += 1
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "rejected": dict(self.rejected),
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying admission control to the evaluation requests (`POST /tests/...`).
+    Requests which cannot be queued get an immediate `503` response with a `Retry-After` header.
+    Requests are interactive by default, they are handled as batch requests when they send the header
+    `X-Priority: batch`, or one of the `batch_api_keys` in the `X-API-Key` header.
+    When it runs inside the `CancellationMiddleware`, requests whose client disconnects are removed from the queue.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        retry_after: int = 10,
+        batch_api_keys: Optional[List[str]] = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.retry_after = retry_after
+        self.batch_api_keys = set(batch_api_keys or [])
+
+    def priority_class(self, headers: Headers) -> str:
+        if headers.get("x-api-key") in self.batch_api_keys:
+            return "batch"
+        priority = headers.get("x-priority", "").strip().lower()
+        return priority if priority in priority_classes else "interactive"
+
+    async def admit(self, priority_class: str) -> bool:
+        """Wait for admission, until the client of the request disconnects"""
+        token = current_cancel_token()
+        if token is None:
+            return await self.controller.acquire(priority_class)
+        token.check()
+        loop = asyncio.get_running_loop()
+        waiting = asyncio.ensure_future(self.controller.acquire(priority_class))
+        with token.on_cancel(lambda: loop.call_soon_threadsafe(waiting.cancel)):
+            try:
+                return await waiting
+            except asyncio.CancelledError:
+                if token.cancelled:
+                    raise EvaluationCancelled() from None
+                raise
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith("/tests/"):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.admit(self.priority_class(Headers(scope=scope))):
+            response = JSONResponse(
+                {"detail": "Too many evaluations running, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from fair_test.fair_test_api import import_metrics_tests
+from fair_test.fair_test_evaluation import FairTestEvaluation
+from fair_test.harvest_plan import HarvestPlan, SubjectHarvest
+from fair_test.json_serializer import json_dumps
+
+# Metrics tests loaded in each worker process, by metric path
+_worker_metrics: Dict[str, Any] = {}
+
+
+def read_subjects(file: IO[str]) -> Iterator[str]:
+    """Read the subjects to evaluate, one per line, ignoring empty lines and comments starting with #"""
+    for line in file:
+        subject = line.strip()
+        if subject and not subject.startswith("#"):
+            yield subject
+
+
+def result_key(subject: str, metric_path: str) -> bytes:
+    """Compact key of an evaluation, to keep millions of evaluations done in memory"""
+    return hashlib.blake2b(f"{metric_path} {subject}".encode(), digest_size=12).digest()
+
+
+def read_checkpoint(output_path: str) -> Set[bytes]:
+    """
+    Get the evaluations already done in a JSONL output file, evaluations which failed with an error
+    and lines partially written are ignored, so that they are evaluated again
+
+    Parameters:
+        output_path: Path of the JSONL output file
+
+    Returns:
+        done: Keys of the evaluations done
+    """
+    done: Set[bytes] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add(result_key(record["subject"], record["metric"]))
+    return done
+
+
+def init_worker(metrics_folder_path: str, metrics: Optional[List[str]] = None) -> None:
+    """Import the metrics tests once in each worker process"""
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    _worker_metrics.clear()
+    for metric in import_metrics_tests(metrics_folder_path):
+        if not metrics or metric.metric_path in metrics:
+            _worker_metrics[metric.metric_path] = metric
+
+
+def evaluate_subject(subject: str, metric_paths: List[str]) -> List[Tuple[bytes, bool]]:
+    """
+    Run metrics tests on a subject, without going through the API. The subject is harvested once
+    for all the metrics tests, only the artefacts they require are harvested
+
+    Parameters:
+        subject: The subject to evaluate
+        metric_paths: Paths of the metrics tests to run
+
+    Returns:
+        lines: The result of each evaluation as a JSON line, and False if the evaluation failed with an error
+    """
+    harvest = SubjectHarvest(HarvestPlan.for_metrics(_worker_metrics[path] for path in metric_paths))
+    results = []
+    for metric_path in metric_paths:
+        record: Dict[str, Any] = {"subject": subject, "metric": metric_path}
+        try:
+            evl = FairTestEvaluation(subject, metric_path, harvest)
+            _worker_metrics[metric_path].evaluate(evl)
+            record["score"] = evl.score
+            record["score_bonus"] = evl.score_bonus
+            record["result"] = evl.to_jsonld()[0]
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            results.append((json_dumps(record) + b"\n", False))
+            continue
+        results.append((json_dumps(record) + b"\n", True))
+    return results
+
+
+class BatchEvaluation:
+    """
+    Run metrics tests on a list of subjects without going through the API, using a pool of processes.
+    Results are appended to a JSONL file (one evaluation per line) as soon as they are available,
+    so that an interrupted run can be resumed, skipping the evaluations already in the file.
+
+    ```python
+    batch = BatchEvaluation("metrics", workers=8)
+    with open("subjects.txt") as f:
+        batch.run(read_subjects(f), "results.jsonl")
+    ```
+    """
+
+    def __init__(
+        self,
+        metrics_folder_path: str = "metrics",
+        metrics: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.metrics_folder_path = metrics_folder_path
+        # Load the metrics in the parent to check the metrics requested exist
+        init_worker(metrics_folder_path, metrics)
+        self.metrics = list(_worker_metrics.keys())
+        if metrics:
+            unknown = set(metrics) - set(self.metrics)
+            if unknown:
+                raise ValueError(f"Unknown metrics tests: {', '.join(unknown)}, available: {', '.join(self.metrics)}")
+        self.workers = workers or os.cpu_count() or 1
+
+    def tasks(
+        self, subjects: Iterator[str], done: Set[bytes], stats: Dict[str, int]
+    ) -> Iterator[Tuple[str, List[str]]]:
+        """Get the metrics tests to run on each subject, skipping the evaluations already done"""
+        for subject in subjects:
+            metric_paths = []
+            for metric_path in self.metrics:
+                if result_key(subject, metric_path) in done:
+                    stats["skipped"] += 1
+                else:
+                    metric_paths.append(metric_path)
+            if metric_paths:
+                yield subject, metric_paths
+
+    def run(self, subjects: Iterator[str], output_path: str, resume: bool = True) -> Dict[str, int]:
+        """
+        Evaluate the subjects with the metrics tests, and append the results to a JSONL file
+
+        Parameters:
+            subjects: Iterator over the subjects to evaluate, read lazily
+            output_path: Path of the JSONL output file
+            resume: Skip the evaluations already in the output file, otherwise the file is overwritten
+
+        Returns:
+            stats: Number of evaluations done, failed with an error, and skipped
+        """
+        done = read_checkpoint(output_path) if resume else set()
+        stats = {"evaluated": 0, "errors": 0, "skipped": 0}
+        tasks = self.tasks(subjects, done, stats)
+
+        if resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                # The last line might have been partially written when the previous run was interrupted
+                missing_newline = f.read(1) != b"\n"
+        else:
+            missing_newline = False
+
+        with open(output_path, "ab" if resume else "wb") as output:
+            if missing_newline:
+                output.write(b"\n")
+
+            def write(results: List[Tuple[bytes, bool]]) -> None:
+                for line, success in results:
+                    output.write(line)
+                    stats["evaluated" if success else "errors"] += 1
+                output.flush()
+
+            if self.workers <= 1:
+                for subject, metric_paths in tasks:
+                    write(evaluate_subject(subject, metric_paths))
+            else:
+                self.run_pool(tasks, write)
+        return stats
+
+    def run_pool(self, tasks: Iterator[Tuple[str, List[str]]], write: Any) -> None:
+        """Run the tasks in a pool of processes, with a bounded number of tasks submitted at once"""
+        max_pending = self.workers * 4
+        pending: Set[Future] = set()
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.metrics_folder_path, self.metrics),
+        ) as executor:
+            for subject, metric_paths in tasks:
+                if len(pending) >= max_pending:
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        write(future.result())
+                pending.add(executor.submit(evaluate_subject, subject, metric_paths))
+            for future in as_completed(pending):
+                write(future.result())
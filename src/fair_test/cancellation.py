@@ -0,0 +1,137 @@
+import asyncio
+import socket
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class EvaluationCancelled(BaseException):
+    """
+    Raised in a running evaluation when its client disconnected. Like `asyncio.CancelledError`,
+    it is not an `Exception`, so that it is not caught by the error handling of the harvester and the metrics tests
+    """
+
+
+class CancelToken:
+    """Shared between a request and the evaluation running in a thread, to stop the evaluation when it is cancelled"""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks: Dict[int, Callable[[], None]] = {}
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the evaluation, and abort the downloads in progress"""
+        with self.lock:
+            self.event.set()
+            callbacks = list(self.callbacks.values())
+        for callback in callbacks:
+            callback()
+
+    def check(self) -> None:
+        """Raise EvaluationCancelled if the evaluation has been cancelled"""
+        if self.event.is_set():
+            raise EvaluationCancelled()
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Call a function if the evaluation is cancelled while in this context, e.g. to abort a download"""
+        with self.lock:
+            self.callbacks[id(callback)] = callback
+        try:
+            if self.event.is_set():
+                callback()
+            yield
+        finally:
+            with self.lock:
+                self.callbacks.pop(id(callback), None)
+
+
+# Token of the evaluation request handled in the current context, copied to the thread running the evaluation
+cancel_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    return cancel_token.get()
+
+
+def abort_response(r: Any) -> None:
+    """Interrupt the download of a `requests` response from another thread, by shutting down its socket"""
+    sock = getattr(getattr(r.raw, "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@dataclass
+class CancellationStats:
+    """Number of evaluations cancelled because their client disconnected"""
+
+    cancelled: int = 0
+
+
+class CancellationMiddleware:
+    """
+    ASGI middleware cancelling the evaluations (`POST /tests/...`) when their client disconnects.
+    The request body is received first, then the connection is watched (also while the request waits for
+    admission), and the token of the evaluation is cancelled if the client disconnects: the downloads in progress
+    are aborted, and the next steps of the harvesting are skipped. The API answers with the status 499
+    (client closed request) for the logs.
+    """
+
+    def __init__(self, app: ASGIApp, stats: CancellationStats) -> None:
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith("/tests/"):
+            await self.app(scope, receive, send)
+            return
+
+        token = CancelToken()
+        disconnected = asyncio.Event()
+        # The body of the evaluation requests is small, it is received before the request is admitted,
+        # so that the connection can be watched while waiting
+        messages: List[Message] = []
+        while not messages or messages[-1].get("more_body", False):
+            messages.append(await receive())
+            if messages[-1]["type"] == "http.disconnect":
+                token.cancel()
+                disconnected.set()
+                break
+
+        async def receive_request() -> Message:
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def watch_disconnect() -> None:
+            if not disconnected.is_set():
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+            token.cancel()
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        reset = cancel_token.set(token)
+        try:
+            await self.app(scope, receive_request, send)
+        except EvaluationCancelled:
+            self.stats.cancelled += 1
+            response = JSONResponse({"detail": "The client disconnected, the evaluation has been cancelled"}, 499)
+            await response(scope, receive, send)
+        finally:
+            cancel_token.reset(reset)
+            watcher.cancel()
@@ -0,0 +1,195 @@
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+
+from fair_test.config import settings
+
+# Breakers of the hosts which did not fail recently are forgotten above this number of hosts
+max_breakers = 10000
+
+
+class HostUnavailableError(requests.ConnectionError):
+    """Raised without sending the request when the circuit breaker of the host is open"""
+
+
+@dataclass
+class CircuitBreaker:
+    """State of the circuit breaker of a host"""
+
+    host: str
+    # Number of consecutive connection failures or timeouts
+    failures: int = 0
+    # When the breaker opened, requests to the host fail fast until the cool-down period is over
+    opened_at: Optional[float] = None
+    # A request is being sent to probe if the host recovered (half-open)
+    probing: bool = False
+    # The host name could not be resolved, it is not resolved again until then
+    dns_failed_until: float = 0
+    # Time of the last failure
+    failed_at: float = 0
+    last_error: Optional[str] = None
+
+
+def is_dns_failure(error: BaseException) -> bool:
+    """Check if a `requests` error was caused by a failure to resolve the host name (e.g. NXDOMAIN)"""
+    seen = set()
+    todo = [error]
+    while todo:
+        e = todo.pop()
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        if isinstance(e, socket.gaierror):
+            return True
+        # requests wraps the urllib3 errors, which keep their cause in `reason`
+        todo.extend([e.__cause__, e.__context__, getattr(e, "reason", None)])
+        todo.extend(arg for arg in e.args if isinstance(arg, BaseException))
+    return False
+
+
+class CircuitBreakers:
+    """
+    Circuit breakers of the hosts requested by the HttpClient (subjects hosts, and external harvester).
+    After `threshold` consecutive connection failures or timeouts, the breaker of a host opens and
+    requests to this host fail immediately with a `HostUnavailableError` during the cool-down period,
+    instead of waiting for the timeouts in every evaluation. Once the cool-down is over,
+    one request is sent to probe the host (half-open): the breaker closes if it succeeds, and opens again if it fails.
+    Host names which could not be resolved are not resolved again for `dns_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        dns_ttl: Optional[float] = None,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.dns_ttl = dns_ttl
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def max_failures(self) -> int:
+        return settings.CIRCUIT_BREAKER_THRESHOLD if self.threshold is None else self.threshold
+
+    @property
+    def cooldown_seconds(self) -> float:
+        return settings.CIRCUIT_BREAKER_COOLDOWN if self.cooldown is None else self.cooldown
+
+    @property
+    def dns_ttl_seconds(self) -> float:
+        return settings.DNS_NEGATIVE_TTL if self.dns_ttl is None else self.dns_ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_failures > 0
+
+    def state(self, breaker: CircuitBreaker) -> str:
+        if breaker.opened_at is None:
+            return "closed"
+        if breaker.probing or time.time() >= breaker.opened_at + self.cooldown_seconds:
+            return "half-open"
+        return "open"
+
+    def before_request(self, host: str) -> None:
+        """
+        Check if a request can be sent to a host
+
+        Parameters:
+            host: Host name of the URL requested
+
+        Raises:
+            HostUnavailableError: The breaker of the host is open, or its name could not be resolved recently
+        """
+        if not host or not self.enabled:
+            return
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if not breaker:
+                return
+            now = time.time()
+            if now < breaker.dns_failed_until:
+                raise HostUnavailableError(
+                    f"The host name {host} could not be resolved {int(now - breaker.dns_failed_until + self.dns_ttl_seconds)}s ago: {breaker.last_error}"
+                )
+            if breaker.opened_at is None:
+                return
+            if breaker.probing or now < breaker.opened_at + self.cooldown_seconds:
+                raise HostUnavailableError(
+                    f"Requests to {host} are suspended after {breaker.failures} consecutive connection failures: {breaker.last_error}"
+                )
+            # The cool-down is over, let this request probe if the host recovered
+            breaker.probing = True
+
+    def record_success(self, host: str) -> None:
+        """Close the breaker of a host after it answered a request (whatever the HTTP status)"""
+        if host in self.breakers:
+            with self.lock:
+                self.breakers.pop(host, None)
+
+    def end_probe(self, host: str) -> None:
+        """
+        Let another request probe the host, when the probe failed for another reason than the connection
+        (e.g. too many redirects, or the evaluation has been cancelled)
+        """
+        if host in self.breakers:
+            with self.lock:
+                breaker = self.breakers.get(host)
+                if breaker:
+                    breaker.probing = False
+
+    def record_failure(self, host: str, error: BaseException) -> None:
+        """Record a connection failure or timeout, and open the breaker of the host if needed"""
+        if not host or not self.enabled:
+            return
+        with self.lock:
+            breaker = self.breakers.setdefault(host, CircuitBreaker(host))
+            now = time.time()
+            breaker.failures += 1
+            breaker.failed_at = now
+            breaker.last_error = str(error)
+            if is_dns_failure(error):
+                breaker.dns_failed_until = now + self.dns_ttl_seconds
+            if breaker.probing or breaker.failures >= self.max_failures:
+                breaker.opened_at = now
+            breaker.probing = False
+            if len(self.breakers) > max_breakers:
+                self.prune(now)
+
+    def prune(self, now: float) -> None:
+        """Forget the closed breakers of the hosts which did not fail during the last cool-down period"""
+        for host, breaker in list(self.breakers.items()):
+            if (
+                breaker.opened_at is None
+                and now > breaker.dns_failed_until
+                and now - breaker.failed_at > self.cooldown_seconds
+            ):
+                del self.breakers[host]
+
+    def after_fork(self) -> None:
+        """Reset the lock in forked worker processes, it could have been held by another thread during the fork"""
+        self.lock = threading.Lock()
+        for breaker in self.breakers.values():
+            breaker.probing = False
+
+    def status(self) -> Dict[str, Any]:
+        """Get the state of the breakers of the hosts which failed recently"""
+        now = time.time()
+        return {
+            host: {
+                "state": self.state(breaker),
+                "failures": breaker.failures,
+                "dns_failure": now < breaker.dns_failed_until,
+                "last_error": breaker.last_error,
+            }
+            for host, breaker in list(self.breakers.items())
+        }
+
+
+# Shared by all the evaluations of the API
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,167 @@
+import argparse
+import gc
+import importlib
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from fair_test.batch_evaluation import BatchEvaluation, read_subjects
+from fair_test.circuit_breaker import circuit_breakers
+from fair_test.fair_test_api import FairTestAPI
+from fair_test.harvest_strategies import strategy_stats
+from fair_test.http_client import http_sessions
+from fair_test.reference_data import reference_data
+
+
+def load_app(app: Optional[str] = None, metrics_folder_path: str = "metrics") -> Any:
+    """
+    Load the FairTestAPI to serve, from an import string (e.g. `main:app`),
+    or build it from a metrics folder
+
+    Parameters:
+        app: Import string of the API, in the format `module:attribute`
+        metrics_folder_path: Folder with the metrics tests, used if no app is given
+
+    Returns:
+        app (FairTestAPI): The API, with all its metrics tests imported
+    """
+    # Metrics tests are imported relatively to the current folder, like with uvicorn
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    if app:
+        module_name, _, attribute = app.partition(":")
+        return getattr(importlib.import_module(module_name), attribute or "app")
+    return FairTestAPI(metrics_folder_path=metrics_folder_path)
+
+
+def gunicorn_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Get the gunicorn settings to serve the API with the arguments of the serve command"""
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        # The API is loaded once in the parent, workers share its memory copy-on-write
+        "preload_app": True,
+        # Workers are recycled after a number of requests, to release the memory they accumulated
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "post_fork": post_fork,
+    }
+
+
+def post_fork(_server: Any, _worker: Any) -> None:
+    """Reset the state shared with the parent process which cannot be used in a worker"""
+    reference_data.after_fork()
+    circuit_breakers.after_fork()
+    http_sessions.after_fork()
+    strategy_stats.after_fork()
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Serve the API with gunicorn and uvicorn workers, forked from a parent process where the API is preloaded"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:  # no cov
+        sys.exit(
+            "❌ gunicorn and uvicorn are required to serve the API, install them with: pip install 'fair-test[serve]'"
+        )
+
+    app = load_app(args.app, args.metrics)
+    # Load the reference datasets in the parent, workers get them without downloading
+    reference_data.load_all()
+    # Move the objects created until now out of the garbage collector, to avoid copying their memory pages in workers
+    gc.collect()
+    gc.freeze()
+
+    class FairTestServer(BaseApplication):  # type: ignore
+        def load_config(self) -> None:
+            for key, value in gunicorn_options(args).items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            return app
+
+    print(f"🚀 Serving the FAIR metrics tests API on http://{args.host}:{args.port} with {args.workers} workers")
+    print("   Send SIGHUP to the parent process to gracefully restart the workers")
+    FairTestServer().run()
+
+
+def evaluate(args: argparse.Namespace) -> None:
+    """Evaluate the subjects in a file (or stdin) with the metrics tests, and write the results to a JSONL file"""
+    batch = BatchEvaluation(args.metrics, metrics=args.metric, workers=args.workers)
+    print(
+        f"⏳️ Evaluating subjects with {len(batch.metrics)} metrics tests using {batch.workers} processes, writing results to {args.output}",
+        file=sys.stderr,
+    )
+    subjects_file = sys.stdin if args.subjects == "-" else open(args.subjects, encoding="utf-8")
+    try:
+        stats = batch.run(read_subjects(subjects_file), args.output, resume=not args.no_resume)
+    finally:
+        if subjects_file is not sys.stdin:
+            subjects_file.close()
+    print(
+        f"✅ {stats['evaluated']} evaluations done, {stats['errors']} errors, {stats['skipped']} already done skipped",
+        file=sys.stderr,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fair-test", description="Deploy and run FAIR metrics tests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the FAIR metrics tests API using all the CPU cores")
+    serve_parser.add_argument("--app", help="Import string of the FairTestAPI to serve, e.g. main:app")
+    serve_parser.add_argument(
+        "--metrics", default="metrics", help="Folder with the metrics tests, used when no --app is given"
+    )
+    serve_parser.add_argument("--host", default="0.0.0.0", help="Host to bind")  # noqa: S104
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    serve_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)"
+    )
+    serve_parser.add_argument(
+        "--max-requests", type=int, default=1000, help="Restart a worker after this number of requests (0 to disable)"
+    )
+    serve_parser.add_argument(
+        "--max-requests-jitter", type=int, default=100, help="Random jitter added to --max-requests"
+    )
+    serve_parser.add_argument(
+        "--timeout", type=int, default=600, help="Kill workers silent for more than this number of seconds"
+    )
+    serve_parser.add_argument(
+        "--graceful-timeout", type=int, default=60, help="Seconds to let workers finish their requests when restarting"
+    )
+    serve_parser.set_defaults(func=serve)
+
+    evaluate_parser = subparsers.add_parser(
+        "evaluate", help="Evaluate a list of subjects with the metrics tests, without running the API"
+    )
+    evaluate_parser.add_argument(
+        "subjects", nargs="?", default="-", help="File with the subjects to evaluate, one per line (default: stdin)"
+    )
+    evaluate_parser.add_argument("--metrics", default="metrics", help="Folder with the metrics tests")
+    evaluate_parser.add_argument(
+        "--metric", action="append", help="Path of a metric test to run, can be repeated (default: all metrics tests)"
+    )
+    evaluate_parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="JSONL file where the results are appended"
+    )
+    evaluate_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)"
+    )
+    evaluate_parser.add_argument(
+        "--no-resume", action="store_true", help="Overwrite the output file instead of skipping the evaluations done"
+    )
+    evaluate_parser.set_defaults(func=evaluate)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":  # no cov
+    main()
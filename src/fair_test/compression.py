@@ -0,0 +1,108 @@
+import gzip
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # no cov
+    brotli = None
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Select the best compression supported by the client from the Accept-Encoding header (brotli in priority)
+
+    Parameters:
+        accept_encoding: Value of the Accept-Encoding header sent by the client
+
+    Returns:
+        encoding: `br`, `gzip`, or None if the client does not accept a supported compression
+    """
+    accepted: List[Tuple[str, float]] = []
+    for entry in accept_encoding.split(","):
+        parts = entry.strip().split(";")
+        quality = 1.0
+        for param in parts[1:]:
+            if param.strip().startswith("q="):
+                try:
+                    quality = float(param.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+        if parts[0] and quality > 0:
+            accepted.append((parts[0].strip().lower(), quality))
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = None
+    best_quality = 0.0
+    for encoding in supported:
+        for accepted_encoding, quality in accepted:
+            if accepted_encoding in (encoding, "*") and quality > best_quality:
+                best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli (if installed) or gzip, depending on the Accept-Encoding
+    sent by the client. Only complete responses bigger than `minimum_size` bytes are compressed,
+    streaming responses are sent as is.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            assert start_message is not None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers:
+                # Streaming, small, or already encoded responses are not compressed
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
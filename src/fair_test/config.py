@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseSettings
 
 
@@ -10,6 +12,80 @@ class Settings(BaseSettings):
     CONTACT_ORCID: str = "0000-0002-1501-1082"
     ORG_NAME: str = "Institute of Data Science at Maastricht University"
     DEFAULT_SUBJECT: str = "https://doi.org/10.1594/PANGAEA.908011"
+    # Serializer used for the evaluations results: auto (orjson if installed), orjson or json
+    JSON_SERIALIZER: str = "auto"
+    # Store and parsers used for the RDF harvested: rdflib or oxigraph (requires oxrdflib)
+    GRAPH_BACKEND: str = "rdflib"
+    # Harvested artefacts added to the evaluation metadata: minimal, summary or full (e.g. include extruct outputs)
+    METADATA_VERBOSITY: str = "summary"
+    # Maximum size of each field of the evaluation metadata in bytes, bigger fields are truncated (0 for no limit)
+    METADATA_MAX_FIELD_BYTES: int = 100000
+    # Maximum size in bytes of the page downloaded when resolving the subject URL (0 for no limit)
+    HARVEST_MAX_PAGE_BYTES: int = 20000000
+    # Maximum size in bytes of the RDF downloaded through content negotiation or from the harvester service (0 for no limit)
+    HARVEST_MAX_RDF_BYTES: int = 100000000
+    # Maximum number of triples parsed from N-Triples/N-Quads documents parsed while downloading (0 for no limit)
+    HARVEST_MAX_TRIPLES: int = 1000000
+    # Number of characters at the start of a document used to guess its RDF format, when its content type does not tell it
+    HARVEST_SNIFF_SIZE: int = 4096
+    # Number of lines checked to detect the N-Triples/N-Quads line shape when guessing the RDF format
+    HARVEST_SNIFF_LINES: int = 20
+    # Maximum number of Signposting links followed in a row from the resource URL
+    SIGNPOSTING_MAX_DEPTH: int = 2
+    # Maximum number of Signposting links followed from each document
+    SIGNPOSTING_MAX_LINKS: int = 10
+    # Number of Signposting links fetched concurrently
+    SIGNPOSTING_WORKERS: int = 4
+    # Number of URLs harvested or fetched concurrently by the metrics, with retrieve_metadata_many() and fetch_many()
+    HARVEST_WORKERS: int = 4
+    # Syntaxes extracted from HTML pages with extruct, by order of priority (e.g. rdfa is not extracted if JSON-LD RDF is found)
+    EXTRUCT_SYNTAXES: List[str] = ["json-ld", "rdfa", "microdata", "dublincore"]
+    # Number of seconds before refreshing the reference datasets used by the metrics (e.g. the list of vocabularies in LOV)
+    REFERENCE_DATA_TTL: int = 86400
+    # Number of seconds before downloading a reference dataset again after a failure, doubled after each failure (up to its TTL)
+    REFERENCE_DATA_RETRY_DELAY: int = 60
+    # Folder where the last good copy of the reference datasets is stored
+    REFERENCE_DATA_DIR: str = "~/.cache/fair-test/reference-data"
+    # Metadata of DOIs from their registration agency (DataCite, Crossref) on doi.org: merge (added to the metadata of the landing page), prefer (tried before the landing page, which is not resolved if it found RDF), or off
+    DOI_METADATA: str = "merge"
+    # Try first the harvesting strategies which found RDF for the previous subjects of the same host
+    HARVEST_STRATEGY_ADAPTIVE: bool = True
+    # Share of the evaluations using the default order of the strategies, to notice changes at the source
+    HARVEST_STRATEGY_EXPLORATION: float = 0.1
+    # Weight of the last evaluation in the statistics of the strategies, higher values adapt faster
+    HARVEST_STRATEGY_DECAY: float = 0.3
+    # JSON file where the statistics of the strategies are saved to be used after a restart (empty to keep them in memory)
+    HARVEST_STRATEGY_STATS_PATH: str = ""
+    # Number of consecutive connection failures or timeouts before requests to a host are suspended (0 to disable)
+    CIRCUIT_BREAKER_THRESHOLD: int = 3
+    # Number of seconds requests to a host are suspended, before sending a request to check if it recovered
+    CIRCUIT_BREAKER_COOLDOWN: int = 60
+    # Number of seconds a host name which could not be resolved is not resolved again
+    DNS_NEGATIVE_TTL: int = 300
+    # Number of times an idempotent request failing with a transient error (429, 502, 503, 504, connection reset) is retried
+    HTTP_RETRIES: int = 2
+    # Number of seconds of the first backoff before retrying, doubled for each retry, with random jitter
+    HTTP_RETRY_BACKOFF: float = 0.5
+    # Maximum number of seconds waited before a retry, requests asking a longer Retry-After are not retried
+    HTTP_RETRY_MAX_WAIT: float = 10
+    # Maximum number of retries for all the requests of an evaluation
+    HTTP_RETRY_BUDGET: int = 6
+    # Number of seconds after the start of an evaluation after which failed requests are not retried anymore
+    HTTP_RETRY_DEADLINE: float = 60
+    # SQLite database where the results of the evaluations are stored to be reused (empty to disable)
+    RESULT_STORE_PATH: str = ""
+    # Number of seconds the result of an evaluation is reused, instead of evaluating the subject again
+    RESULT_STORE_TTL: int = 3600
+    # Maximum number of evaluations running at once in each worker of the API (0 to disable the admission control)
+    MAX_CONCURRENT_EVALUATIONS: int = 32
+    # Maximum number of evaluations waiting to run in each worker, the API answers 503 to the next requests
+    MAX_QUEUED_EVALUATIONS: int = 100
+    # Number of seconds sent in the Retry-After header of the requests rejected
+    RETRY_AFTER: int = 10
+    # API keys (sent in the X-API-Key header) of the clients whose evaluations are queued after the interactive ones
+    BATCH_API_KEYS: List[str] = []
+    # Responses bigger than this size in bytes are compressed with brotli or gzip
+    COMPRESSION_MIN_SIZE: int = 1000
 
     class Config:
         env_file = ".env"
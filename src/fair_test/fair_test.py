@@ -2,15 +2,20 @@ from typing import Optional
 
 import yaml
 from fastapi import HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 
 from fair_test import FairTestEvaluation
 from fair_test.config import settings
+from fair_test.harvest_plan import HarvestPlan, SubjectHarvest
+from fair_test.json_serializer import FairTestJSONResponse
+from fair_test.result_store import result_store
 
 
 class MetricInput(BaseModel):
     subject: str = settings.DEFAULT_SUBJECT
+    # Evaluate the subject again even if a fresh result is stored
+    force: bool = False
 
 
 class FairTest(BaseModel):
@@ -62,6 +67,9 @@ class FairTest(BaseModel):
     # test_test: Dict[str, int] = {}
     topics = []  # type: ignore
     test_test = {}  # type: ignore
+    # Artefacts of the subject used by the metric test, e.g. ["http_response"], only those are harvested.
+    # Empty to harvest the metadata with all the strategies
+    requires = []  # type: ignore
 
     author: str = settings.CONTACT_ORCID
     contact_url: str = settings.CONTACT_URL
@@ -75,6 +83,8 @@ class FairTest(BaseModel):
 
         if not self.metric_readme_url:
             self.metric_readme_url = f"{settings.HOST_URL}/tests/{self.metric_path}"
+        # Check the artefacts required are known when the metric test is loaded
+        HarvestPlan.for_metrics([self])
 
     class Config:
         arbitrary_types_allowed = True
@@ -83,11 +93,28 @@ class FairTest(BaseModel):
         if input.subject == "":
             raise HTTPException(status_code=422, detail="Provide a subject URL to evaluate")
 
+        if result_store.enabled and not input.force:
+            stored = result_store.get(input.subject, self.metric_path, self.metric_version)
+            if stored:
+                age = int(stored.age)
+                return Response(
+                    content=stored.content,
+                    media_type=stored.media_type,
+                    headers={"Cache-Control": f"max-age={max(result_store.max_age - age, 0)}", "Age": str(age)},
+                )
+
         # TODO: create separate object for each FAIR test evaluation to avoid any conflict? e.g. FairTestEvaluation
-        evl = FairTestEvaluation(input.subject, self.metric_path)
+        evl = FairTestEvaluation(
+            input.subject, self.metric_path, SubjectHarvest(HarvestPlan.for_metrics([self]), shared=False)
+        )
         # self.subject = input.subject
 
-        return self.evaluate(evl)
+        response = self.evaluate(evl)
+        # Only completed evaluations (returned by eval.response()) are stored, not the errors returned by the metric test
+        if result_store.enabled and isinstance(response, FairTestJSONResponse) and response.status_code == 200:
+            result_store.set(input.subject, self.metric_path, self.metric_version, response.body, response.media_type)
+            response.headers["Cache-Control"] = f"max-age={result_store.max_age}"
+        return response
         # try:
         #     return self.evaluate(eval)
         # except Exception e:
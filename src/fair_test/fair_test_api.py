@@ -1,13 +1,52 @@
+import importlib
 import os
 import time
-from typing import Any
+from typing import Any, Callable, List, Optional
 
 import yaml
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
+from fair_test.admission_control import AdmissionController, AdmissionControlMiddleware
+from fair_test.cancellation import CancellationMiddleware, CancellationStats
+from fair_test.circuit_breaker import circuit_breakers
+from fair_test.compression import CompressionMiddleware
 from fair_test.config import settings
+from fair_test.reference_data import reference_data
+
+
+def get_metrics_tests_filepaths(metrics_folder_path: str) -> List[str]:
+    """Get the path of the python files of the metrics tests in a folder, relative to the folder and without extension"""
+    assess_name_list = []
+    for path, _subdirs, files in os.walk(metrics_folder_path):
+        for filename in files:
+            if not path.endswith("__pycache__") and not filename.endswith("__init__.py"):
+                filepath = path.replace(metrics_folder_path, "")
+                if filepath:
+                    assess_name_list.append(filepath[1:] + "/" + filename[:-3])
+                else:
+                    assess_name_list.append(filename[:-3])
+    return assess_name_list
+
+
+def import_metrics_tests(metrics_folder_path: str) -> List[Any]:
+    """
+    Import the metrics tests defined in a folder, the folder is imported as a python module relatively to the current folder
+
+    Parameters:
+        metrics_folder_path: Folder with the metrics tests, each file defines a `MetricTest` class
+
+    Returns:
+        metrics (List[FairTest]): An instance of each metric test
+    """
+    metrics_module = metrics_folder_path.replace("/", ".")
+    metrics = []
+    for assess_name in get_metrics_tests_filepaths(metrics_folder_path):
+        assess_module = assess_name.replace("/", ".")
+        metric_test = importlib.import_module(f"{metrics_module}.{assess_module}").MetricTest
+        metrics.append(metric_test())
+    return metrics
 
 
 class FairTestAPI(FastAPI):
@@ -38,6 +77,7 @@ class FairTestAPI(FastAPI):
         description="FAIR Metrics Test API for online resources. Follows the specifications described by the [FAIRMetrics](https://github.com/FAIRMetrics/Metrics) working group. \nBuilt with the [**fair-test** library](https://maastrichtu-ids.github.io/fair-test)",
         version="0.1.0",
         cors_enabled=True,
+        compression_enabled=True,
         public_url="https://metrics.api.fair-enough.semanticscience.org",
         metrics_folder_path="metrics",
         contact={
@@ -67,6 +107,24 @@ class FairTestAPI(FastAPI):
             license_info=license_info,
         )
 
+        self.admission = AdmissionController(settings.MAX_CONCURRENT_EVALUATIONS, settings.MAX_QUEUED_EVALUATIONS)
+        if settings.MAX_CONCURRENT_EVALUATIONS > 0:
+            self.add_middleware(
+                AdmissionControlMiddleware,
+                controller=self.admission,
+                retry_after=settings.RETRY_AFTER,
+                batch_api_keys=settings.BATCH_API_KEYS,
+            )
+
+        # The middlewares added last are run first. Evaluations are cancelled when their client disconnects,
+        # also while they wait for admission
+        self.cancellations = CancellationStats()
+        self.add_middleware(CancellationMiddleware, stats=self.cancellations)
+
+        if compression_enabled:
+            self.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+        # CORS headers are added to all the responses, including the 503 and 499 answered by the middlewares above
         if cors_enabled:
             self.add_middleware(
                 CORSMiddleware,
@@ -76,19 +134,8 @@ class FairTestAPI(FastAPI):
                 allow_headers=["*"],
             )
 
-        metrics_module = metrics_folder_path.replace("/", ".")
-
-        # First get the metrics tests filepath
-        assess_name_list = self.get_metrics_tests_filepaths()
-
-        # Then import each metric test listed in the metrics folder
-        for assess_name in assess_name_list:
-            assess_module = assess_name.replace("/", ".")
-            import importlib
-
-            metric_test = importlib.import_module(f"{metrics_module}.{assess_module}").MetricTest
-            metric = metric_test()
-
+        # Import each metric test listed in the metrics folder
+        for metric in import_metrics_tests(metrics_folder_path):
             try:
                 # cf. https://github.com/tiangolo/fastapi/blob/master/fastapi/routing.py#L479
                 self.add_api_route(
@@ -119,34 +166,50 @@ class FairTestAPI(FastAPI):
             response.headers["X-Process-Time"] = str(process_time)
             return response
 
+        @self.get("/status", name="Status of the external services used by the metrics tests")
+        def status():
+            # Evaluations running and queued, hosts which failed recently, and age of the reference datasets
+            return {
+                "admission": self.admission.status(),
+                "cancelled_evaluations": self.cancellations.cancelled,
+                "circuit_breakers": circuit_breakers.status(),
+                "reference_data": reference_data.status(),
+            }
+
         @self.get("/", include_in_schema=False)
         def redirect_root_to_docs():
             # Redirect the route / to /docs
             return RedirectResponse(url="/docs")
 
+    def register_reference_data(
+        self,
+        url: str,
+        ttl: Optional[int] = None,
+        preprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """
+        Register a JSON reference dataset used by the metrics tests. It is loaded from its copy on disk,
+        or downloaded in the background, as soon as it is registered instead of during the first evaluation.
+        Metrics get the dataset with `eval.get_reference_data(url)`
+
+        ```python title="main.py"
+        app = FairTestAPI(metrics_folder_path='metrics')
+        app.register_reference_data("https://lov.linkeddata.es/dataset/lov/api/v2/vocabulary/list", ttl=86400)
+        ```
+
+        Parameters:
+            url: URL of the JSON dataset
+            ttl: Number of seconds before refreshing the dataset. Defaults to the `REFERENCE_DATA_TTL` setting
+            preprocess: Function called on the JSON downloaded, e.g. to build an index of the dataset
+        """
+        reference_data.preload(url, ttl, preprocess)
+
     def get_metrics_tests_filepaths(self):
-        assess_name_list = []
-        for path, _subdirs, files in os.walk(self.metrics_folder_path):
-            for filename in files:
-                if not path.endswith("__pycache__") and not filename.endswith("__init__.py"):
-                    filepath = path.replace(self.metrics_folder_path, "")
-                    if filepath:
-                        assess_name_list.append(filepath[1:] + "/" + filename[:-3])
-                    else:
-                        assess_name_list.append(filename[:-3])
-        return assess_name_list
+        return get_metrics_tests_filepaths(self.metrics_folder_path)
 
     def get_metrics_tests_tests(self):
-        metrics_module = self.metrics_folder_path.replace("/", ".")
-        metrics_paths = self.get_metrics_tests_filepaths()
         test_tests = []
-        for metrics_name in metrics_paths:
-            assess_module = metrics_name.replace("/", ".")
-            import importlib
-
-            metric_test = importlib.import_module(f"{metrics_module}.{assess_module}").MetricTest
-
-            metric = metric_test()
+        for metric in import_metrics_tests(self.metrics_folder_path):
             for subj, score in metric.test_test.items():
                 test_tests.append({"subject": subj, "score": score, "metric_id": metric.metric_path})
         return test_tests
@@ -1,14 +1,22 @@
 import datetime
-from typing import Any, Dict, List, Optional
-from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote
 
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from rdflib import BNode, Literal, URIRef
+import requests
+from pydantic import BaseModel, PrivateAttr
+from rdflib import BNode, URIRef
 
 from fair_test.config import settings
 from fair_test.fair_test_logger import FairTestLogger
-from fair_test.metadata_harvester import MetadataHarvester
+from fair_test.graph_index import GraphIndex, normalize_scheme
+from fair_test.harvest_plan import SubjectHarvest
+from fair_test.http_client import HttpClient, RetryBudget
+from fair_test.identifiers import alternative_uris
+from fair_test.json_serializer import FairTestJSONResponse, json_dumps
+from fair_test.metadata_harvester import MetadataHarvester, harvest_artefacts
+from fair_test.namespace_index import PrefixIndex
+from fair_test.reference_data import reference_data
 
 # pyld is required to parse jsonld with rdflib
 # from fastapi import HTTPException
@@ -56,28 +64,24 @@ class FairTestEvaluation(BaseModel):
     id: Optional[str]  # URL of the test results
     logs: FairTestLogger = FairTestLogger()
 
-    def __init__(self, subject: str, metric_path: str) -> None:
+    def __init__(self, subject: str, metric_path: str, harvest: Optional[SubjectHarvest] = None) -> None:
         super().__init__()
+        if harvest is not None:
+            self._harvest = harvest
         self.subject = subject
         self.id = f"{settings.HOST_URL}/metrics/{metric_path}#{quote(str(self.subject))}/result-{self.date}"
         self.subject_url = self.get_url(subject)
 
-        # Add potential alternative URIs for the subject
+        # Add potential alternative URIs for the subject (http/https counterpart, and other DOI resolvers)
         if self.subject_url:
-            alt_uris = set()
-            alt_uris.add(self.subject_url)
-            # Add HTTPS/HTTPS counterpart as alternative URIs
-            if self.subject_url.startswith("http://"):
-                alt_uris.add(self.subject_url.replace("http://", "https://"))
-            elif self.subject.startswith("https://"):
-                alt_uris.add(self.subject_url.replace("https://", "http://"))
+            self.data["alternative_uris"] = alternative_uris([self.subject_url])
 
-            # Fix to add an alternative URI for doi.org that is commonly used as identifier in the metadata
-            parsed_url = urlparse(self.subject_url)
-            if parsed_url.netloc and parsed_url.netloc == "doi.org":
-                alt_uris.add("http://dx.doi.org/" + parsed_url.path[1:])
-
-            self.data["alternative_uris"] = list(alt_uris)
+    # Indexes of the graphs used by the extract helpers, by graph id
+    _graph_indexes: Dict[int, Tuple[Any, GraphIndex]] = PrivateAttr(default_factory=dict)
+    # Retries of the failed requests left for the evaluation, shared by all the metadata retrieved
+    _retry_budget: RetryBudget = PrivateAttr(default_factory=RetryBudget)
+    # Artefacts of the subject harvested once, possibly shared with the evaluations of other metrics tests
+    _harvest: SubjectHarvest = PrivateAttr(default_factory=lambda: SubjectHarvest(shared=False))
 
     class Config:
         arbitrary_types_allowed = True
@@ -88,10 +92,8 @@ class FairTestEvaluation(BaseModel):
 
     def get_url(self, id: str) -> Optional[str]:
         """Return the full URL for a given identifiers (e.g. URL, DOI, handle)"""
-        harvester = MetadataHarvester()
-        url = harvester.get_url(id)
-        self.logs.logs += harvester.logs.logs
-        return url
+        harvester = MetadataHarvester(logs=self.logs)
+        return harvester.get_url(id)
 
     def retrieve_metadata(
         self,
@@ -106,7 +108,9 @@ class FairTestEvaluation(BaseModel):
         - Extracting JSON-LD embedded in the HTML
         - Asking RDF through content-negociation
         - Can return JSON found as a fallback, if RDF metadata is not found
-        You can also use an external harvester API to get the RDF metadata
+        You can also use an external harvester API to get the RDF metadata.
+        The metadata of the subject is harvested once, with the strategies needed for the artefacts
+        required by the metrics tests run (see `FairTest.requires`)
 
         Parameters:
             url: URL to retrieve RDF from
@@ -117,13 +121,194 @@ class FairTestEvaluation(BaseModel):
             g (Graph): A RDFLib Graph with the RDF found at the given URL
         """
         # TODO: implement metadata harvester outside of this class (to be used as API)
-        harvester = MetadataHarvester(
-            subject=url,
-        )
-        metadata = harvester.retrieve_metadata(url, use_harvester=use_harvester, harvester_url=harvester_url)
+        if self.subject_url and url in (self.subject, self.subject_url):
+            metadata, harvester = self._harvest.retrieve_metadata(
+                self.subject_url, self.new_harvester, use_harvester=use_harvester, harvester_url=harvester_url
+            )
+        else:
+            harvester = self.new_harvester()
+            metadata = harvester.retrieve_metadata(url, use_harvester=use_harvester, harvester_url=harvester_url)
         self.logs.logs += harvester.logs.logs
+        self.add_harvest_data(harvester.data)
         return metadata
 
+    def resolve_subject(self) -> requests.Response:
+        """
+        Resolve the subject URL, e.g. to check it is accessible. Only the status and headers of the response
+        are received, the body is not downloaded. The response is shared with the other metrics tests run on the subject
+
+        Returns:
+            response: The response, with its status, headers and redirections (`r.history`)
+
+        Raises:
+            RequestException: The subject could not be resolved
+        """
+        if not self.subject_url:
+            raise requests.exceptions.InvalidURL(f"The resource {self.subject} could not be converted to a valid URL")
+        return self._harvest.resolve(self.subject_url, HttpClient(retry_budget=self._retry_budget))
+
+    def retrieve_metadata_many(
+        self,
+        urls: Iterable[str],
+        use_harvester: bool = False,
+        harvester_url: str = "https://w3id.org/FAIR_Tests/tests/harvester",
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve metadata from multiple URLs concurrently (e.g. the URIs of the distributions of a dataset),
+        like `retrieve_metadata()`. The logs of each URL are added to the evaluation logs one URL after the other,
+        in the order of the URLs
+
+        Parameters:
+            urls: URLs to retrieve RDF from
+            use_harvester: Use an external harvester to retrieve the RDF instead of the built-in python harvester
+            harvester_url: URL of the RDF harvester used
+            max_workers: Number of URLs harvested at once. Defaults to the `HARVEST_WORKERS` setting
+
+        Returns:
+            metadata: The RDFLib Graph (or JSON found as a fallback) retrieved for each URL, in the order of the URLs
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        # The harvesters are created in the thread of the evaluation, to use its cancel token
+        harvesters = [self.new_harvester() for _url in urls]
+
+        def harvest(job: Tuple[str, MetadataHarvester]) -> Any:
+            url, harvester = job
+            return harvester.retrieve_metadata(url, use_harvester=use_harvester, harvester_url=harvester_url)
+
+        workers = min(len(urls), max_workers or settings.HARVEST_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(harvest, zip(urls, harvesters)))
+        for harvester in harvesters:
+            self.logs.logs += harvester.logs.logs
+            self.add_harvest_data(harvester.data)
+        return dict(zip(urls, results))
+
+    def fetch_many(
+        self,
+        urls: Iterable[str],
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Union[requests.Response, Exception]]:
+        """
+        Send GET requests to multiple URLs concurrently, e.g. to check if the data is available as JSON.
+        Requests use the same limits, retries and circuit breakers as the harvesting
+
+        Parameters:
+            urls: URLs to fetch
+            headers: HTTP headers sent with each request, e.g. `{"accept": "application/json"}`
+            max_bytes: Maximum number of bytes read from each response. Defaults to the `HARVEST_MAX_RDF_BYTES` setting
+            max_workers: Number of URLs fetched at once. Defaults to the `HARVEST_WORKERS` setting
+
+        Returns:
+            responses: The response for each URL, or the exception raised if the request failed, in the order of the URLs
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        http = HttpClient(retry_budget=self._retry_budget)
+        max_bytes = settings.HARVEST_MAX_RDF_BYTES if max_bytes is None else max_bytes
+
+        def fetch(url: str) -> Union[requests.Response, Exception]:
+            try:
+                return http.get(url, headers=headers, max_bytes=max_bytes)
+            except Exception as e:
+                return e
+
+        workers = min(len(urls), max_workers or settings.HARVEST_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(urls, executor.map(fetch, urls)))
+
+    def new_harvester(self) -> MetadataHarvester:
+        """Create a harvester for the evaluation subject, sharing the retry budget of the evaluation"""
+        return MetadataHarvester(
+            subject=self.subject_url,
+            data={"alternative_uris": list(self.data.get("alternative_uris", []))},
+            http=HttpClient(retry_budget=self._retry_budget),
+        )
+
+    def get_reference_data(
+        self,
+        url: str,
+        ttl: Optional[int] = None,
+        preprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Get a JSON reference dataset used by the metric (e.g. the list of vocabularies in LOV), it is downloaded
+        once and shared between all evaluations, then refreshed in the background when expired.
+        The `preprocess` function is called once per download, e.g. to build an index from the dataset
+
+        Parameters:
+            url: URL of the JSON dataset
+            ttl: Number of seconds before refreshing the dataset. Defaults to the `REFERENCE_DATA_TTL` setting
+            preprocess: Function called on the JSON downloaded, its result is returned
+
+        Returns:
+            data: The dataset, preprocessed if a preprocess function is given
+        """
+        data = reference_data.get(url, ttl, preprocess)
+        dataset = reference_data.datasets[url]
+        if dataset.last_error:
+            self.warn(
+                f"Could not refresh the reference dataset {url}, using the copy from {dataset.age:.0f}s ago: {dataset.last_error}"
+            )
+        return data
+
+    def add_harvest_data(self, harvest_data: Dict[str, Any], verbosity: Optional[str] = None) -> None:
+        """
+        Add the data collected while harvesting the subject metadata to the evaluation data.
+        Which artefacts are added (e.g. redirection, signposting links, extruct outputs) depends on the verbosity.
+
+        Parameters:
+            harvest_data: Data collected by the MetadataHarvester
+            verbosity: `minimal`, `summary` or `full`. Defaults to the `METADATA_VERBOSITY` setting
+        """
+        verbosity = verbosity or settings.METADATA_VERBOSITY
+        if verbosity not in harvest_artefacts:
+            raise ValueError(f"Unknown metadata verbosity {verbosity}, use one of: {', '.join(harvest_artefacts)}")
+
+        if "alternative_uris" in self.data:
+            for alt_uri in harvest_data.get("alternative_uris", []):
+                if alt_uri not in self.data["alternative_uris"]:
+                    self.data["alternative_uris"].append(alt_uri)
+        for artefact in harvest_artefacts[verbosity]:
+            if artefact in harvest_data:
+                self.data[artefact] = harvest_data[artefact]
+
+    def graph_index(self, g: Any) -> GraphIndex:
+        """
+        Get the index of a RDFLib Graph used by the extract helpers, it is built once per graph for each evaluation,
+        and rebuilt when the number of triples of the graph changed. Call `invalidate_graph_index(g)` after
+        modifying a graph without changing its size (e.g. replacing a triple)
+
+        Parameters:
+            g (Graph): RDFLib Graph
+
+        Returns:
+            index: Index of the triples of the graph by scheme-normalized predicate
+        """
+        cached = self._graph_indexes.get(id(g))
+        if cached and cached[0] is g and len(cached[1]) == len(g):
+            return cached[1]
+        index = GraphIndex(g)
+        self._graph_indexes[id(g)] = (g, index)
+        return index
+
+    def invalidate_graph_index(self, g: Optional[Any] = None) -> None:
+        """
+        Rebuild the index of a graph the next time it is used, after it has been modified
+
+        Parameters:
+            g (Graph): RDFLib Graph modified, all the graphs if None
+        """
+        if g is None:
+            self._graph_indexes.clear()
+        else:
+            self._graph_indexes.pop(id(g), None)
+
     def extract_prop(self, g: Any, preds: List[Any], subj: Optional[Any] = None) -> List[Any]:
         """
         Helper to extract properties from a RDFLib Graph
@@ -136,30 +321,50 @@ class FairTestEvaluation(BaseModel):
         Returns:
             props: A list of the values found for the given properties
         """
+        index = self.graph_index(g)
         values = set()
-        check_preds = set()
-        for pred in preds:
-            # Add the http/https counterpart for each predicate
-            check_preds.add(URIRef(str(pred)))
-            if str(pred).startswith("http://"):
-                check_preds.add(URIRef(str(pred).replace("http://", "https://")))
-            elif str(pred).startswith("https://"):
-                check_preds.add(URIRef(str(pred).replace("https://", "http://")))
-
-        # self.info(f"Checking properties values for properties: {preds}")
-        # if subj:
-        #     self.info(f"Checking properties values for subject URI(s): {str(subj)}")
-        for pred in list(check_preds):
-            if not isinstance(subj, list):
-                subj = [subj]
-                # test_subjs = [URIRef(str(s)) for s in subj]
+        if not isinstance(subj, list):
+            subj = [subj]
+        # The index matches the http/https counterpart for each predicate
+        for pred in {normalize_scheme(p) for p in preds}:
             for test_subj in subj:
-                for _s, _p, o in g.triples((test_subj, URIRef(str(pred)), None)):
-                    self.info(f"Found a value for a property {str(pred)} => {str(o)}")
+                for _s, p, o in index.triples(test_subj, pred):
+                    self.info(f"Found a value for a property {str(p)} => {str(o)}")
                     values.add(o)
 
         return list(values)
 
+    def extract_namespaces(self, g: Any) -> List[str]:
+        """
+        Helper to extract the namespaces of the IRIs used in a RDFLib Graph (subjects, predicates, objects,
+        and literals datatypes), without serializing the graph
+
+        Parameters:
+            g (Graph): RDFLib Graph
+
+        Returns:
+            namespaces: Sorted list of the namespaces used in the graph
+        """
+        return self.graph_index(g).namespaces()
+
+    def match_namespaces(
+        self, namespaces: Iterable[str], vocabularies: Union[PrefixIndex, Iterable[str]]
+    ) -> Dict[str, str]:
+        """
+        Helper to match namespaces against a list of vocabularies namespaces (e.g. the vocabularies in LOV).
+        A namespace is matched when it starts with the namespace of a vocabulary.
+        Pass a PrefixIndex to build the index of the vocabularies only once (e.g. when preprocessing a reference dataset)
+
+        Parameters:
+            namespaces: Namespaces to check, e.g. extracted with `extract_namespaces()`
+            vocabularies: Namespaces of the vocabularies, or their PrefixIndex
+
+        Returns:
+            matches: The namespace of the vocabulary found for each namespace matched
+        """
+        index = vocabularies if isinstance(vocabularies, PrefixIndex) else PrefixIndex(vocabularies)
+        return index.match(namespaces)
+
     def extract_metadata_subject(self, g: Any, alt_uris: Optional[List[str]] = None) -> Any:
         """
         Helper to extract the subject URI to which metadata about the resource is attached in a RDFLib Graph
@@ -171,7 +376,6 @@ class FairTestEvaluation(BaseModel):
         Returns:
             subject_uri: The subject URI used as ID in the metadata
         """
-        subject_uri = None
         if not alt_uris:
             alt_uris = self.data["alternative_uris"]
 
@@ -182,41 +386,23 @@ class FairTestEvaluation(BaseModel):
             "https://schema.org/sameAs",
             "http://ogp.me/ns#url",
         ]
-        all_preds_id = [p.replace("https://", "http://") for p in preds_id] + preds_id
-        all_preds_uris = [URIRef(str(s)) for s in all_preds_id]
-        resource_properties = {}
-        resource_linked_to = {}
-
-        for alt_uri in alt_uris:  # type: ignore
-            uri_ref = URIRef(str(alt_uri))
-            # Search with the subject URI as triple subject
-            for s, p, o in g.triples((uri_ref, None, None)):
-                self.info(f"Found the subject URI in the metadata: {str(s)}")
-                resource_properties[str(p)] = str(o)
-                subject_uri = uri_ref
-
-            if not subject_uri:
-                # Search with the subject URI as triple object
-                for pred in all_preds_uris:
-                    for s, p, _o in g.triples((None, pred, uri_ref)):
-                        self.info(f"Found the subject URI in the metadata: {str(s)}")
-                        resource_linked_to[str(s)] = str(p)
-                        subject_uri = s
-
-                    if not subject_uri:
-                        # Also check when the subject URI defined as Literal
-                        for s, p, _o in g.triples((None, pred, Literal(str(uri_ref)))):
-                            self.info(f"Found the subject URI in the metadata: {str(s)}")
-                            resource_linked_to[str(s)] = str(p)
-                            subject_uri = s
+        # Resolved in one lookup per alternative URI, and memoized for each graph
+        subject_uri, resource_properties, resource_linked_to = self.graph_index(g).resolve_subject(
+            alt_uris, preds_id  # type: ignore
+        )
+        if subject_uri:
+            self.info(
+                f"Found the subject URI in the metadata: {str(subject_uri)} "
+                f"({len(resource_properties)} properties, linked to {len(resource_linked_to)} resources)"
+            )
 
         if len(resource_properties.keys()) > 0 or len(resource_linked_to.keys()) > 0:
             if "identifier_in_metadata" not in self.data.keys():
                 self.data["identifier_in_metadata"] = {}
             if len(resource_properties.keys()) > 0:
-                self.data["identifier_in_metadata"]["properties"] = resource_properties
+                self.data["identifier_in_metadata"]["properties"] = dict(resource_properties)
             if len(resource_linked_to.keys()) > 0:
-                self.data["identifier_in_metadata"]["linked_to"] = resource_linked_to
+                self.data["identifier_in_metadata"]["linked_to"] = dict(resource_linked_to)
 
         return subject_uri
 
@@ -274,14 +460,14 @@ class FairTestEvaluation(BaseModel):
 
         return data_uris
 
-    def response(self) -> JSONResponse:
+    def response(self) -> FairTestJSONResponse:
         """
         Function used to generate the FAIR metric test results as JSON-LD, and return this JSON-LD as HTTP response
 
         Returns:
             response: HTTP response containing the test results as JSON-LD
         """
-        return JSONResponse(self.to_jsonld())
+        return FairTestJSONResponse(self.to_jsonld())
 
     def to_jsonld(self) -> List[Dict]:
         # To see the object used by the original FAIR metrics:
@@ -310,10 +496,40 @@ class FairTestEvaluation(BaseModel):
                         "@type": "http://www.w3.org/2001/XMLSchema#float",
                     }
                 ],
-                "http://semanticscience.org/resource/metadata": self.data,
+                "http://semanticscience.org/resource/metadata": self.truncated_data(),
             }
         ]
 
+    def truncated_data(self, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the evaluation data with the fields bigger than the maximum size replaced by a truncation marker
+
+        Parameters:
+            max_bytes: Maximum size of each field once serialized to JSON. Defaults to the `METADATA_MAX_FIELD_BYTES` setting, 0 for no limit
+
+        Returns:
+            data: The evaluation data to return in the results
+        """
+        max_bytes = settings.METADATA_MAX_FIELD_BYTES if max_bytes is None else max_bytes
+        if not max_bytes:
+            return self.data
+        data = {}
+        for key, value in self.data.items():
+            if isinstance(value, (int, float, bool)) or value is None:
+                data[key] = value
+                continue
+            serialized = value.encode("utf-8") if isinstance(value, str) else json_dumps(value)
+            if len(serialized) <= max_bytes:
+                data[key] = value
+            else:
+                data[key] = {
+                    "truncated": True,
+                    "size_bytes": len(serialized),
+                    "max_bytes": max_bytes,
+                    "preview": serialized[:max_bytes].decode("utf-8", errors="ignore"),
+                }
+        return data
+
     # Logging utilities
     def log(self, log_msg: str, prefix: Optional[str] = None) -> None:
         self.logs.log(log_msg, prefix)
@@ -0,0 +1,94 @@
+from typing import Optional
+
+from rdflib import ConjunctiveGraph
+
+from fair_test.config import settings
+
+try:
+    import oxrdflib
+except ImportError:  # no cov
+    oxrdflib = None
+
+
+# RDFLib store, and parsers to use instead of the default RDFLib parsers, for each graph backend
+graph_backends = {
+    "rdflib": {
+        "store": "default",
+        "parsers": {},
+    },
+    "oxigraph": {
+        "store": "Oxigraph",
+        "parsers": {
+            "turtle": "ox-turtle",
+            "xml": "ox-xml",
+            "ntriples": "ox-ntriples",
+            "nquads": "ox-nquads",
+            "trig": "ox-trig",
+            "n3": "ox-n3",
+        },
+    },
+}
+
+
+def get_graph_backend(backend: Optional[str] = None) -> str:
+    """
+    Get the graph backend used to store and parse the RDF harvested. Fallback to `rdflib`
+    if the `oxigraph` backend is requested but `oxrdflib` is not installed.
+
+    Parameters:
+        backend: `rdflib` or `oxigraph`. Defaults to the `GRAPH_BACKEND` setting
+
+    Returns:
+        backend: The graph backend available
+    """
+    backend = backend or settings.GRAPH_BACKEND
+    if backend not in graph_backends:
+        raise ValueError(f"Unknown graph backend {backend}, use one of: {', '.join(graph_backends)}")
+    if backend == "oxigraph" and oxrdflib is None:
+        return "rdflib"
+    return backend
+
+
+def new_graph(backend: Optional[str] = None) -> ConjunctiveGraph:
+    """
+    Create a new empty RDFLib graph using the store of the graph backend. All backends expose the same RDFLib
+    Graph API (`triples()`, `len()`, `namespace_manager`, `serialize()`...)
+
+    Parameters:
+        backend: `rdflib` or `oxigraph`. Defaults to the `GRAPH_BACKEND` setting
+
+    Returns:
+        g (Graph): An empty RDFLib graph
+    """
+    return ConjunctiveGraph(store=graph_backends[get_graph_backend(backend)]["store"])
+
+
+def copy_graph(g: ConjunctiveGraph) -> ConjunctiveGraph:
+    """
+    Copy a RDFLib graph, with its named graphs and prefixes, in a new graph using the store of the graph backend
+
+    Parameters:
+        g (Graph): The graph to copy
+
+    Returns:
+        g (Graph): A new graph with the same triples
+    """
+    copy = new_graph()
+    for prefix, namespace in g.namespaces():
+        copy.bind(prefix, namespace, override=True)
+    copy.addN((s, p, o, copy.get_context(context.identifier)) for s, p, o, context in g.quads())
+    return copy
+
+
+def parser_format(rdf_format: str, backend: Optional[str] = None) -> str:
+    """
+    Get the name of the RDFLib parser plugin to use for a RDF format (e.g. turtle, xml, json-ld)
+
+    Parameters:
+        rdf_format: Name of the RDFLib parser to use by default
+        backend: `rdflib` or `oxigraph`. Defaults to the `GRAPH_BACKEND` setting
+
+    Returns:
+        parser: The name of the RDFLib parser plugin for this backend
+    """
+    return graph_backends[get_graph_backend(backend)]["parsers"].get(rdf_format, rdf_format)
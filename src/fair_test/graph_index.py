@@ -0,0 +1,159 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from rdflib import XSD, Literal, URIRef
+from rdflib.term import Node
+
+from fair_test.namespace_index import graph_namespaces
+
+Triple = Tuple[Node, Node, Node]
+# Subject URI, its properties (predicate -> object), and the resources linking to it (subject -> predicate)
+SubjectResolution = Tuple[Optional[Node], Dict[str, str], Dict[str, str]]
+
+
+def normalize_scheme(uri: Any) -> str:
+    """Normalize the scheme of a URI to http, so that http and https URIs can be matched together"""
+    uri = str(uri)
+    if uri.startswith("https://"):
+        return "http://" + uri[8:]
+    return uri
+
+
+def scheme_variants(uri: Any) -> List[str]:
+    """Get the http and https variants of a URI"""
+    uri = normalize_scheme(uri)
+    if uri.startswith("http://"):
+        return [uri, "https://" + uri[7:]]
+    return [uri]
+
+
+class GraphIndex:
+    """
+    Index of the triples of a RDFLib Graph by scheme-normalized predicate (http and https are considered equivalent).
+    It maps each predicate to its subjects and their objects, and to its objects and the subjects pointing to them.
+    Entries are filled lazily using the indexed lookups of the RDFLib store (one per scheme variant of the predicate),
+    so that each pattern is only looked up once per graph, and queries cost O(matches).
+
+    ```python
+    index = GraphIndex(g)
+    for s, p, o in index.triples(subj=URIRef("https://doi.org/10.1594/PANGAEA.908011"), pred="https://schema.org/name"):
+        print(o)
+    ```
+    """
+
+    def __init__(self, g: Any) -> None:
+        # e.g. the JSON returned by the harvester when no RDF was found
+        self.graph = g if hasattr(g, "triples") else None
+        self.graph_len = len(g) if self.graph is not None else 0
+        # predicate -> subject -> triples, predicate -> object -> triples, and predicate -> triples
+        self.objects: Dict[str, Dict[Node, List[Triple]]] = {}
+        self.subjects: Dict[str, Dict[Node, List[Triple]]] = {}
+        self.predicates: Dict[str, List[Triple]] = {}
+        # subject -> triples, for any predicate
+        self.subject_triples: Dict[Node, List[Triple]] = {}
+        # Memoized subject resolutions, by alternative URIs and identifier predicates
+        self.resolved_subjects: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], SubjectResolution] = {}
+        # Namespaces of the IRIs used in the graph
+        self.used_namespaces: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return self.graph_len
+
+    def triples(
+        self, subj: Optional[Node] = None, pred: Optional[Any] = None, obj: Optional[Node] = None
+    ) -> Iterator[Triple]:
+        """
+        Iterate over the triples matching the given pattern, the predicate scheme is ignored
+
+        Parameters:
+            subj: Subject of the triples, any subject if None
+            pred: Predicate of the triples (http and https are matched), any predicate if None
+            obj: Object of the triples, any object if None
+
+        Returns:
+            triples: Iterator over the matching triples
+        """
+        if self.graph is None:
+            return
+        if pred is None:
+            if subj is None:
+                yield from self.graph.triples((None, None, obj))
+                return
+            if subj not in self.subject_triples:
+                self.subject_triples[subj] = list(self.graph.triples((subj, None, None)))
+            yield from (t for t in self.subject_triples[subj] if obj is None or t[2] == obj)
+            return
+
+        pred_key = normalize_scheme(pred)
+        if subj is not None:
+            by_subject = self.objects.setdefault(pred_key, {})
+            if subj not in by_subject:
+                by_subject[subj] = self._lookup(subj, pred_key, None)
+            yield from (t for t in by_subject[subj] if obj is None or t[2] == obj)
+        elif obj is not None:
+            by_object = self.subjects.setdefault(pred_key, {})
+            if obj not in by_object:
+                by_object[obj] = self._lookup(None, pred_key, obj)
+            yield from by_object[obj]
+        else:
+            if pred_key not in self.predicates:
+                self.predicates[pred_key] = self._lookup(None, pred_key, None)
+            yield from self.predicates[pred_key]
+
+    def resolve_subject(self, alt_uris: List[str], id_preds: List[str]) -> SubjectResolution:
+        """
+        Find the subject to which the metadata about a resource is attached. First using the alternative URIs
+        of the resource as subject of triples, or as object (URI or literal) of one of the identifier predicates.
+        All the patterns are answered from the index, and the resolution is memoized for the graph.
+
+        Parameters:
+            alt_uris: List of alternative URIs for the resource
+            id_preds: List of identifier predicates (e.g. dcterms:identifier, schema:sameAs), the scheme is ignored
+
+        Returns:
+            resolution: The subject found (None if not found), the properties of the resource (predicate -> object),
+                and the resources linking to the resource with an identifier predicate (subject -> predicate)
+        """
+        key = (tuple(str(uri) for uri in alt_uris), tuple(id_preds))
+        if key in self.resolved_subjects:
+            return self.resolved_subjects[key]
+
+        pred_keys = [normalize_scheme(pred) for pred in id_preds]
+        subject_uri: Optional[Node] = None
+        properties: Dict[str, str] = {}
+        linked_to: Dict[str, str] = {}
+        for alt_uri in alt_uris:
+            uri_ref = URIRef(str(alt_uri))
+            # Search with the subject URI as triple subject
+            for _s, p, o in self.triples(uri_ref):
+                properties[str(p)] = str(o)
+                subject_uri = uri_ref
+            if subject_uri:
+                continue
+
+            # Search with the subject URI as triple object, as URI or Literal
+            for pred_key in pred_keys:
+                for s, p, _o in self.triples(None, pred_key, uri_ref):
+                    linked_to[str(s)] = str(p)
+                    subject_uri = s
+                if not subject_uri:
+                    # Some stores (e.g. oxigraph) return plain literals typed as xsd:string
+                    for uri_literal in [Literal(str(uri_ref)), Literal(str(uri_ref), datatype=XSD.string)]:
+                        for s, p, _o in self.triples(None, pred_key, uri_literal):
+                            linked_to[str(s)] = str(p)
+                            subject_uri = s
+
+        self.resolved_subjects[key] = (subject_uri, properties, linked_to)
+        return self.resolved_subjects[key]
+
+    def namespaces(self) -> List[str]:
+        """Get the namespaces of the IRIs used in the graph, collected from the terms in one pass over the triples"""
+        if self.used_namespaces is None:
+            self.used_namespaces = graph_namespaces(self.graph) if self.graph is not None else []
+        return self.used_namespaces
+
+    def _lookup(self, subj: Optional[Node], pred_key: str, obj: Optional[Node]) -> List[Triple]:
+        return [
+            triple
+            for variant in scheme_variants(pred_key)
+            for triple in self.graph.triples((subj, URIRef(variant), obj))  # type: ignore
+        ]
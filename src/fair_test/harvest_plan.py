@@ -0,0 +1,145 @@
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import requests
+from rdflib import Graph
+
+from fair_test.graph_backend import copy_graph
+from fair_test.http_client import HttpClient
+from fair_test.metadata_harvester import MetadataHarvester, harvest_strategies
+
+# Artefacts of the subject which metrics tests can declare in `requires`, with the harvesting strategies
+# needed to get them (None for all the strategies, and the harvester service as last resort)
+harvest_requirements: Dict[str, Optional[List[str]]] = {
+    # Status, headers and redirections of the subject URL, with eval.resolve_subject(). When the metric test also
+    # retrieves the metadata, only the landing page is harvested
+    "http_response": ["resolve"],
+    # Landing page, its Signposting links, and the metadata embedded in its HTML
+    "embedded_metadata": ["resolve"],
+    # RDF returned through content negotiation on the subject URL
+    "content_negotiation": ["conneg-turtle", "conneg-json-ld", "conneg-rdf"],
+    # RDF metadata found by any strategy, e.g. to extract the subject or the data URIs
+    "rdf": None,
+    "data_uris": None,
+}
+
+
+@dataclass(frozen=True)
+class HarvestPlan:
+    """
+    Artefacts of a subject to harvest for the metrics tests being run, computed from the union of the
+    artefacts they require. Metrics tests which do not declare what they require get a full harvest
+    """
+
+    artefacts: FrozenSet[str] = frozenset(["rdf"])
+
+    @classmethod
+    def for_metrics(cls, metrics: Iterable[Any]) -> "HarvestPlan":
+        """
+        Plan the harvest of a subject for a list of metrics tests
+
+        Parameters:
+            metrics: FairTest objects, with the artefacts they need in `requires`
+
+        Returns:
+            plan: The union of the artefacts required
+        """
+        artefacts = set()
+        for metric in metrics:
+            requires = getattr(metric, "requires", None) or ["rdf"]
+            unknown = set(requires) - set(harvest_requirements)
+            if unknown:
+                raise ValueError(
+                    f"Unknown artefacts required by {metric.metric_path}: {', '.join(unknown)}, "
+                    f"use some of: {', '.join(harvest_requirements)}"
+                )
+            artefacts.update(requires)
+        return cls(frozenset(artefacts or ["rdf"]))
+
+    @property
+    def strategies(self) -> Optional[List[str]]:
+        """Harvesting strategies to run to retrieve the metadata of the subject, None for all the strategies"""
+        strategies = set()
+        for artefact in self.artefacts:
+            if harvest_requirements[artefact] is None:
+                return None
+            strategies.update(harvest_requirements[artefact])  # type: ignore
+        # Keep the default order of the strategies
+        return [strategy for strategy in harvest_strategies if strategy in strategies]
+
+
+@dataclass
+class SubjectHarvest:
+    """
+    Artefacts harvested once for a subject, and shared by the evaluations of the metrics tests run on it
+    (e.g. when evaluating a list of subjects with multiple metrics). The evaluations sharing it run one
+    after the other, each evaluation gets the logs of the harvest, and its own copy of the metadata,
+    so that the changes made by a metric test (e.g. adding triples) are not seen by the next ones
+    """
+
+    plan: HarvestPlan = field(default_factory=HarvestPlan)
+    # Used by multiple evaluations, the metadata is copied for each evaluation
+    shared: bool = True
+    # Response to the subject URL, or the exception raised by the request
+    response: Optional[Union[requests.Response, Exception]] = None
+    # Metadata retrieved, with the harvester used, by URL and harvester service
+    metadata: Dict[Tuple[str, bool, str], Tuple[Any, MetadataHarvester]] = field(default_factory=dict)
+
+    def resolve(self, url: str, http: HttpClient) -> requests.Response:
+        """
+        Send a GET request to the subject URL, only its status and headers are received
+
+        Parameters:
+            url: URL of the subject
+            http: Client used if the subject has not been resolved yet
+
+        Returns:
+            response: The response, with its status, headers and redirections (`r.history`)
+
+        Raises:
+            RequestException: The request failed
+        """
+        if self.response is None:
+            try:
+                self.response = http.get(url, stream=True)
+                self.response.close()
+            except requests.RequestException as e:
+                self.response = e
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+    def retrieve_metadata(
+        self,
+        url: str,
+        new_harvester: Callable[[], MetadataHarvester],
+        use_harvester: bool = False,
+        harvester_url: str = "https://w3id.org/FAIR_Tests/tests/harvester",
+    ) -> Tuple[Any, MetadataHarvester]:
+        """
+        Retrieve the metadata of the subject with the strategies of the plan, only once for all the evaluations
+
+        Parameters:
+            url: URL of the subject
+            new_harvester: Function creating the harvester used if the metadata has not been retrieved yet
+            use_harvester: Use an external harvester to retrieve the RDF instead of the built-in python harvester
+            harvester_url: URL of the RDF harvester used
+
+        Returns:
+            metadata: The RDFLib Graph (or JSON found as a fallback), and the harvester which retrieved it.
+                A copy of the metadata harvested when the harvest is shared
+        """
+        key = (url, use_harvester, harvester_url)
+        if key not in self.metadata:
+            harvester = new_harvester()
+            metadata = harvester.retrieve_metadata(
+                url, use_harvester=use_harvester, harvester_url=harvester_url, strategies=self.plan.strategies
+            )
+            self.metadata[key] = (metadata, harvester)
+        metadata, harvester = self.metadata[key]
+        if not self.shared:
+            return metadata, harvester
+        if isinstance(metadata, Graph):
+            return copy_graph(metadata), harvester
+        return copy.deepcopy(metadata), harvester
@@ -0,0 +1,188 @@
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, OrderedDict
+from urllib.parse import urlparse
+
+from fair_test.config import settings
+
+# Hosts resolving identifiers of many publishers, the statistics are kept by identifier prefix (e.g. doi.org/10.1594)
+resolver_hosts = ["doi.org", "dx.doi.org", "hdl.handle.net"]
+# Statistics of the hosts not seen recently are forgotten above this number of hosts
+max_hosts = 10000
+# Number of tries before a strategy which never succeeds for a host is skipped
+min_tries_to_skip = 5
+# Strategies which succeed less often than this rate are skipped
+skip_success_rate = 0.05
+# Strategies never skipped: resolving the landing page also gives the redirection, the Signposting links,
+# and the metadata embedded in the HTML used by the metrics tests
+never_skipped = ["resolve"]
+# Number of seconds between each save of the statistics to the disk
+save_interval = 300
+
+
+@dataclass
+class StrategyStats:
+    """Statistics of a harvesting strategy for a host, older evaluations have less weight"""
+
+    # Rate of evaluations where the strategy found metadata (RDF, or non-RDF metadata used as fallback)
+    success_rate: float
+    # Average number of seconds spent running the strategy
+    duration: float
+    tries: int = 0
+
+
+def host_key(url: str) -> str:
+    """Get the key of the statistics of a URL: its host, or the prefix of the identifier for DOI and handle resolvers"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host in resolver_hosts:
+        prefix = parsed.path.strip("/").split("/")[0]
+        if prefix:
+            return f"{host}/{prefix}"
+    return host
+
+
+class HarvestStrategyStats:
+    """
+    Statistics of the strategies used by the MetadataHarvester to find RDF (e.g. resolving the URL
+    and extracting the metadata embedded in the HTML, or content negotiation), by host.
+    The strategies expected to find RDF the fastest are tried first for the next subjects of the same host,
+    and the strategies which never succeed for this host are skipped.
+    Statistics are exponential moving averages, so that changes at the source are noticed, and the default order
+    is still used for a small share of evaluations to explore the strategies which are skipped or tried last.
+
+    ```python
+    order = strategy_stats.order("https://doi.org/10.1594/PANGAEA.908011", ["resolve", "conneg-turtle"])
+    strategy_stats.record("https://doi.org/10.1594/PANGAEA.908011", "resolve", success=True, duration=0.8)
+    ```
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.hosts: OrderedDict[str, Dict[str, StrategyStats]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.saved_at = time.time()
+
+    @property
+    def stats_path(self) -> str:
+        return os.path.expanduser(self.path if self.path is not None else settings.HARVEST_STRATEGY_STATS_PATH)
+
+    def order(self, url: str, strategies: List[str]) -> List[str]:
+        """
+        Get the strategies to run for a URL, by order of expected benefit (probability of success over duration)
+
+        Parameters:
+            url: URL to harvest
+            strategies: Names of the strategies available, in the default order
+
+        Returns:
+            strategies: The strategies to run, in the order they should be tried
+        """
+        explore = random.random() < settings.HARVEST_STRATEGY_EXPLORATION  # noqa: S311
+        if not settings.HARVEST_STRATEGY_ADAPTIVE or explore:
+            return list(strategies)
+        self.load()
+        with self.lock:
+            host_stats = dict(self.hosts.get(host_key(url), {}))
+        if not host_stats:
+            return list(strategies)
+        known_duration = sorted(stats.duration for stats in host_stats.values())[len(host_stats) // 2]
+
+        def expected_benefit(strategy: str) -> float:
+            # Strategies never tried for this host have an even chance to succeed
+            stats = host_stats.get(strategy, StrategyStats(success_rate=0.5, duration=known_duration))
+            return stats.success_rate / max(stats.duration, 0.01)
+
+        return sorted(
+            [strategy for strategy in strategies if not self.should_skip(strategy, host_stats.get(strategy))],
+            key=expected_benefit,
+            reverse=True,
+        )
+
+    def should_skip(self, strategy: str, stats: Optional[StrategyStats]) -> bool:
+        if strategy in never_skipped or stats is None:
+            return False
+        return stats.tries >= min_tries_to_skip and stats.success_rate < skip_success_rate
+
+    def record(self, url: str, strategy: str, success: bool, duration: float) -> None:
+        """
+        Record the result of running a strategy for a URL
+
+        Parameters:
+            url: URL harvested
+            strategy: Name of the strategy
+            success: If the strategy found metadata
+            duration: Number of seconds spent running the strategy
+        """
+        if not settings.HARVEST_STRATEGY_ADAPTIVE:
+            return
+        self.load()
+        decay = settings.HARVEST_STRATEGY_DECAY
+        key = host_key(url)
+        with self.lock:
+            host_stats = self.hosts.setdefault(key, {})
+            self.hosts.move_to_end(key)
+            stats = host_stats.get(strategy)
+            if stats is None:
+                host_stats[strategy] = StrategyStats(success_rate=float(success), duration=duration, tries=1)
+            else:
+                stats.success_rate = (1 - decay) * stats.success_rate + decay * float(success)
+                stats.duration = (1 - decay) * stats.duration + decay * duration
+                stats.tries += 1
+            while len(self.hosts) > max_hosts:
+                self.hosts.popitem(last=False)
+        if time.time() - self.saved_at > save_interval:
+            self.save()
+
+    def load(self) -> None:
+        """Load the statistics saved on disk, once"""
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not self.stats_path or not os.path.exists(self.stats_path):
+                return
+            try:
+                with open(self.stats_path, encoding="utf-8") as f:
+                    data = json.load(f)
+                for host, host_stats in data.items():
+                    self.hosts[host] = {strategy: StrategyStats(**stats) for strategy, stats in host_stats.items()}
+            except (OSError, ValueError, TypeError):
+                # Statistics are only an optimization, start from scratch if the file is invalid
+                self.hosts.clear()
+
+    def save(self) -> None:
+        """Save the statistics on disk, the file is replaced atomically"""
+        self.saved_at = time.time()
+        if not self.stats_path:
+            return
+        with self.lock:
+            data = {
+                host: {strategy: asdict(stats) for strategy, stats in host_stats.items()}
+                for host, host_stats in self.hosts.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+            tmp_path = f"{self.stats_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.stats_path)
+        except OSError:
+            pass
+
+    def after_fork(self) -> None:
+        """Reset the lock in forked worker processes, it could have been held by another thread during the fork"""
+        self.lock = threading.Lock()
+
+
+# Shared by all the evaluations of the API
+strategy_stats = HarvestStrategyStats()
+atexit.register(strategy_stats.save)
@@ -0,0 +1,331 @@
+import codecs
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from fair_test.cancellation import CancelToken, abort_response, current_cancel_token
+from fair_test.circuit_breaker import CircuitBreakers, HostUnavailableError, circuit_breakers, is_dns_failure
+from fair_test.config import settings
+
+requests_timeout = 600  # 10min
+chunk_size = 64 * 1024
+# Requests which can be sent again without side effects
+idempotent_methods = {"GET", "HEAD", "OPTIONS"}
+# Status codes of the failures which usually go away after a short wait
+transient_status_codes = {429, 502, 503, 504}
+
+
+def retry_after_seconds(r: requests.Response) -> Optional[float]:
+    """Get the number of seconds to wait from the Retry-After header of a response (seconds or HTTP date)"""
+    value = r.headers.get("retry-after", "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def response_charset(r: requests.Response) -> Optional[str]:
+    """Get the charset declared in the Content-Type header of a response, None if not declared"""
+    for param in r.headers.get("Content-Type", "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip("'\"")
+    return None
+
+
+def response_encoding(r: requests.Response) -> str:
+    """
+    Get the codec to decode the body of a response: its declared charset, or UTF-8 when it is not declared or unknown.
+    Unlike `r.encoding`, the charset is not guessed from the whole body, and text is not decoded as ISO-8859-1 by default
+    """
+    try:
+        return codecs.lookup(response_charset(r) or "utf-8").name
+    except LookupError:
+        # Unknown charset
+        return "utf-8"
+
+
+def response_text(r: requests.Response) -> str:
+    """Decode the body of a response with its declared charset, or UTF-8"""
+    return r.content.decode(response_encoding(r), errors="replace")
+
+
+def response_json(r: requests.Response) -> Any:
+    """
+    Parse the JSON body of a response, directly from its bytes when it is UTF-8,
+    otherwise after decoding it with its declared charset
+
+    Raises:
+        ValueError: The body is not JSON
+    """
+    if response_encoding(r) == "utf-8":
+        return json.loads(r.content)
+    return json.loads(response_text(r))
+
+
+class HttpSessions:
+    """
+    `requests` session shared by all the HTTP clients of a process, so that the connections to the hosts are
+    reused by the next evaluations instead of being left open. Cookies are not kept between requests,
+    so that the responses received by an evaluation do not depend on the previous evaluations
+    """
+
+    def __init__(self) -> None:
+        self.session = self.new_session()
+
+    def new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def after_fork(self) -> None:
+        """Use a new session in forked worker processes, the connections of the parent cannot be shared"""
+        self.session = self.new_session()
+
+
+http_sessions = HttpSessions()
+
+
+class RetryBudget:
+    """
+    Retries allowed for all the requests of an evaluation: at most `max_retries`, and no retry
+    whose wait would end after the deadline, so that retries cannot make an evaluation last forever
+    """
+
+    def __init__(self, max_retries: Optional[int] = None, deadline: Optional[float] = None) -> None:
+        self.retries_left = settings.HTTP_RETRY_BUDGET if max_retries is None else max_retries
+        # Number of seconds after the creation of the budget, usually at the start of the evaluation
+        deadline = settings.HTTP_RETRY_DEADLINE if deadline is None else deadline
+        self.deadline = time.monotonic() + deadline
+        self.lock = threading.Lock()
+
+    def take(self, wait: float) -> bool:
+        """Use one retry, return False if no retry is left, or if the wait ends after the deadline"""
+        with self.lock:
+            if self.retries_left <= 0 or time.monotonic() + wait > self.deadline:
+                return False
+            self.retries_left -= 1
+            return True
+
+
+@dataclass
+class HttpClient:
+    """
+    HTTP client used by the MetadataHarvester to fetch URLs. Response bodies are streamed,
+    and reading stops once the maximum number of bytes allowed for the harvesting stage is reached,
+    so that one huge document (e.g. a full RDF dump) cannot exhaust the memory of the worker.
+    Requests to hosts which keep failing are suspended by their circuit breaker, instead of waiting for the timeout.
+    When the client of the evaluation disconnects, the downloads are aborted, and the next requests are not sent.
+    Idempotent requests failing with a transient error (e.g. 503, 429, connection reset) are sent again after
+    an exponential backoff with jitter, or the delay asked by the `Retry-After` header, within the retry budget.
+    """
+
+    timeout: float = requests_timeout
+    # Session of the process by default, see `HttpSessions`
+    session: requests.Session = field(default_factory=lambda: http_sessions.session)
+    breakers: CircuitBreakers = field(default_factory=lambda: circuit_breakers)
+    # Token of the evaluation request which created the client, also used in the threads started by the harvester
+    cancel_token: Optional[CancelToken] = field(default_factory=current_cancel_token)
+    # Retries left for the evaluation, shared by the clients created for the same evaluation
+    retry_budget: RetryBudget = field(default_factory=RetryBudget)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        max_bytes: Optional[int] = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Send a HTTP request
+
+        Parameters:
+            method: HTTP method, e.g. GET
+            url: URL to request
+            max_bytes: Maximum number of bytes of the body to read (no limit if None or 0)
+            stream: Return the response without reading its body, use `read()` or `iter_lines()` to read it
+            kwargs: Arguments passed to `requests`, e.g. headers
+
+        Returns:
+            response: The `requests` response, with a `truncated` attribute if the body was read
+
+        Raises:
+            HostUnavailableError: The circuit breaker of the host is open, the request is not sent
+            EvaluationCancelled: The client of the evaluation disconnected
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            try:
+                r = self.send(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                if isinstance(e, HostUnavailableError) or is_dns_failure(e):
+                    raise
+                wait = self.retry_wait(method, attempt)
+                if wait is None:
+                    raise
+            else:
+                if r.status_code not in transient_status_codes:
+                    break
+                wait = self.retry_wait(method, attempt, retry_after_seconds(r))
+                if wait is None:
+                    break
+                r.close()
+            self.sleep(wait)
+            attempt += 1
+        if stream:
+            return r
+        return self.read(r, max_bytes)
+
+    def send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request once, and record its outcome in the circuit breaker of the host"""
+        self.check_cancelled()
+        host = urlparse(url).hostname or ""
+        self.breakers.before_request(host)
+        try:
+            r = self.session.request(method, url, stream=True, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # The failure might come from the host of a redirection
+            failed_url = e.request.url if e.request is not None and e.request.url else url
+            failed_host = urlparse(failed_url).hostname or ""
+            self.breakers.record_failure(failed_host, e)
+            if failed_host != host:
+                self.breakers.record_success(host)
+            raise
+        except BaseException:
+            self.breakers.end_probe(host)
+            raise
+        self.breakers.record_success(host)
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            r.close()
+            self.check_cancelled()
+        return r
+
+    def retry_wait(self, method: str, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Get the number of seconds to wait before retrying a failed request
+
+        Parameters:
+            method: HTTP method of the request, only idempotent requests are retried
+            attempt: Number of retries already done for this request
+            retry_after: Delay asked by the server in the Retry-After header
+
+        Returns:
+            wait: Seconds to wait, or None if the request should not be retried
+        """
+        if method.upper() not in idempotent_methods or attempt >= settings.HTTP_RETRIES:
+            return None
+        if retry_after is not None:
+            # Retrying earlier than asked would most likely fail again
+            if retry_after > settings.HTTP_RETRY_MAX_WAIT:
+                return None
+            wait = retry_after
+        else:
+            # Full jitter, so that the evaluations failing at the same time do not retry at the same time
+            cap = min(settings.HTTP_RETRY_MAX_WAIT, settings.HTTP_RETRY_BACKOFF * 2**attempt)
+            wait = random.uniform(0, cap)  # noqa: S311
+        if not self.retry_budget.take(wait):
+            return None
+        return wait
+
+    def sleep(self, seconds: float) -> None:
+        """Wait before a retry, stop waiting if the evaluation is cancelled"""
+        if self.cancel_token is None:
+            time.sleep(seconds)
+        else:
+            self.cancel_token.event.wait(seconds)
+            self.check_cancelled()
+
+    def get(self, url: str, max_bytes: Optional[int] = None, stream: bool = False, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, max_bytes=max_bytes, stream=stream, **kwargs)
+
+    def post(self, url: str, max_bytes: Optional[int] = None, stream: bool = False, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, max_bytes=max_bytes, stream=stream, **kwargs)
+
+    def read(self, r: requests.Response, max_bytes: Optional[int] = None) -> requests.Response:
+        """
+        Read the body of a streamed response, up to `max_bytes` bytes.
+        The body is then available as usual with `r.content`, `r.text` or `r.json()`
+
+        Parameters:
+            r: Streamed response
+            max_bytes: Maximum number of bytes to read (no limit if None or 0)
+
+        Returns:
+            response: The response, with `r.truncated` set to True if the body was bigger than `max_bytes`
+        """
+        chunks = []
+        size = 0
+        truncated = False
+        try:
+            for chunk in self.iter_abortable(r, r.iter_content(chunk_size=chunk_size)):
+                if max_bytes and size + len(chunk) > max_bytes:
+                    chunks.append(chunk[: max_bytes - size])
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            r.close()
+        r._content = b"".join(chunks)
+        r._content_consumed = True  # type: ignore
+        r.truncated = truncated  # type: ignore
+        return r
+
+    def iter_lines(self, r: requests.Response, max_bytes: Optional[int] = None) -> Iterator[str]:
+        """
+        Iterate over the lines of a streamed response, stop once `max_bytes` bytes have been read
+
+        Parameters:
+            r: Streamed response
+            max_bytes: Maximum number of bytes to read (no limit if None or 0)
+
+        Returns:
+            lines: Iterator over the decoded lines of the body
+        """
+        size = 0
+        encoding = response_encoding(r)
+        r.truncated = False  # type: ignore
+        try:
+            for line in self.iter_abortable(r, r.iter_lines(chunk_size=chunk_size)):
+                size += len(line) + 1
+                if max_bytes and size > max_bytes:
+                    r.truncated = True  # type: ignore
+                    break
+                yield line.decode(encoding, errors="replace")
+        finally:
+            r.close()
+
+    def check_cancelled(self) -> None:
+        """Raise EvaluationCancelled if the client of the evaluation disconnected"""
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def iter_abortable(self, r: requests.Response, chunks: Iterator[Any]) -> Iterator[Any]:
+        """Iterate over the body of a response, the download is aborted if the evaluation is cancelled"""
+        if self.cancel_token is None:
+            yield from chunks
+            return
+        with self.cancel_token.on_cancel(lambda: abort_response(r)):
+            try:
+                for chunk in chunks:
+                    self.cancel_token.check()
+                    yield chunk
+            except Exception:
+                # The download failed because it has been aborted
+                self.cancel_token.check()
+                raise
+            self.cancel_token.check()
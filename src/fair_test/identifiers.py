@@ -0,0 +1,91 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+import idutils
+
+# InChIKey of a chemical compound, e.g. BSYNRYMUTXBXSQ-UHFFFAOYSA-N
+inchikey_regexp = re.compile(r"^(?:inchikey=)?([A-Z]{14}-[A-Z]{10}-[A-Z])$", re.IGNORECASE)
+# Hosts resolving DOIs, the same DOI can be found in the metadata with any of them
+doi_hosts = ["doi.org", "dx.doi.org"]
+# Name of the types of identifiers used in the logs
+identifier_names = {"url": "URL", "doi": "DOI", "handle": "handle", "inchikey": "InChIKey"}
+# Maximum number of identifiers kept in memory
+cache_size = 10000
+
+
+@dataclass(frozen=True)
+class Identifier:
+    """An identifier of a resource, with its type and the URL to resolve it"""
+
+    # The identifier, without surrounding whitespaces
+    value: str
+    # url, doi, handle, or inchikey. None if the type of the identifier is not recognized
+    scheme: Optional[str]
+    # URL to resolve the identifier, None if it cannot be resolved
+    url: Optional[str]
+
+
+@lru_cache(maxsize=cache_size)
+def parse_identifier(value: str) -> Identifier:
+    """
+    Get the type of an identifier, and the URL to resolve it. Results are memoized,
+    so that the same identifier can be checked by the evaluation, the harvester, and the metrics tests
+
+    Parameters:
+        value: A URL, DOI (e.g. 10.1594/PANGAEA.908011), handle (e.g. hdl:20.1000/100), or InChIKey
+
+    Returns:
+        identifier: The identifier, with its scheme and URL
+    """
+    value = value.strip()
+    if idutils.is_url(value):
+        return Identifier(value, "url", value)
+    if idutils.is_doi(value):
+        return Identifier(value, "doi", idutils.to_url(value, "doi", "https"))
+    inchikey = inchikey_regexp.match(value)
+    if inchikey:
+        key = inchikey.group(1).upper()
+        return Identifier(value, "inchikey", f"https://pubchem.ncbi.nlm.nih.gov/rest/rdf/inchikey/{key}")
+    # Handles are checked last, their pattern matches many strings
+    if idutils.is_handle(value):
+        return Identifier(value, "handle", idutils.to_url(value, "handle", "https"))
+    return Identifier(value, None, None)
+
+
+def doi_url(url: str) -> Optional[str]:
+    """Get the doi.org URL of a URL resolving a DOI (e.g. https://dx.doi.org/10.1594/PANGAEA.908011), None for other URLs"""
+    parsed = urlparse(url)
+    if parsed.netloc.lower() in doi_hosts and parsed.path.startswith("/10."):
+        return f"https://doi.org{parsed.path}"
+    return None
+
+
+def alternative_uris(urls: Iterable[str]) -> List[str]:
+    """
+    Get the URIs commonly used in metadata to refer to resources identified by URLs: their http/https
+    counterpart, and the other hosts resolving DOIs (doi.org and dx.doi.org)
+
+    Parameters:
+        urls: URLs of the resources, e.g. the subject URL, and the URL it redirects to
+
+    Returns:
+        uris: The URLs, followed by their alternative URIs, without duplicates
+    """
+    uris = {}
+    for url in urls:
+        if not url:
+            continue
+        uris[url] = None
+        parsed = urlparse(url)
+        if parsed.scheme == "http":
+            uris[url.replace("http://", "https://", 1)] = None
+        elif parsed.scheme == "https":
+            uris[url.replace("https://", "http://", 1)] = None
+        if parsed.netloc in doi_hosts and parsed.path[1:]:
+            for host in doi_hosts:
+                for scheme in ["https", "http"]:
+                    uris[f"{scheme}://{host}/{parsed.path[1:]}"] = None
+    return list(uris)
@@ -0,0 +1,89 @@
+import json
+import math
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+
+from fair_test.config import settings
+
+try:
+    import orjson
+except ImportError:  # no cov
+    orjson = None  # type: ignore
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    # Same output as the default starlette JSONResponse
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=str,
+    ).encode("utf-8")
+
+
+def _has_non_finite(content: Any) -> bool:
+    """Check if a JSON-like object contains NaN or infinite floats, in its values or keys"""
+    if isinstance(content, float):
+        return not math.isfinite(content)
+    if isinstance(content, dict):
+        return any(_has_non_finite(k) or _has_non_finite(v) for k, v in content.items())
+    if isinstance(content, (list, tuple)):
+        return any(_has_non_finite(v) for v in content)
+    return False
+
+
+def _orjson_dumps(content: Any) -> bytes:
+    try:
+        output = orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson is stricter than the stdlib (e.g. integers over 64 bits), fallback to the stdlib encoder
+        return _stdlib_dumps(content)
+    # orjson writes NaN and Infinity as null, use the stdlib encoder to raise the same ValueError
+    if b"null" in output and _has_non_finite(content):
+        return _stdlib_dumps(content)
+    return output
+
+
+def get_json_dumps(serializer: Optional[str] = None) -> Callable[[Any], bytes]:
+    """
+    Get the function used to serialize evaluation results to JSON bytes
+
+    Parameters:
+        serializer: `orjson`, `json` or `auto` (use orjson when installed). Defaults to the `JSON_SERIALIZER` setting
+
+    Returns:
+        dumps: A function serializing a JSON-like object to UTF-8 encoded bytes
+    """
+    serializer = serializer or settings.JSON_SERIALIZER
+    if serializer not in ["auto", "orjson", "json"]:
+        raise ValueError(f"Unknown JSON serializer {serializer}, use one of: auto, orjson, json")
+    if serializer != "json" and orjson is not None:
+        return _orjson_dumps
+    return _stdlib_dumps
+
+
+def json_dumps(content: Any) -> bytes:
+    """
+    Serialize a JSON-like object (e.g. the JSON-LD results of an evaluation) to UTF-8 encoded bytes,
+    using the fastest serializer available. Can be used for batch or streaming outputs.
+
+    Parameters:
+        content: JSON-like object to serialize
+
+    Returns:
+        bytes: The serialized JSON
+    """
+    return get_json_dumps()(content)
+
+
+class FairTestJSONResponse(JSONResponse):
+    """
+    JSON response serialized with the fastest serializer available (orjson if installed),
+    used to return the results of FAIR metrics tests evaluations.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
@@ -1,16 +1,81 @@
 import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import extruct
-import idutils
-import requests
+from extruct.utils import parse_html, parse_xmldom_html
 from pyld import jsonld
 from rdflib import ConjunctiveGraph, Dataset, Graph, URIRef
+from rdflib.plugins.parsers.jsonld import to_rdf as jsonld_to_rdf
 
+from fair_test.config import settings
 from fair_test.fair_test_logger import FairTestLogger
-
-requests_timeout = 600  # 10min
+from fair_test.graph_backend import new_graph, parser_format
+from fair_test.harvest_strategies import strategy_stats
+from fair_test.http_client import HttpClient, response_charset, response_json, response_text
+from fair_test.identifiers import alternative_uris, doi_url, identifier_names, parse_identifier
+from fair_test.rdf_sniffer import sniff_rdf_formats
+from fair_test.signposting import (
+    linkset_types,
+    metadata_rels,
+    normalize_url,
+    parse_link_header,
+    parse_linkset,
+    signposting_rels,
+)
+
+# Artefacts of the harvesting process stored in the harvester data, for each level of verbosity
+harvest_artefacts = {
+    "minimal": [],
+    "summary": ["redirect_url", "signposting_links", "harvest_strategy"],
+    "full": ["redirect_url", "signposting_links", "harvest_strategy", "extruct", "json-ld", "parse_attempts"],
+}
+
+# Content types of the pages in which embedded metadata are searched with extruct
+html_content_types = ["text/html", "application/xhtml+xml"]
+# Syntaxes extracted by extruct that can be parsed to RDF, the others are only used as fallback JSON metadata
+extruct_rdf_syntaxes = ["json-ld", "rdfa"]
+# Result of extruct for dublincore when nothing is found
+extruct_empty_dublincore = [{"namespaces": {}, "elements": [], "terms": []}]
+
+# Content types of the RDF returned when resolving a URL, parsed directly instead of asking again with content negotiation
+rdf_content_types = [
+    "text/turtle",
+    "application/turtle",
+    "application/x-turtle",
+    "application/ld+json",
+    "application/rdf+xml",
+    "text/n3",
+    "text/rdf+n3",
+    "application/trig",
+]
+
+# Accept header used to ask for RDF in any format
+rdf_accept = "text/turtle, application/turtle, application/x-turtle;q=0.9, application/ld+json;q=0.8, application/rdf+xml, text/n3, text/rdf+n3;q=0.7"
+
+# Accept header used to ask doi.org for the metadata of a DOI (supported by DataCite and Crossref)
+doi_accept = "text/turtle, application/ld+json;q=0.9, application/rdf+xml;q=0.8"
+
+# Strategies used to find RDF about a URL, in the default order (the slowest for a lot of URLs, like zenodo, last).
+# Content negotiation is done with turtle and JSON-LD first, because some URLs do not support weighted content negotiation
+harvest_strategies = {
+    "doi": None,
+    "resolve": None,
+    "conneg-turtle": "text/turtle",
+    "conneg-json-ld": "application/ld+json",
+    "conneg-rdf": rdf_accept,
+}
+
+# Line-based RDF formats parsed incrementally while downloading, by mime type
+stream_formats = {
+    "application/n-triples": "nt",
+    "application/n-quads": "nquads",
+    "text/x-nquads": "nquads",
+}
+# Number of lines parsed at once when parsing N-Triples/N-Quads incrementally
+stream_batch_lines = 10000
 
 
 @dataclass
@@ -20,28 +85,19 @@ class MetadataHarvester:
     rdf: Optional[Union[Graph, ConjunctiveGraph, Dataset]] = None
     json: Optional[Dict] = None
     data: dict = field(default_factory=dict)
-    logs: FairTestLogger = FairTestLogger()
+    logs: FairTestLogger = field(default_factory=FairTestLogger)
+    http: HttpClient = field(default_factory=HttpClient)
 
     def get_url(self, id: str) -> Optional[str]:
-        """Returns the full URL for a given identifiers (e.g. URL, DOI, handle)"""
-        if idutils.is_url(id):
+        """Returns the full URL for a given identifiers (e.g. URL, DOI, handle, InChIKey)"""
+        identifier = parse_identifier(id)
+        if identifier.scheme == "url":
             self.logs.info(f"Validated the resource {id} is a URL")
-            return id
-
-        if idutils.is_doi(id):
-            self.logs.info(f"Validated the resource {id} is a DOI")
-            return idutils.to_url(id, "doi", "https")
-
-        if idutils.is_handle(id):
-            self.logs.info(f"Validated the resource {id} is a handle")
-            return idutils.to_url(id, "handle", "https")
-
-        # TODO: add INCHI key?
-        # inchikey = regexp(/^\w{14}\-\w{10}\-\w$/)
-        # return f"https://pubchem.ncbi.nlm.nih.gov/rest/rdf/inchikey/{inchikey}"
-
-        self.logs.warn(f"Could not validate the given resource URI {id} is a URL, DOI, or handle")
-        return None
+        elif identifier.scheme:
+            self.logs.info(f"Validated the resource {id} is a {identifier_names[identifier.scheme]}")
+        else:
+            self.logs.warn(f"Could not validate the given resource URI {id} is a URL, DOI, handle, or InChIKey")
+        return identifier.url
 
     # TODO: implement metadata extraction with more tools?
     # e.g. Apache Tika for PDF/pptx? or ruby Kellog's Distiller? http://rdf.greggkellogg.net/distiller
@@ -51,20 +107,25 @@ class MetadataHarvester:
         url: str,
         use_harvester: bool = False,
         harvester_url: str = "https://w3id.org/FAIR_Tests/tests/harvester",
+        strategies: Optional[List[str]] = None,
     ) -> Any:
         """
         Retrieve metadata from a URL, RDF metadata parsed as a RDFLib Graph in priority.
         Super useful. It tries:
+        - Asking doi.org for the metadata of DOIs from their registration agency (DataCite, Crossref)
         - Following signposting links (returned in HTTP headers)
         - Extracting JSON-LD embedded in the HTML
         - Asking RDF through content-negociation
         - Can return JSON found as a fallback, if RDF metadata is not found
+        The strategies which found RDF for the previous subjects of the same host are tried first.
         You can also use an external harvester API to get the RDF metadata
 
         Parameters:
             url: URL to retrieve RDF from
             use_harvester: Use an external harvester to retrieve the RDF instead of the built-in python harvester
             harvester_url: URL of the RDF harvester used
+            strategies: Only run these harvesting strategies, without falling back to the harvester service.
+                Defaults to all the strategies, e.g. `["conneg-turtle", "conneg-json-ld", "conneg-rdf"]`
 
         Returns:
             g (Graph): A RDFLib Graph with the RDF found at the given URL
@@ -82,155 +143,78 @@ class MetadataHarvester:
             # curl -X POST -d '{"subject": "https://doi.org/10.1594/PANGAEA.908011"}' https://w3id.org/FAIR_Tests/tests/harvester
             try:
                 self.logs.info(f"Using Harvester at {harvester_url} to retrieve RDF metadata at {url}")
-                res = requests.post(
+                res = self.http.post(
                     harvester_url,
+                    max_bytes=settings.HARVEST_MAX_RDF_BYTES,
                     json={"subject": url},
                     timeout=60,
                     allow_redirects=True,
                     headers={"Accept": "application/turtle"},
                 )
-                return self.parse_rdf(res.text, "text/turtle", log_msg="FAIR evaluator harvester RDF")
+                self.log_truncated(res, harvester_url, settings.HARVEST_MAX_RDF_BYTES)
+                return self.parse_rdf(res.content, "text/turtle", log_msg="FAIR evaluator harvester RDF")
             except Exception as e:
                 self.logs.warn(
                     f"Could not retrieve metadata from the Harvester service at {harvester_url} for {url}: {e}"
                 )
 
         # https://github.com/FAIRMetrics/Metrics/blob/master/MetricsEvaluatorCode/Ruby/metrictests/fair_metrics_utilities.rb#L355
-        html_text = None
-        metadata_obj = []
-        # Check if URL resolve and if redirection
-        # r = requests.head(url)
-
-        try:
-            r = requests.get(url, timeout=requests_timeout)
-            r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
-            self.logs.info(f"Successfully resolved {url}")
-            html_text = r.text
-            if r.history:
-                # Extract alternative URIs if request redirected
-                redirect_url = r.url
-                if redirect_url.startswith("https://linkinghub.elsevier.com/retrieve/pii/"):
-                    # Special case to handle Elsevier bad redirections to ScienceDirect
-                    redirect_url = redirect_url.replace(
-                        "https://linkinghub.elsevier.com/retrieve/pii/",
-                        "https://www.sciencedirect.com/science/article/pii/",
-                    )
-
-                self.data["redirect_url"] = redirect_url
-                if url == self.subject and redirect_url not in self.data["alternative_uris"]:
-                    self.logs.info(
-                        f"Request was redirected to {redirect_url}, adding to the list of alternative URIs for the subject"
-                    )
-                    self.data["alternative_uris"].append(redirect_url)
-                    if r.url.startswith("http://"):
-                        self.data["alternative_uris"].append(redirect_url.replace("http://", "https://"))
-                    elif r.url.startswith("https://"):
-                        self.data["alternative_uris"].append(redirect_url.replace("https://", "http://"))
-
-            # Handle signposting links headers https://signposting.org/FAIR
-            if r.links:
-                # Follow signposting links, this could create a lot of recursions (to be checked)
-                self.logs.info(f"Found Signposting links: {str(r.links)}")
-                self.data["signposting_links"] = r.links
-                check_rels = ["alternate", "describedby", "meta"]
-                # Alternate is used by schema.org
-                for rel in check_rels:
-                    if rel in r.links:
-                        rel_url = r.links[rel]["url"]
-                        if not rel_url.startswith("http://") and not rel_url.startswith("https://"):
-                            # In some case the rel URL provided is relative to the requested URL
-                            if r.url.endswith("/") and rel_url.startswith("/"):
-                                rel_url = rel_url[1:]
-                            rel_url = r.url + rel_url
-                        metadata_obj = self.retrieve_metadata(rel_url)
-                        if len(metadata_obj) > 0:
-                            return metadata_obj
-
-        except Exception as e:
-            self.logs.warn(f"Error resolving the URL {url} : {str(e.args[0])}")
-
-        self.logs.info(
-            "Checking for metadata embedded in the HTML page returned by the resource URI " + url + " using extruct"
-        )
-        # TODO: support client-side JS generated HTML using Selenium https://github.com/vemonet/extruct-selenium
-        try:
-            if not html_text:
-                raise Exception("No HTML text provided")
-            extructed = extruct.extract(html_text.encode("utf8"))
-            if url == self.subject:
-                self.data["extruct"] = extructed
-            if len(extructed["json-ld"]) > 0:
-                g = self.parse_rdf(extructed["json-ld"], "json-ld", log_msg="HTML embedded JSON-LD RDF")
-                if len(g) > 0:
-                    self.logs.info("Found JSON-LD RDF metadata embedded in the HTML with extruct")
-                    return g
-                else:
-                    metadata_obj = extructed["json-ld"]
-            if len(extructed["rdfa"]) > 0:
-                g = self.parse_rdf(extructed["rdfa"], "json-ld", log_msg="HTML embedded RDFa")
-                if len(g) > 0:
-                    self.logs.info("Found RDFa metadata embedded in the HTML with extruct")
+        metadata_obj: Any = []
+        empty_graph = None
+        requested = strategies
+        full_harvest = requested is None
+        strategies = [strategy for strategy in harvest_strategies if requested is None or strategy in requested]
+        doi_future = None
+        if "doi" in strategies and (not doi_url(url) or settings.DOI_METADATA != "prefer"):
+            strategies.remove("doi")
+        # The DOI registration agency is asked while the landing page is harvested, the request is waited for
+        # (or aborted if the evaluation is cancelled) before returning, so that it does not outlive the harvest
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if full_harvest and doi_url(url) and settings.DOI_METADATA == "merge":
+                doi_future = executor.submit(self.harvest_doi, url)
+
+            # Strategies which found RDF for the previous subjects of the same host are tried first
+            for strategy in strategy_stats.order(url, strategies):
+                # Skip the next strategies if the client of the evaluation disconnected
+                self.http.check_cancelled()
+                start_time = time.time()
+                g, strategy_obj = self.run_strategy(strategy, url)
+                found = g is not None and len(g) > 0
+                # Non-RDF metadata (e.g. microdata embedded in the HTML) is a success too, it is used as fallback
+                strategy_stats.record(url, strategy, found or bool(strategy_obj), time.time() - start_time)
+                if found:
+                    self.data["harvest_strategy"] = strategy
+                    return self.merge_doi_metadata(g, doi_future)
+                if g is not None and empty_graph is None:
+                    empty_graph = g
+                if not metadata_obj and strategy_obj:
+                    metadata_obj = strategy_obj
+
+            if doi_future:
+                g, doi_obj = doi_future.result()
+                if g is not None and len(g) > 0:
+                    self.data["harvest_strategy"] = "doi"
                     return g
-                elif not metadata_obj:
-                    metadata_obj = extructed["rdfa"]
-            if not metadata_obj and len(extructed["microdata"]) > 0:
-                metadata_obj = extructed["microdata"]
-            if not metadata_obj and extructed["dublincore"] != [{"namespaces": {}, "elements": [], "terms": []}]:
-                # Dublin core always comes as this empty dict if no match
-                metadata_obj = extructed["dublincore"]
-            # The rest is not extracted because usually give no interesting metadata:
-            # opengraph, microformat
-        except Exception as e:
-            self.logs.info(f"Error when running extruct on {url}. Getting: {str(e.args[0])}")
-
-        # Perform content negociation last because it's the slowest for a lot of URLs like zenodo
-        # We need to do direct content negociation to turtle and json
-        # because some URLs dont support standard weighted content negociation
-        check_mime_types = [
-            "text/turtle",
-            "application/ld+json",
-            "text/turtle, application/turtle, application/x-turtle;q=0.9, application/ld+json;q=0.8, application/rdf+xml, text/n3, text/rdf+n3;q=0.7",
-        ]
-        for mime_type in check_mime_types:
-            try:
-                r = requests.get(url, headers={"accept": mime_type}, timeout=requests_timeout)
-                r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
-                content_type = r.headers["Content-Type"].replace(" ", "").replace(";charset=utf-8", "")
-                # If return text/plain we parse as turtle or JSON-LD
-                # content_type = content_type.replace('text/plain', 'text/turtle')
-                self.logs.info(
-                    f"Content-negotiation: found some metadata in {content_type} when asking for {mime_type}"
-                )
-                try:
-                    # If returns JSON
-                    self.data["json-ld"] = r.json()
-                    if not metadata_obj:
-                        metadata_obj = r.json()
-                    return self.parse_rdf(r.json(), "json-ld", log_msg="content negotiation JSON-LD RDF")
-                except Exception:
-                    # If returns RDF as text, such as turtle
-                    return self.parse_rdf(r.text, content_type, log_msg="content negotiation RDF")
-            except Exception as e:
-                self.logs.info(
-                    f"Content-negotiation: error with {url} when asking for {mime_type}. Getting {str(e.args[0])}"
-                )
-                # Error: e.args[0]
+                if not metadata_obj and doi_obj:
+                    metadata_obj = doi_obj
 
         # If nothing found with the built-in metadata harvesting process we try to use the service
-        if not metadata_obj or len(metadata_obj) < 1:
+        if full_harvest and (not metadata_obj or len(metadata_obj) < 1):
             try:
                 self.logs.info(
                     f"Nothing found with built-in metadata harvesting process. Using Metadata Harvester service at {harvester_url} to retrieve RDF metadata from {url}"
                 )
-                res = requests.post(
+                res = self.http.post(
                     harvester_url,
+                    max_bytes=settings.HARVEST_MAX_RDF_BYTES,
                     json={"subject": url},
                     timeout=60,
                     allow_redirects=True,
                     headers={"Accept": "application/turtle"},
                 )
+                self.log_truncated(res, harvester_url, settings.HARVEST_MAX_RDF_BYTES)
                 res.raise_for_status()
-                g = self.parse_rdf(res.text, "text/turtle", log_msg="Metadata harvester service RDF")
+                g = self.parse_rdf(res.content, "text/turtle", log_msg="Metadata harvester service RDF")
                 if len(g) > 1:
                     return g
                 else:
@@ -240,8 +224,233 @@ class MetadataHarvester:
                     f"Could not retrieve metadata from the Harvester service at {harvester_url} for {url}: {e}"
                 )
 
+        if not metadata_obj and empty_graph is not None:
+            return empty_graph
         return metadata_obj
 
+    def run_strategy(self, strategy: str, url: str) -> Tuple[Optional[Any], Any]:
+        """
+        Run a strategy to find metadata about a URL
+
+        Parameters:
+            strategy: Name of the strategy, one of `harvest_strategies`
+            url: URL to retrieve metadata from
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF found, None if no RDF was found
+            metadata_obj: Non-RDF metadata found (e.g. JSON), used as fallback
+        """
+        if strategy == "resolve":
+            return self.harvest_resolve(url)
+        if strategy == "doi":
+            return self.harvest_doi(url)
+        return self.harvest_content_negotiation(url, harvest_strategies[strategy])
+
+    def harvest_resolve(self, url: str) -> Tuple[Optional[Any], Any]:
+        """
+        Resolve the URL, then parse it if it is RDF, follow its Signposting links,
+        or extract the metadata embedded in the HTML. The headers of the response are used first,
+        the HTML is not downloaded when the Signposting links lead to RDF, and the body is not downloaded
+        when it is not HTML or RDF (e.g. a data file). The response is closed before following the links
+
+        Parameters:
+            url: URL to retrieve metadata from
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF found, None if no RDF was found
+            metadata_obj: Non-RDF metadata embedded in the HTML, used as fallback
+        """
+        html = None
+        charset = None
+        metadata_obj: Any = []
+        r = None
+        try:
+            # Only the status and headers are received, the body is downloaded only if needed
+            r = self.http.get(url, stream=True)
+            r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
+            self.logs.info(f"Successfully resolved {url}")
+            self.record_redirect(r, url)
+            stream_format = self.get_stream_format(r)
+            if stream_format:
+                # The resource is a RDF dump, parse it while downloading
+                g = self.parse_rdf_stream(r, stream_format, log_msg="resource URI RDF")
+                if len(g) > 0:
+                    return g, []
+
+            content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            is_html = not content_type or content_type in html_content_types
+            if content_type in rdf_content_types:
+                # The RDF returned is parsed directly, instead of being asked again through content negotiation
+                g, metadata_obj = self.parse_rdf_response(r, url, log_msg="resource URI")
+                if g is not None and len(g) > 0:
+                    return g, metadata_obj
+            elif is_html and not self.has_metadata_links(r):
+                # Other links (e.g. preload, stylesheet, canonical) do not lead to metadata, the page is read now
+                html, charset = self.read_page(r, url)
+            else:
+                r.close()
+                if not is_html and not stream_format:
+                    size = r.headers.get("Content-Length")
+                    self.logs.info(
+                        f"The resource URI returned {content_type}{f' ({size} bytes)' if size else ''}, "
+                        "not downloading it to search for metadata embedded in HTML"
+                    )
+
+            # Handle signposting links headers https://signposting.org/FAIR
+            g = self.follow_signposting(r, url)
+            if g is not None:
+                return g, []
+            if is_html and html is None:
+                # The Signposting links did not lead to RDF, the page is downloaded to search for embedded metadata
+                r = self.http.get(url, stream=True)
+                r.raise_for_status()
+                html, charset = self.read_page(r, url)
+
+        except Exception as e:
+            self.logs.warn(f"Error resolving the URL {url} : {str(e.args[0])}")
+        finally:
+            # Release the connection if the status is an error or the parsing failed before reading the body
+            if r is not None:
+                r.close()
+
+        if html is None and metadata_obj:
+            return None, metadata_obj
+        return self.extract_embedded_metadata(html, url, charset)
+
+    def harvest_doi(self, url: str) -> Tuple[Optional[Any], Any]:
+        """
+        Ask the registration agency of a DOI (e.g. DataCite, Crossref) for its metadata in RDF,
+        through content negotiation on doi.org, instead of resolving the landing page of the publisher
+
+        Parameters:
+            url: doi.org URL of the DOI
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF returned, None if the registration agency returned no RDF
+            metadata_obj: JSON returned, used as fallback
+        """
+        doi = doi_url(url)
+        if not doi:
+            return None, []
+        try:
+            r = self.http.get(doi, headers={"accept": doi_accept}, max_bytes=settings.HARVEST_MAX_RDF_BYTES)
+            r.raise_for_status()
+            self.log_truncated(r, doi, settings.HARVEST_MAX_RDF_BYTES)
+            content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not content_type or content_type in html_content_types:
+                # The registration agency does not support content negotiation, doi.org redirected to the landing page
+                self.logs.info(f"The registration agency of {doi} did not return RDF metadata")
+                return None, []
+            self.logs.info(f"Found metadata in {content_type} for {doi} from the DOI registration agency")
+            if "json" in content_type:
+                json_obj = response_json(r)
+                return self.parse_rdf(json_obj, "json-ld", log_msg="DOI registration agency JSON-LD RDF"), json_obj
+            return self.parse_rdf(r.content, content_type, log_msg="DOI registration agency RDF"), []
+        except Exception as e:
+            self.logs.info(f"Could not retrieve the metadata of {doi} from the DOI registration agency: {e}")
+        return None, []
+
+    def merge_doi_metadata(self, g: Any, doi_future: Optional[Future]) -> Any:
+        """Add the RDF returned by the DOI registration agency, requested in parallel, to the RDF found"""
+        if doi_future is None:
+            return g
+        doi_g, _doi_obj = doi_future.result()
+        if doi_g is not None and len(doi_g) > 0:
+            self.logs.info(f"Merging {len(doi_g)} triples from the DOI registration agency")
+            g += doi_g
+        return g
+
+    def harvest_content_negotiation(self, url: str, mime_type: str) -> Tuple[Optional[Any], Any]:
+        """
+        Ask for RDF through content negotiation
+
+        Parameters:
+            url: URL to retrieve metadata from
+            mime_type: Accept header sent
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF returned, None if the request failed
+            metadata_obj: JSON returned, used as fallback
+        """
+        try:
+            r = self.http.get(url, headers={"accept": mime_type}, stream=True)
+            # The connection is released even if the status is an error or the parsing fails
+            with r:
+                r.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xxx
+                content_type = r.headers["Content-Type"].replace(" ", "").replace(";charset=utf-8", "")
+                # If return text/plain we parse as turtle or JSON-LD
+                # content_type = content_type.replace('text/plain', 'text/turtle')
+                self.logs.info(
+                    f"Content-negotiation: found some metadata in {content_type} when asking for {mime_type}"
+                )
+                if "redirect_url" not in self.data:
+                    # The URL might not have been resolved without content negotiation
+                    self.record_redirect(r, url)
+                stream_format = self.get_stream_format(r)
+                if stream_format:
+                    return self.parse_rdf_stream(r, stream_format, log_msg="content negotiation RDF"), []
+                return self.parse_rdf_response(r, url, log_msg="content negotiation")
+        except Exception as e:
+            self.logs.info(
+                f"Content-negotiation: error with {url} when asking for {mime_type}. Getting {str(e.args[0])}"
+            )
+            # Error: e.args[0]
+        return None, []
+
+    def read_page(self, r: Any, url: str) -> Tuple[bytes, Optional[str]]:
+        """Download a HTML page within the page size limit, and get its bytes with the charset declared"""
+        self.http.read(r, settings.HARVEST_MAX_PAGE_BYTES)
+        self.log_truncated(r, url, settings.HARVEST_MAX_PAGE_BYTES)
+        return r.content, response_charset(r)
+
+    def parse_rdf_response(self, r: Any, url: str, log_msg: str) -> Tuple[Any, Any]:
+        """
+        Download the body of a response within the RDF size limit, and parse it as JSON-LD if it is JSON,
+        or as RDF text (e.g. turtle) with its content type
+
+        Parameters:
+            r (Response): Streamed response returning RDF
+            url: URL requested
+            log_msg: Text to use when logging about the parsing process
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF returned
+            metadata_obj: JSON returned, used as fallback
+        """
+        self.http.read(r, settings.HARVEST_MAX_RDF_BYTES)
+        self.log_truncated(r, url, settings.HARVEST_MAX_RDF_BYTES)
+        content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        try:
+            # If returns JSON, the body is parsed once, directly from the bytes
+            json_obj = response_json(r)
+        except ValueError:
+            # If returns RDF as text, such as turtle
+            return self.parse_rdf(r.content, content_type, log_msg=f"{log_msg} RDF"), []
+        if url == self.subject:
+            self.data["json-ld"] = json_obj
+        return self.parse_rdf(json_obj, "json-ld", log_msg=f"{log_msg} JSON-LD RDF"), json_obj
+
+    def record_redirect(self, r: Any, url: str) -> None:
+        """Add the URL the subject was redirected to the alternative URIs of the subject"""
+        if not r.history:
+            return
+        # Extract alternative URIs if request redirected
+        redirect_url = r.url
+        if redirect_url.startswith("https://linkinghub.elsevier.com/retrieve/pii/"):
+            # Special case to handle Elsevier bad redirections to ScienceDirect
+            redirect_url = redirect_url.replace(
+                "https://linkinghub.elsevier.com/retrieve/pii/",
+                "https://www.sciencedirect.com/science/article/pii/",
+            )
+
+        self.data["redirect_url"] = redirect_url
+        alt_uris = self.data.setdefault("alternative_uris", [])
+        if url == self.subject and redirect_url not in alt_uris:
+            self.logs.info(
+                f"Request was redirected to {redirect_url}, adding to the list of alternative URIs for the subject"
+            )
+            alt_uris += [uri for uri in alternative_uris([redirect_url]) if uri not in alt_uris]
+
     def parse_rdf(
         self,
         rdf_data: Any,
@@ -249,10 +458,11 @@ class MetadataHarvester:
         log_msg: Optional[str] = "",
     ) -> Any:
         """
-        Parse any string or JSON-like object to a RDFLib Graph
+        Parse any string, bytes or JSON-like object to a RDFLib Graph. Bytes are passed as is to the parsers,
+        and JSON-like objects are expanded by pyld, then converted to RDF without being serialized
 
         Parameters:
-            rdf_data (str|object): Text or object to convert to RDF
+            rdf_data (str|bytes|object): Text, bytes received, or object to convert to RDF
             mime_type: Mime type of the data to convert
             log_msg: Text to use when logging about the parsing process (help debugging)
 
@@ -260,7 +470,7 @@ class MetadataHarvester:
             g (Graph): A RDFLib Graph
         """
         # https://rdflib.readthedocs.io/en/stable/plugin_parsers.html
-        parse_formats = ["turtle", "json-ld", "xml", "ntriples", "nquads", "trig", "n3"]
+        parse_formats: List[str] = []
 
         if type(rdf_data) == dict:
             rdf_data = [rdf_data]
@@ -282,7 +492,6 @@ class MetadataHarvester:
                     self.logs.info(f"Error when fixing JSON-LD context: {e}")
             # RDFLib JSON-LD had issue with encoding: https://github.com/RDFLib/rdflib/issues/1416
             rdf_data = jsonld.expand(rdf_data)
-            rdf_data = json.dumps(rdf_data)
             parse_formats = ["json-ld"]
 
         else:
@@ -301,14 +510,24 @@ class MetadataHarvester:
                     parse_formats = ["trig"]
                 # elif mime_type.startswith('text/html'):
                 #     parse_formats = []
+            if not parse_formats:
+                # Guess the most likely formats from the content, instead of trying all parsers
+                parse_formats = sniff_rdf_formats(rdf_data)
+                self.logs.info(
+                    f"Guessed the formats to parse {mime_type} data from {log_msg}: {', '.join(parse_formats) or 'not RDF'}"
+                )
 
-        g = ConjunctiveGraph()
+        g = new_graph()
         # Remove some auto-generated triples about the HTML content
         remove_preds = ["http://www.w3.org/1999/xhtml/vocab#role"]
         for rdf_format in parse_formats:
             try:
-                g = ConjunctiveGraph()
-                g.parse(data=rdf_data, format=rdf_format)
+                g = new_graph()
+                if isinstance(rdf_data, list):
+                    # The expanded JSON-LD objects are converted to RDF directly, without a JSON text round-trip
+                    jsonld_to_rdf(rdf_data, g)
+                else:
+                    g.parse(data=rdf_data, format=parser_format(rdf_format))
 
                 for rm_pred in remove_preds:
                     g.remove((None, URIRef(rm_pred), None))
@@ -316,14 +535,314 @@ class MetadataHarvester:
                 self.logs.info(
                     f"Successfully parsed {mime_type} RDF from {log_msg} with parser {rdf_format}, containing {str(len(g))} triples"
                 )
+                self.data.setdefault("parse_attempts", []).append(
+                    {"source": log_msg, "format": rdf_format, "success": True}
+                )
                 return g
             except Exception as e:
                 self.logs.info(
                     f"Could not parse {mime_type} metadata from {log_msg} with parser {rdf_format}. Getting error: {str(e)}"
                 )
+                self.data.setdefault("parse_attempts", []).append(
+                    {"source": log_msg, "format": rdf_format, "success": False}
+                )
         return g
         # return None
 
+    def parse_rdf_stream(
+        self,
+        r: Any,
+        rdf_format: str,
+        log_msg: Optional[str] = "",
+        max_bytes: Optional[int] = None,
+        max_triples: Optional[int] = None,
+    ) -> Any:
+        """
+        Parse N-Triples or N-Quads incrementally while downloading them, and stop when the maximum number
+        of bytes or triples is reached
+
+        Parameters:
+            r (Response): Streamed `requests` response returned by the HttpClient
+            rdf_format: RDFLib parser to use, `nt` or `nquads`
+            log_msg: Text to use when logging about the parsing process (help debugging)
+            max_bytes: Maximum number of bytes to download. Defaults to the `HARVEST_MAX_RDF_BYTES` setting
+            max_triples: Maximum number of triples to parse. Defaults to the `HARVEST_MAX_TRIPLES` setting
+
+        Returns:
+            g (Graph): A RDFLib Graph with the triples parsed
+        """
+        max_bytes = settings.HARVEST_MAX_RDF_BYTES if max_bytes is None else max_bytes
+        max_triples = settings.HARVEST_MAX_TRIPLES if max_triples is None else max_triples
+        g, truncated = self.parse_rdf_lines(
+            self.http.iter_lines(r, max_bytes), rdf_format, log_msg=log_msg, max_triples=max_triples
+        )
+        if truncated:
+            self.logs.warn(
+                f"Stopped parsing the RDF from {log_msg} at {r.url} after {max_triples} triples, the rest of the document is ignored"
+            )
+        self.log_truncated(r, r.url, max_bytes)
+        return g
+
+    def parse_rdf_lines(
+        self,
+        lines: Iterable[str],
+        rdf_format: str,
+        log_msg: Optional[str] = "",
+        max_triples: Optional[int] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Parse N-Triples or N-Quads lines by batches, so that the whole document is never loaded in memory
+
+        Parameters:
+            lines: Iterator over the lines of the document
+            rdf_format: RDFLib parser to use, `nt` or `nquads`
+            log_msg: Text to use when logging about the parsing process (help debugging)
+            max_triples: Maximum number of triples to parse (no limit if None or 0)
+
+        Returns:
+            g (Graph): A RDFLib Graph with the triples parsed, and True if the triples limit was reached
+        """
+        g = new_graph()
+        # Keep the same blank nodes across batches
+        bnode_context: Dict[str, Any] = {}
+        batch: List[str] = []
+        count = 0
+        truncated = False
+        try:
+            for line in lines:
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                if max_triples and count >= max_triples:
+                    truncated = True
+                    break
+                batch.append(line)
+                count += 1
+                if len(batch) >= stream_batch_lines:
+                    g.parse(data="\n".join(batch), format=rdf_format, bnode_context=bnode_context)
+                    batch = []
+            if batch:
+                g.parse(data="\n".join(batch), format=rdf_format, bnode_context=bnode_context)
+        except Exception as e:
+            self.logs.info(
+                f"Could not parse the RDF from {log_msg} with parser {rdf_format} after {str(len(g))} triples. Getting error: {str(e)}"
+            )
+            self.data.setdefault("parse_attempts", []).append(
+                {"source": log_msg, "format": rdf_format, "success": False}
+            )
+            return g, truncated
+
+        self.logs.info(
+            f"Successfully parsed RDF from {log_msg} incrementally with parser {rdf_format}, containing {str(len(g))} triples"
+        )
+        self.data.setdefault("parse_attempts", []).append({"source": log_msg, "format": rdf_format, "success": True})
+        return g, truncated
+
+    def follow_signposting(
+        self,
+        r: Any,
+        url: str,
+        max_depth: Optional[int] = None,
+        max_links: Optional[int] = None,
+    ) -> Any:
+        """
+        Follow the FAIR Signposting links (https://signposting.org/FAIR) returned in the `Link` header of a response
+        to find RDF metadata. Links are followed level by level up to `max_depth`, each URL is fetched only once,
+        and the links of the same level are fetched concurrently. Link sets are parsed to get more links.
+
+        Parameters:
+            r (Response): Response of the resource URL
+            url: The resource URL
+            max_depth: Maximum number of links followed from the resource. Defaults to the `SIGNPOSTING_MAX_DEPTH` setting
+            max_links: Maximum number of links followed from each document. Defaults to the `SIGNPOSTING_MAX_LINKS` setting
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF found, None if no RDF has been found
+        """
+        max_depth = settings.SIGNPOSTING_MAX_DEPTH if max_depth is None else max_depth
+        max_links = settings.SIGNPOSTING_MAX_LINKS if max_links is None else max_links
+        # Other links (e.g. preload, stylesheet, canonical) are ignored
+        links = [
+            link
+            for link in parse_link_header(r.headers.get("Link", ""), r.url)
+            if link["rel"] in signposting_rels or link["rel"] in metadata_rels
+        ]
+        if not links:
+            return None
+        self.logs.info(f"Found Signposting links: {', '.join(link['rel'] + ' ' + link['url'] for link in links)}")
+        if url == self.subject:
+            self.data["signposting_links"] = [link for link in links if link["rel"] in signposting_rels]
+            alt_uris = self.data.setdefault("alternative_uris", [])
+            for link in links:
+                if link["rel"] == "cite-as" and link["url"] not in alt_uris:
+                    self.logs.info(
+                        f"Adding the cite-as link {link['url']} to the list of alternative URIs for the subject"
+                    )
+                    alt_uris.append(link["url"])
+
+        visited = {normalize_url(url), normalize_url(r.url)}
+        # Links to follow, with the URL of the document they come from
+        frontier = [(r.url, links)]
+        for depth in range(1, max_depth + 1):
+            targets = []
+            for _source, source_links in frontier:
+                source_targets = []
+                for rel in metadata_rels:
+                    for link in source_links:
+                        if link["rel"] == rel and normalize_url(link["url"]) not in visited:
+                            visited.add(normalize_url(link["url"]))
+                            source_targets.append(link)
+                if len(source_targets) > max_links:
+                    self.logs.info(f"Only following the first {max_links} of {len(source_targets)} Signposting links")
+                targets += source_targets[:max_links]
+            if not targets:
+                return None
+
+            self.logs.info(f"Following {len(targets)} Signposting links at depth {depth}")
+            if len(targets) == 1:
+                results = [self.fetch_signposting_link(targets[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(targets), settings.SIGNPOSTING_WORKERS)) as executor:
+                    results = list(executor.map(self.fetch_signposting_link, targets))
+
+            # Results are checked in the order of priority of the links
+            frontier = []
+            for link, (g, next_links) in zip(targets, results):
+                if g is not None and len(g) > 0:
+                    self.logs.info(f"Found RDF metadata following the Signposting {link['rel']} link {link['url']}")
+                    return g
+                if next_links:
+                    frontier.append((link["url"], next_links))
+        return None
+
+    def has_metadata_links(self, r: Any) -> bool:
+        """Check if the `Link` header of a response has links which could lead to metadata (e.g. describedby)"""
+        return any(link["rel"] in metadata_rels for link in parse_link_header(r.headers.get("Link", ""), r.url))
+
+    def fetch_signposting_link(self, link: Dict[str, str]) -> Tuple[Any, List[Dict[str, str]]]:
+        """
+        Retrieve the document targeted by a Signposting link, and parse it as RDF or as a link set
+
+        Parameters:
+            link: The link to fetch, with its `url`, `rel`, and optional `type`
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF found (None if not RDF), and the links found in the document
+        """
+        try:
+            accept = link.get("type") or rdf_accept
+            if link["rel"] == "linkset":
+                accept = link.get("type") or ", ".join(linkset_types)
+            r = self.http.get(link["url"], headers={"accept": accept}, stream=True)
+            with r:
+                r.raise_for_status()
+                next_links = parse_link_header(r.headers.get("Link", ""), r.url)
+                stream_format = self.get_stream_format(r)
+                if stream_format:
+                    return self.parse_rdf_stream(r, stream_format, log_msg=f"Signposting {link['rel']} RDF"), next_links
+
+                self.http.read(r, settings.HARVEST_MAX_RDF_BYTES)
+                self.log_truncated(r, link["url"], settings.HARVEST_MAX_RDF_BYTES)
+                content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type in linkset_types:
+                    return None, next_links + parse_linkset(response_text(r), content_type, r.url)
+                if content_type in html_content_types:
+                    g, _metadata_obj = self.extract_embedded_metadata(r.content, link["url"], response_charset(r))
+                    return g, next_links
+                return self.parse_rdf(r.content, content_type, log_msg=f"Signposting {link['rel']} RDF"), next_links
+        except Exception as e:
+            self.logs.info(f"Error retrieving the Signposting {link['rel']} link {link['url']}: {str(e)}")
+            return None, []
+
+    def extract_embedded_metadata(
+        self, html: Optional[Union[str, bytes]], url: str, charset: Optional[str] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Extract the metadata embedded in a HTML page with extruct, by order of priority of the syntaxes
+
+        Parameters:
+            html: The HTML page, preferably the bytes received, which are parsed without being decoded first
+            url: URL of the HTML page
+            charset: Charset of the page declared in the Content-Type header, defaults to UTF-8
+
+        Returns:
+            g (Graph): A RDFLib Graph with the RDF found (None if not found), and the non-RDF metadata found
+        """
+        metadata_obj: Any = []
+        self.logs.info(
+            "Checking for metadata embedded in the HTML page returned by the resource URI " + url + " using extruct"
+        )
+        # TODO: support client-side JS generated HTML using Selenium https://github.com/vemonet/extruct-selenium
+        try:
+            if not html:
+                raise Exception("No HTML text provided")
+            if isinstance(html, str):
+                html, charset = html.encode("utf8"), "utf-8"
+            extructed: Dict[str, Any] = {}
+            if url == self.subject:
+                self.data["extruct"] = extructed
+            # HTML trees parsed by extruct, shared between the syntaxes
+            html_trees: Dict[str, Any] = {}
+            # Syntaxes are extracted in order of priority, and only until some RDF is found
+            for syntax in settings.EXTRUCT_SYNTAXES:
+                if syntax not in extruct_rdf_syntaxes and metadata_obj:
+                    # Non-RDF syntaxes are only used when nothing has been found
+                    continue
+                try:
+                    extructed[syntax] = self.extruct_syntax(html, syntax, html_trees, charset)
+                except Exception as e:
+                    self.logs.info(f"Error when extracting {syntax} with extruct on {url}. Getting: {str(e)}")
+                    continue
+                if not extructed[syntax] or extructed[syntax] == extruct_empty_dublincore:
+                    # Dublin core always comes as this empty dict if no match
+                    continue
+                if syntax in extruct_rdf_syntaxes:
+                    g = self.parse_rdf(extructed[syntax], "json-ld", log_msg=f"HTML embedded {syntax} RDF")
+                    if len(g) > 0:
+                        self.logs.info(f"Found {syntax} RDF metadata embedded in the HTML with extruct")
+                        return g, metadata_obj
+                if not metadata_obj:
+                    metadata_obj = extructed[syntax]
+        except Exception as e:
+            self.logs.info(f"Error when running extruct on {url}. Getting: {str(e.args[0])}")
+        return None, metadata_obj
+
+    def extruct_syntax(
+        self, html: bytes, syntax: str, html_trees: Dict[str, Any], charset: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Extract the metadata embedded in a HTML page for one syntax with extruct. The HTML is parsed only once
+        for all the syntaxes (once more with the XML DOM parser required by RDFa)
+
+        Parameters:
+            html: The HTML page
+            syntax: The extruct syntax, e.g. json-ld, rdfa, microdata, dublincore
+            html_trees: HTML trees already parsed for this page, by parser
+            charset: Charset of the page, defaults to UTF-8
+
+        Returns:
+            items: The metadata items found for this syntax
+        """
+        if syntax == "microformat":
+            # The microformat extractor requires the HTML string
+            return extruct.extract(html, syntaxes=[syntax])[syntax]
+        parser = "xmldom" if syntax == "rdfa" else "html"
+        if parser not in html_trees:
+            parse = parse_xmldom_html if parser == "xmldom" else parse_html
+            html_trees[parser] = parse(html, encoding=charset or "UTF-8")
+        return extruct.extract(html_trees[parser], syntaxes=[syntax])[syntax]
+
+    def get_stream_format(self, r: Any) -> Optional[str]:
+        """Get the RDFLib parser to parse a response incrementally, None if its format is not line-based"""
+        content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        return stream_formats.get(content_type)
+
+    def log_truncated(self, r: Any, url: str, max_bytes: Optional[int]) -> None:
+        """Log when the body of a response has been truncated because it was bigger than the limit"""
+        if getattr(r, "truncated", False):
+            self.logs.warn(
+                f"The document at {url} is bigger than {max_bytes} bytes, only its first {max_bytes} bytes have been used"
+            )
+
     @property
     def comment(self) -> List[str]:
         return self.logs.logs
@@ -0,0 +1,102 @@
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional
+
+from rdflib import Literal, URIRef
+
+
+def namespace_of(iri: str) -> str:
+    """Get the namespace of an IRI: everything up to the last `#`, or the last `/` after the host"""
+    hash_index = iri.rfind("#")
+    if hash_index >= 0:
+        return iri[: hash_index + 1]
+    scheme_end = iri.find("://")
+    slash_index = iri.rfind("/")
+    if slash_index > scheme_end + 2:
+        return iri[: slash_index + 1]
+    return iri
+
+
+def graph_namespaces(triples: Iterable[Any]) -> List[str]:
+    """
+    Collect the namespaces of the IRIs used in triples (subjects, predicates, objects, and literals datatypes)
+
+    Parameters:
+        triples: Triples to check, e.g. a RDFLib Graph
+
+    Returns:
+        namespaces: Sorted list of the namespaces used
+    """
+    iris = set()
+    for triple in triples:
+        for term in triple[:3]:
+            if isinstance(term, URIRef):
+                iris.add(str(term))
+            elif isinstance(term, Literal) and term.datatype:
+                iris.add(str(term.datatype))
+    return sorted({namespace_of(iri) for iri in iris})
+
+
+class PrefixIndex:
+    """
+    Sorted index of IRI prefixes (e.g. the namespaces of the vocabularies in LOV), to find the longest prefix
+    of an IRI in O(log(n)) string comparisons, instead of checking each prefix with `startswith`
+
+    ```python
+    index = PrefixIndex(["http://schema.org/", "http://purl.org/dc/terms/"])
+    index.longest_prefix("http://schema.org/name")
+    ```
+    """
+
+    def __init__(self, prefixes: Iterable[str]) -> None:
+        self.prefixes = sorted({str(prefix) for prefix in prefixes if prefix})
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def __contains__(self, prefix: Any) -> bool:
+        i = bisect_right(self.prefixes, str(prefix))
+        return i > 0 and self.prefixes[i - 1] == str(prefix)
+
+    def longest_prefix(self, iri: str) -> Optional[str]:
+        """
+        Find the longest prefix of an IRI in the index
+
+        Parameters:
+            iri: The IRI to match
+
+        Returns:
+            prefix: The longest prefix of the IRI, None if no prefix matches
+        """
+        query = str(iri)
+        while query:
+            i = bisect_right(self.prefixes, query)
+            if i == 0:
+                return None
+            candidate = self.prefixes[i - 1]
+            if query.startswith(candidate):
+                return candidate
+            # Any prefix of the query in the index is also a prefix of the part shared with the candidate
+            shared = 0
+            for query_char, candidate_char in zip(query, candidate):
+                if query_char != candidate_char:
+                    break
+                shared += 1
+            query = query[:shared]
+        return None
+
+    def match(self, iris: Iterable[str]) -> Dict[str, str]:
+        """
+        Match IRIs against the prefixes of the index
+
+        Parameters:
+            iris: The IRIs (or namespaces) to match
+
+        Returns:
+            matches: The longest prefix found for each IRI matched
+        """
+        matches = {}
+        for iri in iris:
+            prefix = self.longest_prefix(iri)
+            if prefix:
+                matches[str(iri)] = prefix
+        return matches
@@ -0,0 +1,83 @@
+import re
+from typing import List, Optional, Union
+
+from fair_test.config import settings
+
+# Byte order marks removed before decoding the start of a document
+boms = [b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff"]
+# Subject or object of a N-Triples statement: IRI, blank node or literal
+rdf_term = r'(?:<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?)'
+# Shapes of the lines of N-Triples and N-Quads documents
+ntriples_line = re.compile(rf"^{rdf_term}\s+<[^>]*>\s+{rdf_term}\s*\.\s*(?:#.*)?$")
+nquads_line = re.compile(rf"^{rdf_term}\s+<[^>]*>\s+{rdf_term}\s+(?:<[^>]*>|_:\S+)\s*\.\s*(?:#.*)?$")
+# Hints that a document is Turtle, or HTML
+turtle_directive = re.compile(r"^\s*(@prefix|@base|PREFIX|BASE)\s", re.IGNORECASE | re.MULTILINE)
+prefixed_name = re.compile(r"(^|\s)[A-Za-z][\w.-]*:[\w-]+\s", re.MULTILINE)
+html_start = re.compile(r"^(<!--.*?-->\s*)*<(!DOCTYPE\s+html|html|head|body)[\s>]", re.IGNORECASE | re.DOTALL)
+# Syntax only allowed in N3
+n3_markers = re.compile(r"=>|<=|@forAll|@forSome|@keywords")
+
+
+def decode_head(data: Union[str, bytes], size: Optional[int] = None) -> str:
+    """Decode the first characters of a document (`HARVEST_SNIFF_SIZE` by default), without its byte order mark"""
+    size = settings.HARVEST_SNIFF_SIZE if size is None else size
+    if isinstance(data, bytes):
+        head = data[: size * 2]
+        if head.startswith(b"\xff\xfe") or head.startswith(b"\xfe\xff"):
+            return head.decode("utf-16", errors="ignore").lstrip("﻿")[:size]
+        for bom in boms:
+            if head.startswith(bom):
+                head = head[len(bom) :]
+        return head.decode("utf-8", errors="ignore")[:size]
+    return data[:size].lstrip("﻿")
+
+
+def sniff_rdf_formats(data: Union[str, bytes]) -> List[str]:
+    """
+    Guess the RDF formats a document could be parsed with, by looking at its first characters
+    (BOM, XML prolog, HTML tags, JSON, `@prefix` directives, N-Triples lines shape).
+    Formats that cannot match are removed, so that parsing a document which is not RDF costs at most one parse.
+
+    Parameters:
+        data: The document to parse
+
+    Returns:
+        formats: The RDFLib parsers to try, ordered by confidence (most likely first)
+    """
+    head = decode_head(data).lstrip()
+    if not head:
+        return []
+
+    if head.startswith("<?xml") or "<rdf:RDF" in head:
+        if "<rdf:RDF" in head or "http://www.w3.org/1999/02/22-rdf-syntax-ns#" in head:
+            return ["xml"]
+        if html_start.match(head.split("?>", 1)[-1].lstrip()):
+            # XHTML page
+            return []
+        return ["xml"]
+
+    if html_start.match(head):
+        # HTML pages are handled by extruct
+        return []
+
+    if head[0] in "{[":
+        return ["json-ld"]
+
+    lines = [line.strip() for line in head.splitlines()]
+    # The last line might have been cut
+    statements = [line for line in lines[:-1] if line and not line.startswith("#")]
+    lines = statements[: settings.HARVEST_SNIFF_LINES] or lines[:1]
+    if all(ntriples_line.match(line) for line in lines):
+        return ["ntriples", "turtle"]
+    if all(ntriples_line.match(line) or nquads_line.match(line) for line in lines):
+        return ["nquads", "trig"]
+
+    if turtle_directive.search(head) or prefixed_name.search(head) or head.startswith("<"):
+        if n3_markers.search(head):
+            return ["n3", "turtle"]
+        if re.search(r"(>|:\w*|\bGRAPH)\s*\{", head):
+            return ["trig", "turtle"]
+        return ["turtle", "n3"]
+
+    # Nothing that looks like RDF, one last try with the most common format
+    return ["turtle"]
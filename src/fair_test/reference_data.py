@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from fair_test.config import settings
+from fair_test.http_client import HttpClient
+
+
+@dataclass
+class ReferenceDataset:
+    """A reference dataset downloaded from a URL (e.g. the list of vocabularies in LOV, or the SPDX licenses)"""
+
+    url: str
+    ttl: int
+    preprocess: Optional[Callable[[Any], Any]] = None
+    # Value returned to the metrics, after preprocessing
+    value: Any = None
+    fetched_at: Optional[float] = None
+    last_error: Optional[str] = None
+    # Number of downloads which failed in a row, and time of the last failure, to back off while upstream is down
+    failures: int = 0
+    failed_at: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    refreshing: bool = False
+
+    @property
+    def loaded(self) -> bool:
+        return self.fetched_at is not None
+
+    @property
+    def age(self) -> float:
+        """Number of seconds since the dataset was downloaded"""
+        return time.time() - self.fetched_at if self.fetched_at is not None else float("inf")
+
+    @property
+    def expired(self) -> bool:
+        return self.age > self.ttl
+
+    @property
+    def retry_in(self) -> float:
+        """Number of seconds before the download can be tried again after a failure, doubled after each failure"""
+        if self.failed_at is None:
+            return 0
+        delay = settings.REFERENCE_DATA_RETRY_DELAY
+        backoff = min(delay * 2 ** (self.failures - 1), max(self.ttl, delay))
+        return max(self.failed_at + backoff - time.time(), 0)
+
+    @property
+    def needs_refresh(self) -> bool:
+        return self.expired and self.retry_in <= 0
+
+
+class ReferenceDataCache:
+    """
+    Cache for the reference datasets used by the metrics tests, shared between all evaluations of the API.
+    Datasets are registered by URL, and downloaded once, then refreshed in the background when their TTL expired,
+    while the metrics keep using the previous copy. The last good copy is stored on disk to be used
+    when the API starts, or if the upstream server is down.
+    A preprocessing function can be registered to build an index from the dataset once per download.
+
+    ```python
+    from fair_test.reference_data import reference_data
+
+    def index_licenses(data):
+        return {url: lic["isOsiApproved"] for lic in data["licenses"] for url in lic["seeAlso"]}
+
+    osi_licenses = reference_data.get(
+        "https://raw.github.com/spdx/license-list-data/master/json/licenses.json",
+        preprocess=index_licenses,
+    )
+    ```
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, http: Optional[HttpClient] = None) -> None:
+        self.cache_dir = cache_dir
+        # Client used for all the downloads (e.g. to test offline), by default each download gets a new client
+        self.http = http
+        self.session = requests.Session()
+        self.datasets: Dict[str, ReferenceDataset] = {}
+        self.lock = threading.Lock()
+
+    def register(
+        self,
+        url: str,
+        ttl: Optional[int] = None,
+        preprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> ReferenceDataset:
+        """
+        Register a reference dataset, registering the same URL again returns the existing dataset
+
+        Parameters:
+            url: URL of the JSON dataset
+            ttl: Number of seconds before refreshing the dataset. Defaults to the `REFERENCE_DATA_TTL` setting
+            preprocess: Function called on the JSON downloaded, its result is returned by `get()`
+
+        Returns:
+            dataset: The reference dataset registered
+        """
+        with self.lock:
+            if url not in self.datasets:
+                self.datasets[url] = ReferenceDataset(
+                    url=url,
+                    ttl=settings.REFERENCE_DATA_TTL if ttl is None else ttl,
+                    preprocess=preprocess,
+                )
+            return self.datasets[url]
+
+    def get(
+        self,
+        url: str,
+        ttl: Optional[int] = None,
+        preprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Get a reference dataset, it is registered if needed. The dataset is downloaded (or loaded from the disk)
+        the first time, then the cached copy is returned, and refreshed in the background once expired
+
+        Parameters:
+            url: URL of the JSON dataset
+            ttl: Number of seconds before refreshing the dataset. Defaults to the `REFERENCE_DATA_TTL` setting
+            preprocess: Function called on the JSON downloaded, its result is returned
+
+        Returns:
+            data: The dataset, preprocessed if a preprocess function has been registered
+        """
+        dataset = self.register(url, ttl, preprocess)
+        if not dataset.loaded:
+            with dataset.lock:
+                if not dataset.loaded:
+                    self.load_from_disk(dataset)
+                if not dataset.loaded:
+                    if dataset.retry_in > 0:
+                        raise requests.ConnectionError(
+                            f"Could not download {url}, retrying in {dataset.retry_in:.0f}s: {dataset.last_error}"
+                        )
+                    # Cold start, nothing to serve while downloading
+                    self.refresh(dataset, raise_errors=True)
+        if dataset.needs_refresh:
+            self.refresh_in_background(dataset)
+        return dataset.value
+
+    def preload(
+        self,
+        url: str,
+        ttl: Optional[int] = None,
+        preprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> ReferenceDataset:
+        """Register a reference dataset, load its copy from the disk, and download it in the background if needed"""
+        dataset = self.register(url, ttl, preprocess)
+        with dataset.lock:
+            if not dataset.loaded:
+                self.load_from_disk(dataset)
+        if dataset.needs_refresh:
+            self.refresh_in_background(dataset)
+        return dataset
+
+    def load_all(self) -> None:
+        """Load all the registered datasets now, from their copy on disk or by downloading them if expired"""
+        for dataset in list(self.datasets.values()):
+            with dataset.lock:
+                if not dataset.loaded:
+                    self.load_from_disk(dataset)
+                if dataset.needs_refresh:
+                    self.refresh(dataset)
+
+    def after_fork(self) -> None:
+        """Reset the state that cannot be shared with a forked worker process (HTTP connections, refresh threads)"""
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        for dataset in self.datasets.values():
+            dataset.lock = threading.Lock()
+            dataset.refreshing = False
+
+    def client(self) -> HttpClient:
+        """
+        Client used to download a dataset, with its own retry budget. The datasets are shared by all the evaluations,
+        their downloads are not aborted when the evaluation which started them is cancelled
+        """
+        return self.http or HttpClient(timeout=60, session=self.session, cancel_token=None)
+
+    def refresh_in_background(self, dataset: ReferenceDataset) -> None:
+        """Refresh a dataset in a background thread, if it is not already being refreshed"""
+        with self.lock:
+            if dataset.refreshing:
+                return
+            dataset.refreshing = True
+        threading.Thread(target=self.refresh, args=(dataset,), daemon=True).start()
+
+    def refresh(self, dataset: ReferenceDataset, raise_errors: bool = False) -> None:
+        """
+        Download a dataset, and store it on disk. On error the previous copy is kept,
+        and the download is not tried again until the backoff delay is over
+
+        Parameters:
+            dataset: The dataset to download
+            raise_errors: Raise errors instead of only recording them (e.g. when there is no copy to use)
+        """
+        try:
+            r = self.client().get(dataset.url)
+            r.raise_for_status()
+            data = r.json()
+            self.set_value(dataset, data, time.time())
+            dataset.last_error = None
+            dataset.failures = 0
+            dataset.failed_at = None
+            self.save_to_disk(dataset, r.content)
+        except Exception as e:
+            # Reported to the evaluations using the previous copy
+            dataset.last_error = str(e)
+            dataset.failures += 1
+            dataset.failed_at = time.time()
+            if raise_errors:
+                raise
+        finally:
+            dataset.refreshing = False
+
+    def set_value(self, dataset: ReferenceDataset, data: Any, fetched_at: float) -> None:
+        dataset.value = dataset.preprocess(data) if dataset.preprocess else data
+        dataset.fetched_at = fetched_at
+
+    def load_from_disk(self, dataset: ReferenceDataset) -> None:
+        """Load the last good copy of a dataset from the disk, if any"""
+        path = self.cache_path(dataset.url)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                data = json.load(f)
+            self.set_value(dataset, data, os.path.getmtime(path))
+        except Exception as e:
+            dataset.last_error = f"Could not load the copy stored in {path}: {e}"
+
+    def save_to_disk(self, dataset: ReferenceDataset, content: bytes) -> None:
+        """Store the last good copy of a dataset on disk, the file is replaced atomically"""
+        path = self.cache_path(dataset.url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            # e.g. read-only file system, the copy in memory is still used until the API restarts
+            pass
+
+    def cache_path(self, url: str) -> str:
+        cache_dir = os.path.expanduser(self.cache_dir or settings.REFERENCE_DATA_DIR)
+        return os.path.join(cache_dir, hashlib.sha256(url.encode()).hexdigest()[:32] + ".json")
+
+    def status(self) -> Dict[str, Any]:
+        """Get the status of the reference datasets (age in seconds, and last error)"""
+        return {
+            url: {
+                "age": round(dataset.age, 1) if dataset.loaded else None,
+                "ttl": dataset.ttl,
+                "last_error": dataset.last_error,
+            }
+            for url, dataset in self.datasets.items()
+        }
+
+
+# Shared by all the evaluations of the API
+reference_data = ReferenceDataCache()
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fair_test.config import settings
+
+
+@dataclass
+class StoredResult:
+    """Result of an evaluation stored, as the body returned by the API with its media type"""
+
+    content: bytes
+    created_at: float
+    media_type: str = "application/json"
+
+    @property
+    def age(self) -> float:
+        """Number of seconds since the evaluation was done"""
+        return max(time.time() - self.created_at, 0)
+
+
+class ResultStore:
+    """
+    Store for the results of the evaluations, in a SQLite database, to return the previous result
+    when the same subject is evaluated again by the same version of a metric test before the TTL expired.
+    The database can be shared by multiple worker processes.
+
+    ```python
+    from fair_test.result_store import ResultStore
+
+    store = ResultStore("results.db", ttl=3600)
+    store.set("https://doi.org/10.1594/PANGAEA.908011", "a1-metadata-protocol", "0.1.0", b"[...]", "application/json")
+    result = store.get("https://doi.org/10.1594/PANGAEA.908011", "a1-metadata-protocol", "0.1.0")
+    ```
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[int] = None) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.local = threading.local()
+
+    @property
+    def db_path(self) -> str:
+        return os.path.expanduser(self.path if self.path is not None else settings.RESULT_STORE_PATH)
+
+    @property
+    def max_age(self) -> int:
+        return settings.RESULT_STORE_TTL if self.ttl is None else self.ttl
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.db_path) and self.max_age > 0
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection to the database of the current thread, connections are not shared with forked processes"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            # Let the workers read while another one is writing
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "subject TEXT NOT NULL, metric_path TEXT NOT NULL, metric_version TEXT NOT NULL, "
+                "created_at REAL NOT NULL, content BLOB NOT NULL, media_type TEXT NOT NULL DEFAULT 'application/json', "
+                "PRIMARY KEY (subject, metric_path, metric_version))"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(results)")]
+            if "media_type" not in columns:
+                # Database created by a previous version, all its results are JSON
+                with conn:
+                    conn.execute("ALTER TABLE results ADD COLUMN media_type TEXT NOT NULL DEFAULT 'application/json'")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, subject: str, metric_path: str, metric_version: str) -> Optional[StoredResult]:
+        """
+        Get the result of the last evaluation of a subject by a metric test, if it is still fresh
+
+        Parameters:
+            subject: The subject evaluated
+            metric_path: Path of the metric test
+            metric_version: Version of the metric test, results of previous versions are not returned
+
+        Returns:
+            result: The result stored, None if there is no result younger than the TTL
+        """
+        row = (
+            self.connection()
+            .execute(
+                "SELECT content, created_at, media_type FROM results "
+                "WHERE subject = ? AND metric_path = ? AND metric_version = ? AND created_at > ?",
+                (subject, metric_path, metric_version, time.time() - self.max_age),
+            )
+            .fetchone()
+        )
+        return StoredResult(content=row[0], created_at=row[1], media_type=row[2]) if row else None
+
+    def set(
+        self,
+        subject: str,
+        metric_path: str,
+        metric_version: str,
+        content: bytes,
+        media_type: str = "application/json",
+    ) -> None:
+        """Store the result of an evaluation, replacing the previous result of the subject for this metric test"""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (subject, metric_path, metric_version, created_at, content, media_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (subject, metric_path, metric_version, time.time(), content, media_type),
+            )
+
+    def purge(self) -> int:
+        """Delete the results older than the TTL, and return the number of results deleted"""
+        with self.connection() as conn:
+            return conn.execute("DELETE FROM results WHERE created_at <= ?", (time.time() - self.max_age,)).rowcount
+
+
+# Shared by all the evaluations of the API, enabled with the RESULT_STORE_PATH setting
+result_store = ResultStore()
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, List
+from urllib.parse import urldefrag, urljoin
+
+from requests.utils import parse_header_links
+
+from fair_test.graph_index import normalize_scheme
+
+# Relations of the FAIR Signposting profile https://signposting.org/FAIR
+signposting_rels = ["cite-as", "describedby", "item", "author", "license", "type", "collection", "linkset"]
+# Relations followed to find metadata about a resource, by order of priority (alternate and meta are used by some repositories)
+metadata_rels = ["describedby", "linkset", "alternate", "meta"]
+# Content types of the link sets https://www.rfc-editor.org/rfc/rfc9264
+linkset_types = ["application/linkset", "application/linkset+json"]
+
+
+def parse_link_header(value: str, base_url: str = "") -> List[Dict[str, str]]:
+    """
+    Parse the links of a HTTP `Link` header. Unlike `requests` `r.links`, all the links are kept when a relation
+    is used multiple times, and links with multiple relations (e.g. `rel="describedby item"`) are split
+
+    Parameters:
+        value: Value of the `Link` header
+        base_url: URL of the response, used to resolve relative links
+
+    Returns:
+        links: List of links, with their `url`, `rel`, and optional attributes (e.g. `type`, `profile`)
+    """
+    links = []
+    if not value:
+        return links
+    for link in parse_header_links(value.replace("\n", " ")):
+        url = link.pop("url", "").strip()
+        if not url:
+            continue
+        url = urljoin(base_url, url)
+        for rel in link.pop("rel", "").split():
+            links.append({**link, "url": url, "rel": rel.lower()})
+    return links
+
+
+def parse_linkset(text: str, content_type: str, base_url: str = "") -> List[Dict[str, str]]:
+    """
+    Parse the links of a link set document, in the `application/linkset` or `application/linkset+json` format
+
+    Parameters:
+        text: The link set document
+        content_type: Content type of the document
+        base_url: URL of the link set, used to resolve relative links
+
+    Returns:
+        links: List of links, with their `url`, `rel`, `anchor`, and optional attributes (e.g. `type`)
+    """
+    if content_type != "application/linkset+json":
+        return parse_link_header(text, base_url)
+    links = []
+    for context in json.loads(text).get("linkset", []):
+        anchor = urljoin(base_url, context.get("anchor", ""))
+        for rel, targets in context.items():
+            if rel == "anchor" or not isinstance(targets, list):
+                continue
+            for target in targets:
+                if isinstance(target, dict) and target.get("href"):
+                    attributes = {key: val for key, val in target.items() if isinstance(val, str) and key != "href"}
+                    links.append({**attributes, "url": urljoin(base_url, target["href"]), "rel": rel, "anchor": anchor})
+    return links
+
+
+def normalize_url(url: Any) -> str:
+    """Normalize a URL to check if it has already been visited (without fragment, and with the http scheme)"""
+    return normalize_scheme(urldefrag(str(url))[0])
@@ -1,2 +1,13 @@
+import pytest
+
+from fair_test.harvest_strategies import HarvestStrategyStats
+
+
 def pytest_addoption(parser):
     parser.addoption("--metric", action="store", default=None)
+
+
+@pytest.fixture(autouse=True)
+def reset_strategy_stats(monkeypatch):
+    # Each test starts with the default order of the harvesting strategies
+    monkeypatch.setattr("fair_test.metadata_harvester.strategy_stats", HarvestStrategyStats(path=""))
@@ -0,0 +1,158 @@
+import asyncio
+
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from fair_test import FairTestAPI
+from fair_test.admission_control import AdmissionController, AdmissionControlMiddleware
+from fair_test.cancellation import CancellationMiddleware, CancellationStats, current_cancel_token
+from fair_test.circuit_breaker import circuit_breakers
+from fair_test.compression import select_encoding
+from fair_test.reference_data import reference_data
+
+# Test the API features that do not require to resolve subjects
+
+app = FairTestAPI(metrics_folder_path="example/metrics")
+
+endpoint = TestClient(app)
+
+
+def test_compression():
+    r = endpoint.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json()["paths"]
+
+    r = endpoint.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+    assert select_encoding("gzip;q=0.5, br;q=0.8") == "br"
+    assert select_encoding("br;q=0, gzip") == "gzip"
+    assert select_encoding("deflate") is None
+
+
+def test_status():
+    r = endpoint.get("/status")
+    assert r.status_code == 200
+    status = r.json()
+    # Each feature adds its own section to the status
+    assert status["circuit_breakers"] == circuit_breakers.status()
+    assert status["reference_data"] == reference_data.status()
+    assert status["admission"]["in_flight"] == 0
+    assert status["cancelled_evaluations"] == 0
+
+
+def test_admission_control():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        assert await controller.acquire("batch")
+        batch = asyncio.ensure_future(controller.acquire("batch"))
+        await asyncio.sleep(0)
+        # The queue is full, the batch request queued is rejected to make room for an interactive request
+        interactive = asyncio.ensure_future(controller.acquire("interactive"))
+        await asyncio.sleep(0)
+        assert await batch is False
+        assert await controller.acquire("batch") is False
+        assert controller.status()["queued"] == {"interactive": 1, "batch": 0}
+        controller.release()
+        assert await interactive is True
+        assert controller.status()["rejected"] == {"interactive": 0, "batch": 2}
+
+    asyncio.run(scenario())
+
+    # Evaluations beyond the limits are rejected with a 503
+    app.admission.in_flight = app.admission.max_in_flight
+    app.admission.max_queue = 0
+    try:
+        r = endpoint.post("/tests/a1-metadata-protocol", json={"subject": "https://example.org"})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "10"
+        # Browsers can read the rejection of a cross-origin request
+        r = endpoint.post(
+            "/tests/a1-metadata-protocol",
+            json={"subject": "https://example.org"},
+            headers={"Origin": "https://dashboard.example.org"},
+        )
+        assert r.status_code == 503
+        assert r.headers["Access-Control-Allow-Origin"] in ("*", "https://dashboard.example.org")
+    finally:
+        app.admission.in_flight = 0
+        app.admission.max_queue = 100
+
+
+def test_cancel_on_disconnect():
+    def evaluate():
+        # The evaluation runs in a thread until the client disconnects
+        token = current_cancel_token()
+        assert token.event.wait(5)
+        token.check()
+
+    async def evaluation_app(scope, receive, send):
+        await receive()
+        await run_in_threadpool(evaluate)
+
+    async def scenario():
+        stats = CancellationStats()
+        middleware = CancellationMiddleware(evaluation_app, stats)
+        messages = [{"type": "http.request", "body": b"{}"}, {"type": "http.disconnect"}]
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0.01)
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/tests/a1-test", "headers": []}
+        await middleware(scope, receive, send)
+        return stats, sent
+
+    stats, sent = asyncio.run(scenario())
+    assert stats.cancelled == 1
+    assert sent[0]["status"] == 499
+
+
+def test_cancel_while_queued():
+    async def evaluation_app(scope, receive, send):
+        raise AssertionError("The request should not be admitted")
+
+    async def scenario():
+        stats = CancellationStats()
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        assert await controller.acquire("interactive")
+        middleware = CancellationMiddleware(AdmissionControlMiddleware(evaluation_app, controller), stats)
+        messages = [{"type": "http.request", "body": b"{}"}, {"type": "http.disconnect"}]
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0.01)
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/tests/a1-test", "headers": []}
+        # The client disconnects while the evaluation waits for a slot
+        await asyncio.wait_for(middleware(scope, receive, send), 5)
+        return stats, controller, sent
+
+    stats, controller, sent = asyncio.run(scenario())
+    assert stats.cancelled == 1
+    assert sent[0]["status"] == 499
+    assert controller.status()["queued"] == {"interactive": 0, "batch": 0}
+    assert controller.in_flight == 1
+
+
+def test_reference_data_registered():
+    # The reference datasets of the metrics tests are known once the API is loaded, to be loaded before forking
+    assert "https://lov.linkeddata.es/dataset/lov/api/v2/vocabulary/list" in reference_data.datasets
+    assert "https://raw.github.com/spdx/license-list-data/master/json/licenses.json" in reference_data.datasets
+
+
+def test_middleware_order():
+    # The 499 answered when the client disconnects goes through CORS, like the other responses
+    middlewares = [middleware.cls for middleware in app.user_middleware]
+    assert middlewares.index(CORSMiddleware) < middlewares.index(CancellationMiddleware)
+    assert middlewares.index(CancellationMiddleware) < middlewares.index(AdmissionControlMiddleware)
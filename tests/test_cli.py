@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from fair_test import FairTestAPI
+from fair_test.cli import build_parser, gunicorn_options, load_app, main
+
+# Test the fair-test command line interface, without starting the server
+
+
+def test_serve_options():
+    args = build_parser().parse_args(["serve", "--workers", "3", "--port", "8080", "--max-requests", "500"])
+    options = gunicorn_options(args)
+    assert options["bind"] == "0.0.0.0:8080"
+    assert options["workers"] == 3
+    assert options["preload_app"] is True
+    assert options["max_requests"] == 500
+    assert options["worker_class"] == "uvicorn.workers.UvicornWorker"
+
+
+def test_load_app():
+    app = load_app(metrics_folder_path="example/metrics")
+    assert isinstance(app, FairTestAPI)
+    assert any(route.path == "/tests/a1-access-protocol" for route in app.routes)
+
+
+METRIC = """
+from fair_test import FairTest, FairTestEvaluation
+
+
+class MetricTest(FairTest):
+    metric_path = "offline-test"
+    applies_to_principle = "F1"
+    title = "Offline test"
+    description = "Check the subject without resolving it"
+
+    def evaluate(self, eval: FairTestEvaluation):
+        if "error" in eval.subject:
+            raise ValueError("Cannot evaluate")
+        if "good" in eval.subject:
+            eval.success("Good subject")
+        return eval.response()
+"""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_evaluate(workers, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / f"batch_metrics_{workers}").mkdir()
+    (tmp_path / f"batch_metrics_{workers}" / "offline_test.py").write_text(METRIC)
+    (tmp_path / "subjects.txt").write_text("https://good.org/1\n\n# comment\nhttps://bad.org/2\nhttps://error.org/3\n")
+    args = ["evaluate", "subjects.txt", "--metrics", f"batch_metrics_{workers}", "--workers", str(workers)]
+
+    main(args)
+    results = [json.loads(line) for line in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert {res["subject"]: res.get("score") for res in results} == {
+        "https://good.org/1": 1,
+        "https://bad.org/2": 0,
+        "https://error.org/3": None,
+    }
+    assert "ValueError: Cannot evaluate" in [res for res in results if "error" in res][0]["error"]
+
+    # Resume from an interrupted run, the errors are evaluated again
+    with open(tmp_path / "results.jsonl", "a") as f:
+        f.write('{"subject": "https://good.org/4", "met')
+    (tmp_path / "subjects.txt").write_text(
+        "https://good.org/1\nhttps://bad.org/2\nhttps://error.org/3\nhttps://good.org/4\n"
+    )
+    main(args)
+    assert "1 evaluations done, 1 errors, 2 already done skipped" in capsys.readouterr().err
+    lines = (tmp_path / "results.jsonl").read_text().splitlines()
+    assert len([line for line in lines if line.startswith('{"subject":"https://good.org/4"')]) == 1
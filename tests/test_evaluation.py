@@ -0,0 +1,262 @@
+import io
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+from rdflib import XSD, BNode, ConjunctiveGraph, Literal, URIRef
+
+from fair_test import FairTestEvaluation
+from fair_test.harvest_plan import HarvestPlan, SubjectHarvest
+from fair_test.http_client import HttpClient
+from fair_test.identifiers import Identifier, alternative_uris, parse_identifier
+from fair_test.json_serializer import get_json_dumps
+from fair_test.namespace_index import PrefixIndex
+
+# Test the FairTestEvaluation helpers offline, without resolving the subject
+
+
+def test_response_serializers():
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "a1-test")
+    evl.data["title"] = [Literal("Dataset title ✔️"), URIRef("https://schema.org/name")]
+    evl.data["nested"] = {"list": [1, 2.5, None, True], 1: "int key"}
+    evl.success("Everything went well")
+
+    outputs = [json.loads(get_json_dumps(serializer)(evl.to_jsonld())) for serializer in ["json", "orjson", "auto"]]
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert outputs[0][0]["http://semanticscience.org/resource/metadata"]["title"][0] == "Dataset title ✔️"
+
+    res = evl.response()
+    assert res.media_type == "application/json"
+    assert json.loads(res.body) == outputs[0]
+
+    # Both serializers reject non-finite floats, instead of orjson silently writing null
+    for serializer in ["json", "orjson"]:
+        for value in [float("nan"), float("inf"), {"nested": [-float("inf")]}, {float("nan"): 1}]:
+            with pytest.raises(ValueError):
+                get_json_dumps(serializer)({"value": value})
+
+
+def test_metadata_budget():
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "a1-test")
+    harvest_data = {
+        "alternative_uris": ["https://doi.pangaea.de/10.1594/PANGAEA.908011"],
+        "redirect_url": "https://doi.pangaea.de/10.1594/PANGAEA.908011",
+        "extruct": {"json-ld": [{"name": "x" * 1000}]},
+    }
+    evl.add_harvest_data(harvest_data, verbosity="summary")
+    assert "https://doi.pangaea.de/10.1594/PANGAEA.908011" in evl.data["alternative_uris"]
+    assert evl.data["redirect_url"] == "https://doi.pangaea.de/10.1594/PANGAEA.908011"
+    assert "extruct" not in evl.data
+
+    evl.add_harvest_data(harvest_data, verbosity="full")
+    data = evl.truncated_data(max_bytes=500)
+    assert data["extruct"]["truncated"] is True
+    assert data["extruct"]["size_bytes"] > 1000
+    assert len(data["extruct"]["preview"]) <= 500
+    assert data["redirect_url"] == "https://doi.pangaea.de/10.1594/PANGAEA.908011"
+    assert evl.truncated_data(max_bytes=0)["extruct"] == harvest_data["extruct"]
+
+
+def test_extract_helpers():
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "a1-test")
+    g = ConjunctiveGraph()
+    g.parse(
+        data="""@prefix schema: <https://schema.org/> .
+@prefix dcterms: <http://purl.org/dc/terms/> .
+<https://doi.pangaea.de/10.1594/PANGAEA.908011> a schema:Dataset ;
+    schema:name "Dataset title" ;
+    <http://schema.org/description> "Dataset description" ;
+    dcterms:identifier "https://doi.org/10.1594/PANGAEA.908011" ;
+    schema:distribution [ schema:contentUrl <https://download.pangaea.de/dataset/908011/tab> ] .
+""",
+        format="turtle",
+    )
+    subject_uri = evl.extract_metadata_subject(g)
+    assert subject_uri == URIRef("https://doi.pangaea.de/10.1594/PANGAEA.908011")
+    assert evl.data["identifier_in_metadata"]["linked_to"] == {
+        "https://doi.pangaea.de/10.1594/PANGAEA.908011": "http://purl.org/dc/terms/identifier"
+    }
+
+    # The resolution is memoized for the graph
+    assert evl.extract_metadata_subject(g) == subject_uri
+    assert len(evl.graph_index(g).resolved_subjects) == 1
+
+    # http and https predicates are matched
+    assert evl.extract_prop(g, ["http://schema.org/name"], subject_uri) == [Literal("Dataset title")]
+    assert evl.extract_prop(g, ["https://schema.org/description"], subject_uri) == [Literal("Dataset description")]
+    assert evl.extract_prop(g, ["https://schema.org/name"]) == [Literal("Dataset title")]
+
+    data_uris = evl.extract_data_subject(g, [subject_uri])
+    assert len(data_uris) == 1
+    assert evl.data["content_url"] == ["https://download.pangaea.de/dataset/908011/tab"]
+
+    # The index is rebuilt when the graph changes
+    g.add((subject_uri, URIRef("https://schema.org/name"), Literal("Other title")))
+    assert len(evl.extract_prop(g, ["https://schema.org/name"], subject_uri)) == 2
+    # A triple replaced without changing the size of the graph needs an explicit invalidation
+    g.remove((subject_uri, URIRef("https://schema.org/name"), Literal("Other title")))
+    g.add((subject_uri, URIRef("https://schema.org/name"), Literal("New title")))
+    evl.invalidate_graph_index(g)
+    assert Literal("New title") in evl.extract_prop(g, ["https://schema.org/name"], subject_uri)
+
+
+def test_namespaces():
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "i2-test")
+    g = ConjunctiveGraph()
+    subj = URIRef("https://doi.org/10.1594/PANGAEA.908011")
+    g.add((subj, URIRef("https://schema.org/name"), Literal("2022-01-01", datatype=XSD.date)))
+    g.add((subj, URIRef("http://purl.org/dc/terms/license"), URIRef("http://example.com")))
+    g.add((subj, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"), URIRef("http://my.vocab/onto#Dataset")))
+    g.add((subj, URIRef("http://purl.obolibrary.org/obo/GO_0005"), BNode()))
+    namespaces = evl.extract_namespaces(g)
+    assert namespaces == [
+        "http://example.com",
+        "http://my.vocab/onto#",
+        "http://purl.obolibrary.org/obo/",
+        "http://purl.org/dc/terms/",
+        "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+        "http://www.w3.org/2001/XMLSchema#",
+        "https://doi.org/10.1594/",
+        "https://schema.org/",
+    ]
+
+    vocabularies = ["https://schema.org/", "http://purl.org/dc/", "http://purl.org/dc/terms/", "http://purl.obolibrary"]
+    assert evl.match_namespaces(namespaces, vocabularies) == {
+        "http://purl.obolibrary.org/obo/": "http://purl.obolibrary",
+        "http://purl.org/dc/terms/": "http://purl.org/dc/terms/",
+        "https://schema.org/": "https://schema.org/",
+    }
+
+
+def test_prefix_index():
+    # Compare the longest prefix found with the index against checking each prefix
+    random.seed(42)
+    prefixes = ["".join(random.choice("ab/") for _ in range(random.randint(1, 6))) for _ in range(200)]  # noqa: S311
+    index = PrefixIndex(prefixes)
+    for _ in range(500):
+        iri = "".join(random.choice("ab/") for _ in range(random.randint(0, 8)))  # noqa: S311
+        expected = max((p for p in prefixes if iri.startswith(p)), key=len, default=None)
+        assert index.longest_prefix(iri) == expected
+    assert prefixes[0] in index
+
+
+def test_identifiers():
+    assert parse_identifier("https://example.org/dataset") == Identifier(
+        "https://example.org/dataset", "url", "https://example.org/dataset"
+    )
+    assert parse_identifier("10.1594/PANGAEA.908011").url == "https://doi.org/10.1594/PANGAEA.908011"
+    assert parse_identifier("doi:10.1594/PANGAEA.908011").scheme == "doi"
+    assert parse_identifier("hdl:20.1000/100").url == "https://hdl.handle.net/20.1000/100"
+    assert (
+        parse_identifier("BSYNRYMUTXBXSQ-UHFFFAOYSA-N").url
+        == "https://pubchem.ncbi.nlm.nih.gov/rest/rdf/inchikey/BSYNRYMUTXBXSQ-UHFFFAOYSA-N"
+    )
+    assert parse_identifier("not an identifier").url is None
+
+    evl = FairTestEvaluation("10.1594/PANGAEA.908011", "a1-test")
+    assert evl.subject_url == "https://doi.org/10.1594/PANGAEA.908011"
+    assert evl.data["alternative_uris"] == [
+        "https://doi.org/10.1594/PANGAEA.908011",
+        "http://doi.org/10.1594/PANGAEA.908011",
+        "https://dx.doi.org/10.1594/PANGAEA.908011",
+        "http://dx.doi.org/10.1594/PANGAEA.908011",
+    ]
+    assert any("is a DOI" in log for log in evl.logs.logs)
+    assert alternative_uris(["http://example.org/a", "https://example.org/a"]) == [
+        "http://example.org/a",
+        "https://example.org/a",
+    ]
+
+
+def test_retrieve_metadata_many(monkeypatch):
+    running = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def retrieve_metadata(harvester, url, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        harvester.logs.info(f"Harvested {url}")
+        with lock:
+            running["now"] -= 1
+        return url.upper()
+
+    monkeypatch.setattr("fair_test.metadata_harvester.MetadataHarvester.retrieve_metadata", retrieve_metadata)
+    evl = FairTestEvaluation("https://example.org/dataset", "a1-test")
+    urls = [f"https://example.org/data/{i}" for i in range(6)]
+    results = evl.retrieve_metadata_many(urls + urls[:1], max_workers=3)
+    # Results and logs are in the order of the URLs, duplicates are harvested once
+    assert list(results) == urls
+    assert results[urls[2]] == urls[2].upper()
+    assert [log.split("] ")[1] for log in evl.comment[-6:]] == [f"Harvested {url}" for url in urls]
+    assert running["max"] == 3
+
+    def get(http, url, **kwargs):
+        if url.endswith("0"):
+            raise requests.ConnectionError("Connection refused")
+        return url
+
+    monkeypatch.setattr(HttpClient, "get", get)
+    responses = evl.fetch_many(urls[:2], headers={"accept": "application/json"})
+    assert isinstance(responses[urls[0]], requests.ConnectionError)
+    assert responses[urls[1]] == urls[1]
+
+
+def test_harvest_plan(monkeypatch):
+    def metric(*requires):
+        return SimpleNamespace(metric_path="a1-test", requires=list(requires))
+
+    assert HarvestPlan.for_metrics([metric("http_response")]).strategies == ["resolve"]
+    assert HarvestPlan.for_metrics([metric("content_negotiation"), metric("embedded_metadata")]).strategies == [
+        "resolve",
+        "conneg-turtle",
+        "conneg-json-ld",
+        "conneg-rdf",
+    ]
+    # Metrics which do not declare their requirements get a full harvest
+    assert HarvestPlan.for_metrics([metric("http_response"), metric()]).strategies is None
+    with pytest.raises(ValueError):
+        HarvestPlan.for_metrics([metric("screenshot")])
+    with pytest.raises(ValueError):
+        HarvestPlan.for_metrics([metric("html")])
+
+    sent = []
+
+    def request(session, method, url, headers=None, **kwargs):
+        accept = (headers or {}).get("accept")
+        sent.append(accept)
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        if accept == "text/turtle":
+            r.headers["Content-Type"] = "text/turtle"
+            r.raw = io.BytesIO(b"<https://fdp.example.org/dataset> <https://schema.org/name> 'Dataset' .")
+        else:
+            r.headers["Content-Type"] = "text/html"
+            r.raw = io.BytesIO(b"<html><body>No metadata</body></html>")
+        return r
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    harvest = SubjectHarvest(HarvestPlan.for_metrics([metric("http_response"), metric("content_negotiation")]))
+    subject = "https://fdp.example.org/dataset"
+    first = FairTestEvaluation(subject, "a1-test", harvest)
+    assert first.resolve_subject().status_code == 200
+    second = FairTestEvaluation(subject, "i1-test", harvest)
+    assert second.resolve_subject() is first.resolve_subject()
+    g = second.retrieve_metadata(subject)
+    assert len(g) == 1
+    # A metric test changing its metadata does not change the metadata of the next ones
+    g.add((URIRef(subject), URIRef("https://schema.org/description"), Literal("Added by i1-test")))
+    assert len(g) == 2
+    third = FairTestEvaluation(subject, "f2-test", harvest)
+    third_g = third.retrieve_metadata(subject)
+    assert third_g is not g
+    assert len(third_g) == 1
+    assert any("content negotiation" in log for log in third.comment)
+    # The subject is resolved once, then its landing page and content negotiation are harvested, not the DOI
+    assert sent == [None, None, "text/turtle"]
@@ -0,0 +1,669 @@
+import http.client
+import io
+import json
+import socket
+import time
+
+import pytest
+import requests
+from rdflib import ConjunctiveGraph, URIRef
+from rdflib.compare import isomorphic
+
+from fair_test import metadata_harvester
+from fair_test.cancellation import CancelToken, EvaluationCancelled
+from fair_test.circuit_breaker import CircuitBreakers, HostUnavailableError
+from fair_test.graph_backend import get_graph_backend
+from fair_test.harvest_strategies import HarvestStrategyStats, host_key
+from fair_test.http_client import HttpClient, HttpSessions, RetryBudget, response_json
+from fair_test.metadata_harvester import MetadataHarvester, doi_accept
+from fair_test.rdf_sniffer import sniff_rdf_formats
+from fair_test.signposting import parse_link_header, parse_linkset
+
+# Test the MetadataHarvester offline, without resolving URLs
+
+TURTLE = """@prefix schema: <https://schema.org/> .
+<https://w3id.org/fair-enough/collections> a schema:Dataset ;
+    schema:name "FAIR enough collections" ;
+    <http://www.w3.org/1999/xhtml/vocab#role> "removed" .
+"""
+
+
+@pytest.mark.parametrize("backend", ["rdflib", "oxigraph"])
+def test_parse_rdf_backends(backend, monkeypatch):
+    monkeypatch.setattr("fair_test.config.settings.GRAPH_BACKEND", backend)
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf(TURTLE, "text/turtle", log_msg="test")
+    assert len(g) == 2
+    assert "https://schema.org/" in [str(ns) for _prefix, ns in g.namespace_manager.namespaces()]
+    if get_graph_backend(backend) == "oxigraph":
+        assert g.store.__class__.__name__ == "OxigraphStore"
+
+
+def test_parse_rdf_bytes_and_jsonld():
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf('<http://a> <http://b> "café" .\n'.encode(), "text/plain", log_msg="test")
+    assert str(next(iter(g.objects()))) == "café"
+
+    jsonld_doc = {
+        "@context": {"@vocab": "http://schema.org/"},
+        "@id": "http://a",
+        "name": ["Dataset", {"@value": "Jeu de données", "@language": "fr"}],
+        "size": 3,
+        "author": {"name": "Alice"},
+        "@graph": [{"@id": "http://b", "name": "In a named graph"}],
+    }
+    expected = ConjunctiveGraph()
+    expected.parse(data=json.dumps(jsonld_doc), format="json-ld")
+    g = harvester.parse_rdf(jsonld_doc, "json-ld", log_msg="test")
+    # Same triples as parsing the JSON-LD text with RDFLib
+    assert isomorphic(g, expected)
+    assert {c.identifier for c in g.contexts() if isinstance(c.identifier, URIRef)} == {URIRef("http://a")}
+
+
+def test_extract_embedded_metadata_charset():
+    html = (
+        '<html><head><script type="application/ld+json">'
+        '{"@context": {"@vocab": "http://schema.org/"}, "@id": "http://a", "name": "Données"}'
+        "</script></head></html>"
+    )
+    harvester = MetadataHarvester()
+    g, _metadata_obj = harvester.extract_embedded_metadata(html.encode("latin-1"), "http://a", "ISO-8859-1")
+    assert str(next(iter(g.objects()))) == "Données"
+
+
+def test_sniff_rdf_formats():
+    assert sniff_rdf_formats(TURTLE)[0] == "turtle"
+    assert sniff_rdf_formats("﻿" + TURTLE)[0] == "turtle"
+    assert sniff_rdf_formats(
+        b'<?xml version="1.0"?>\n<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    ) == ["xml"]
+    assert sniff_rdf_formats('[{"@context": "https://schema.org", "@type": "Dataset"}]') == ["json-ld"]
+    assert sniff_rdf_formats('<http://a> <http://b> "c"@en .\n_:b0 <http://b> <http://c> .\n')[0] == "ntriples"
+    assert sniff_rdf_formats('<http://a> <http://b> "c" <http://g> .\n')[0] == "nquads"
+    assert sniff_rdf_formats("<http://g> { <http://a> <http://b> <http://c> }")[0] == "trig"
+    assert sniff_rdf_formats("<!DOCTYPE html>\n<html><head></head></html>") == []
+    assert sniff_rdf_formats("") == []
+
+
+def test_parse_rdf_guess_format():
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf('<http://a> <http://b> "c" .\n', "text/plain", log_msg="test")
+    assert len(g) == 1
+    assert harvester.data["parse_attempts"] == [{"source": "test", "format": "ntriples", "success": True}]
+
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf("<html><body>Not RDF</body></html>", "text/plain", log_msg="test")
+    assert len(g) == 0
+    assert "parse_attempts" not in harvester.data
+
+
+def stream_response(body: bytes, content_type: str = "application/n-triples", status_code: int = 200):
+    r = requests.Response()
+    r.status_code = status_code
+    r.url = "https://example.org/dump.nt"
+    r.headers["Content-Type"] = content_type
+    r.raw = io.BytesIO(body)
+    return r
+
+
+def test_response_charset():
+    doc = '{"@context": {"@vocab": "http://schema.org/"}, "@id": "http://a", "name": "Données"}'
+    r = stream_response(doc.encode("latin-1"), "application/ld+json; charset=ISO-8859-1")
+    r._content = r.raw.read()
+    assert response_json(r)["name"] == "Données"
+    r = stream_response(
+        '<http://a> <http://b> "Données" .\n'.encode("latin-1"), "application/n-triples; charset=latin1"
+    )
+    assert list(HttpClient().iter_lines(r)) == ['<http://a> <http://b> "Données" .']
+    # Not declared or unknown charsets are decoded as UTF-8
+    r = stream_response('<http://a> <http://b> "Données" .\n'.encode(), "application/n-triples; charset=unknown")
+    assert list(HttpClient().iter_lines(r)) == ['<http://a> <http://b> "Données" .']
+
+
+def test_http_client_max_bytes():
+    r = HttpClient().read(stream_response(b"a" * 1000), max_bytes=100)
+    assert r.truncated is True
+    assert r.content == b"a" * 100
+
+    r = HttpClient().read(stream_response(b"a" * 1000))
+    assert r.truncated is False
+    assert len(r.text) == 1000
+
+
+def test_http_sessions():
+    sessions = HttpSessions()
+    assert sessions.session is sessions.session
+    assert HttpClient().session is HttpClient().session
+    # Cookies set by a response are not sent with the next requests
+    headers = http.client.HTTPMessage()
+    headers["Set-Cookie"] = "session=abc; Path=/"
+    request = requests.Request("GET", "https://example.org/").prepare()
+    sessions.session.cookies.extract_cookies(
+        requests.cookies.MockResponse(headers), requests.cookies.MockRequest(request)
+    )
+    assert len(sessions.session.cookies) == 0
+    # Forked workers do not reuse the connections of the parent
+    parent_session = sessions.session
+    sessions.after_fork()
+    assert sessions.session is not parent_session
+
+
+class FailingSession:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return stream_response(b"ok")
+
+
+def test_circuit_breaker(monkeypatch):
+    session = FailingSession(requests.ConnectTimeout("Connection timed out"))
+    http = HttpClient(
+        session=session,
+        breakers=CircuitBreakers(threshold=2, cooldown=60, dns_ttl=60),
+        retry_budget=RetryBudget(max_retries=0),
+    )
+    for _i in range(2):
+        with pytest.raises(requests.ConnectTimeout):
+            http.get("https://down.example.org/a")
+    # The breaker is open, requests fail without being sent
+    with pytest.raises(HostUnavailableError):
+        http.get("https://down.example.org/b")
+    assert session.calls == 2
+    assert http.breakers.status()["down.example.org"]["state"] == "open"
+
+    # Once the cool-down is over, one request probes the host, and closes the breaker if it succeeds
+    monkeypatch.setattr(http.breakers, "cooldown", 0)
+    assert http.breakers.status()["down.example.org"]["state"] == "half-open"
+    session.error = None
+    assert http.get("https://down.example.org/c").content == b"ok"
+    assert http.breakers.status() == {}
+
+
+def test_circuit_breaker_probe_error(monkeypatch):
+    session = FailingSession(requests.ConnectTimeout("Connection timed out"))
+    http = HttpClient(
+        session=session,
+        breakers=CircuitBreakers(threshold=1, cooldown=0, dns_ttl=60),
+        retry_budget=RetryBudget(max_retries=0),
+    )
+    with pytest.raises(requests.ConnectTimeout):
+        http.get("https://down.example.org/a")
+    # The probe fails for another reason than the connection, the next request can probe the host again
+    session.error = requests.TooManyRedirects("Exceeded 30 redirects")
+    with pytest.raises(requests.TooManyRedirects):
+        http.get("https://down.example.org/b")
+    assert http.breakers.status()["down.example.org"]["state"] == "half-open"
+    session.error = None
+    assert http.get("https://down.example.org/c").content == b"ok"
+    assert http.breakers.status() == {}
+
+
+class TransientErrorSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_retry_transient_errors(monkeypatch):
+    waits = []
+    monkeypatch.setattr(HttpClient, "sleep", lambda self, seconds: waits.append(seconds))
+    busy = stream_response(b"busy", status_code=503)
+    busy.headers["Retry-After"] = "2"
+    session = TransientErrorSession(
+        [busy, requests.ConnectionError("Connection reset by peer"), stream_response(b"ok")]
+    )
+    http = HttpClient(session=session, breakers=CircuitBreakers(threshold=5, cooldown=60, dns_ttl=60))
+    assert http.get("https://busy.example.org").content == b"ok"
+    assert session.calls == 3
+    # The Retry-After header is honoured, then the backoff is random up to 1s for the 2nd retry
+    assert waits[0] == 2
+    assert 0 <= waits[1] <= 1
+
+    # Requests which are not idempotent are not retried
+    session = TransientErrorSession([stream_response(b"busy", status_code=503), stream_response(b"ok")])
+    http = HttpClient(session=session, breakers=CircuitBreakers(threshold=5, cooldown=60, dns_ttl=60))
+    assert http.post("https://busy.example.org").status_code == 503
+
+    # The retries are limited for the whole evaluation, then the last response is returned
+    budget = RetryBudget(max_retries=1)
+    session = TransientErrorSession([stream_response(b"", status_code=429) for _i in range(3)])
+    http = HttpClient(session=session, retry_budget=budget)
+    assert http.get("https://busy.example.org").status_code == 429
+    assert session.calls == 2
+    # Waits ending after the deadline of the evaluation are not done
+    assert not RetryBudget(max_retries=5, deadline=1).take(2)
+
+
+def test_negative_dns_cache():
+    dns_error = requests.ConnectionError("Failed to resolve 'wrong-url-for-testing'")
+    dns_error.__cause__ = socket.gaierror(-2, "Name or service not known")
+    session = FailingSession(dns_error)
+    http = HttpClient(session=session, breakers=CircuitBreakers(threshold=5, cooldown=60, dns_ttl=60))
+    with pytest.raises(requests.ConnectionError):
+        http.post("http://wrong-url-for-testing")
+    with pytest.raises(HostUnavailableError):
+        http.post("http://wrong-url-for-testing")
+    assert session.calls == 1
+    assert http.breakers.status()["wrong-url-for-testing"]["dns_failure"] is True
+
+
+def test_parse_rdf_stream(monkeypatch):
+    monkeypatch.setattr("fair_test.metadata_harvester.stream_batch_lines", 2)
+    nt = "# comment\n" + "".join(f"<http://a/{i}> <http://b> _:b0 .\n" for i in range(5))
+    harvester = MetadataHarvester()
+    r = stream_response(nt.encode())
+    assert harvester.get_stream_format(r) == "nt"
+    g = harvester.parse_rdf_stream(r, "nt", log_msg="test")
+    assert len(g) == 5
+    # Blank nodes are shared between the batches
+    assert len(set(g.objects())) == 1
+
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf_stream(stream_response(nt.encode()), "nt", log_msg="test", max_triples=3)
+    assert len(g) == 3
+    assert any("after 3 triples" in log for log in harvester.logs.logs)
+
+    harvester = MetadataHarvester()
+    g = harvester.parse_rdf_stream(stream_response(nt.encode()), "nt", log_msg="test", max_bytes=100)
+    assert len(g) == 2
+    assert any("bigger than 100 bytes" in log for log in harvester.logs.logs)
+
+
+class FakeSession:
+    """Session returning the same document for all requests"""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs.get("headers")))
+        r = stream_response(self.body, self.content_type)
+        r.url = url
+        return r
+
+
+HTML = b"""<html><head><script type="application/ld+json">
+{"@context": {"@vocab": "http://schema.org/"}, "@id": "https://example.org/dataset", "@type": "Dataset", "name": "Test"}
+</script></head><body><div itemscope itemtype="http://schema.org/Dataset"><span itemprop="name">Test</span></div></body></html>
+"""
+
+
+def test_retrieve_metadata_embedded():
+    harvester = MetadataHarvester(subject="https://example.org/dataset")
+    harvester.http = HttpClient(session=FakeSession(HTML, "text/html; charset=utf-8"))
+    g = harvester.retrieve_metadata("https://example.org/dataset")
+    assert len(g) == 2
+    # RDFa and microdata are not extracted when JSON-LD RDF is found
+    assert list(harvester.data["extruct"].keys()) == ["json-ld"]
+    assert len(harvester.http.session.requests) == 1
+
+
+def test_retrieve_metadata_skip_extruct():
+    harvester = MetadataHarvester(subject="https://example.org/dataset")
+    harvester.http = HttpClient(session=FakeSession(TURTLE.encode(), "text/turtle"))
+    g = harvester.retrieve_metadata("https://example.org/dataset")
+    assert len(g) == 2
+    # Only HTML pages are searched for embedded metadata
+    assert "extruct" not in harvester.data
+
+
+def test_resolve_rdf():
+    harvester = MetadataHarvester(subject="https://example.org/dataset")
+    harvester.http = HttpClient(session=FakeSession(TURTLE.encode(), "text/turtle"))
+    g, _metadata_obj = harvester.harvest_resolve("https://example.org/dataset")
+    assert len(g) == 2
+    # The turtle returned by the resource URI is parsed, without asking for it again through content negotiation
+    assert len(harvester.http.session.requests) == 1
+
+
+class RoutedSession:
+    """Session returning a different document for each URL"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(url)
+        body, content_type, link = self.routes.get(url, (b"Not found", "text/plain", ""))
+        r = stream_response(body, content_type)
+        r.url = url
+        r.status_code = 200 if url in self.routes else 404
+        if link:
+            r.headers["Link"] = link
+        return r
+
+
+def test_parse_signposting_links():
+    links = parse_link_header(
+        '<https://doi.org/10.5281/zenodo.1>; rel="cite-as", </metadata.ttl>; rel="describedby"; type="text/turtle", '
+        '<https://example.org/metadata.jsonld>; rel="describedby item"; type="application/ld+json"',
+        "https://example.org/record/1",
+    )
+    assert [(link["rel"], link["url"]) for link in links] == [
+        ("cite-as", "https://doi.org/10.5281/zenodo.1"),
+        ("describedby", "https://example.org/metadata.ttl"),
+        ("describedby", "https://example.org/metadata.jsonld"),
+        ("item", "https://example.org/metadata.jsonld"),
+    ]
+    assert links[1]["type"] == "text/turtle"
+
+    linkset = parse_linkset(
+        '{"linkset": [{"anchor": "https://example.org/record/1", "describedby": [{"href": "/metadata.ttl", "type": "text/turtle"}]}]}',
+        "application/linkset+json",
+        "https://example.org/linkset",
+    )
+    assert linkset == [
+        {
+            "type": "text/turtle",
+            "url": "https://example.org/metadata.ttl",
+            "rel": "describedby",
+            "anchor": "https://example.org/record/1",
+        }
+    ]
+
+
+def test_follow_signposting():
+    subject = "https://example.org/record/1"
+    routes = {
+        subject: (
+            b"<html></html>",
+            "text/html",
+            '</linkset>; rel="linkset", <https://doi.org/10.5281/zenodo.1>; rel="cite-as"',
+        ),
+        "https://example.org/linkset": (
+            b'<https://example.org/missing.ttl>; rel="describedby", <https://example.org/metadata.ttl>; rel="describedby"',
+            "application/linkset",
+            "",
+        ),
+        # Links back to the subject, which is not fetched again
+        "https://example.org/metadata.ttl": (TURTLE.encode(), "text/turtle", f'<{subject}>; rel="describedby"'),
+    }
+    harvester = MetadataHarvester(subject=subject)
+    harvester.http = HttpClient(session=RoutedSession(routes))
+    g = harvester.retrieve_metadata(subject)
+    assert len(g) == 2
+    assert "https://doi.org/10.5281/zenodo.1" in harvester.data["alternative_uris"]
+    assert sorted(harvester.http.session.requests) == sorted(
+        [subject, "https://example.org/linkset", "https://example.org/missing.ttl", "https://example.org/metadata.ttl"]
+    )
+
+    # Mutually linking resources are each fetched once, and the depth is bounded
+    routes = {
+        subject: (b"<html></html>", "text/html", '<https://example.org/a>; rel="describedby"'),
+        "https://example.org/a": (b"<html></html>", "text/html", '<https://example.org/b>; rel="describedby"'),
+        "https://example.org/b": (
+            b"<html></html>",
+            "text/html",
+            f'<https://example.org/a>; rel="describedby", <{subject}>; rel="meta"',
+        ),
+    }
+    harvester = MetadataHarvester(subject=subject)
+    harvester.http = HttpClient(session=RoutedSession(routes))
+    assert harvester.follow_signposting(harvester.http.get(subject), subject, max_depth=5) is None
+    assert harvester.http.session.requests == [subject, "https://example.org/a", "https://example.org/b"]
+
+
+class ContentNegotiationSession:
+    """Session returning turtle only when asked through content negotiation, like a FAIR Data Point"""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        accept = (headers or {}).get("accept", "")
+        self.requests.append(accept)
+        if accept == "text/turtle":
+            return stream_response(TURTLE.encode(), "text/turtle")
+        return stream_response(b"<html><body>No metadata</body></html>", "text/html")
+
+
+class ErrorSession:
+    """Session returning streamed responses which fail, keeps them to check they are closed"""
+
+    def __init__(self, body, content_type, status_code):
+        self.body = body
+        self.content_type = content_type
+        self.status_code = status_code
+        self.responses = []
+
+    def request(self, method, url, **kwargs):
+        r = stream_response(self.body, self.content_type, self.status_code)
+        self.responses.append(r)
+        return r
+
+
+@pytest.mark.parametrize("status_code,parse_error", [(404, False), (200, True)])
+def test_close_failed_responses(status_code, parse_error, monkeypatch):
+    session = ErrorSession(b'<http://a> <http://b> "c" .\n', "application/n-triples", status_code)
+    harvester = MetadataHarvester(
+        subject="https://example.org/record/1",
+        http=HttpClient(session=session, retry_budget=RetryBudget(max_retries=0)),
+    )
+    if parse_error:
+
+        def parse_rdf_stream(r, rdf_format, **kwargs):
+            raise ValueError("Invalid N-Triples")
+
+        monkeypatch.setattr(harvester, "parse_rdf_stream", parse_rdf_stream)
+    # The errors are logged, and the connections released before the body is read
+    assert harvester.harvest_content_negotiation("https://example.org/record/1", "text/turtle") == (None, [])
+    link = {"url": "https://example.org/record/1.nt", "rel": "describedby"}
+    assert harvester.fetch_signposting_link(link) == (None, [])
+    harvester.harvest_resolve("https://example.org/record/1")
+    assert len(session.responses) == 3
+    assert all(r.raw.closed for r in session.responses)
+
+
+def test_adaptive_strategies(tmp_path, monkeypatch):
+    monkeypatch.setattr("fair_test.config.settings.HARVEST_STRATEGY_EXPLORATION", 0)
+    stats = HarvestStrategyStats(path=str(tmp_path / "strategies.json"))
+    monkeypatch.setattr("fair_test.metadata_harvester.strategy_stats", stats)
+    session = ContentNegotiationSession()
+    for subject in ["https://fdp.example.org/dataset/1", "https://fdp.example.org/dataset/2"]:
+        session.requests.clear()
+        harvester = MetadataHarvester(subject=subject)
+        harvester.http = HttpClient(session=session)
+        assert len(harvester.retrieve_metadata(subject)) == 2
+        assert harvester.data["harvest_strategy"] == "conneg-turtle"
+    # The subject is not resolved anymore for this host, content negotiation to turtle is tried first
+    assert session.requests == ["text/turtle"]
+
+    # Strategies which never succeed are skipped, the order is restored after a restart
+    for _i in range(5):
+        stats.record("https://fdp.example.org/dataset/3", "conneg-json-ld", False, 0.1)
+    stats.save()
+    restored = HarvestStrategyStats(path=str(tmp_path / "strategies.json"))
+    strategies = ["resolve", "conneg-turtle", "conneg-json-ld", "conneg-rdf"]
+    assert restored.order("https://fdp.example.org/dataset/4", strategies) == [
+        "conneg-turtle",
+        "conneg-rdf",
+        "resolve",
+    ]
+    # Exploration uses the default order
+    monkeypatch.setattr("fair_test.config.settings.HARVEST_STRATEGY_EXPLORATION", 1)
+    assert restored.order("https://fdp.example.org/dataset/4", strategies) == strategies
+
+    assert host_key("https://doi.org/10.1594/PANGAEA.908011") == "doi.org/10.1594"
+    assert host_key("https://FDP.example.org/dataset/1") == "fdp.example.org"
+
+
+class MicrodataSession:
+    """Session returning a landing page with microdata only, like GitHub"""
+
+    def request(self, method, url, headers=None, **kwargs):
+        return stream_response(
+            b'<html><body><div itemscope itemtype="https://schema.org/SoftwareSourceCode">'
+            b'<span itemprop="name">fair-test</span></div></body></html>',
+            "text/html",
+        )
+
+
+def test_adaptive_strategies_fallback_metadata(monkeypatch):
+    monkeypatch.setattr("fair_test.config.settings.HARVEST_STRATEGY_EXPLORATION", 0)
+    monkeypatch.setattr("fair_test.config.settings.DOI_METADATA", "off")
+    for i in range(8):
+        subject = f"https://code.example.org/repo/{i}"
+        harvester = MetadataHarvester(subject=subject, http=HttpClient(session=MicrodataSession()))
+        metadata = harvester.retrieve_metadata(subject)
+        # The microdata embedded in the landing page is still found once the statistics are known
+        assert metadata and metadata[0]["properties"]["name"] == "fair-test"
+    assert "resolve" in metadata_harvester.strategy_stats.order(subject, ["resolve", "conneg-turtle"])
+
+
+def test_resolve_skips_body_download():
+    subject = "https://example.org/record/1"
+    routes = {
+        subject: (b"<html>" + b" " * 10000 + b"</html>", "text/html", '</metadata.ttl>; rel="describedby"'),
+        "https://example.org/metadata.ttl": (TURTLE.encode(), "text/turtle", ""),
+        "https://example.org/data.zip": (b"0" * 10000, "application/zip", ""),
+    }
+    session = RoutedSession(routes)
+    session.responses = []
+    request = session.request
+
+    def keep_response(method, url, **kwargs):
+        r = request(method, url, **kwargs)
+        session.responses.append(r)
+        return r
+
+    session.request = keep_response
+    harvester = MetadataHarvester(subject=subject)
+    harvester.http = HttpClient(session=session)
+    # Signposting links are followed before downloading the HTML page
+    assert len(harvester.retrieve_metadata(subject)) == 2
+    assert session.responses[0]._content is False
+    # The response is closed before following the links
+    assert session.responses[0].raw.closed
+
+    # Data files are not downloaded
+    harvester.harvest_resolve("https://example.org/data.zip")
+    assert session.responses[-1]._content is False
+
+    # Links which do not lead to metadata are ignored, the page is read in the same request
+    routes["https://example.org/record/3"] = (
+        HTML,
+        "text/html",
+        '</style.css>; rel="stylesheet", </record/3>; rel="canonical", </metadata.ttl>; rel="cite-as"',
+    )
+    harvester = MetadataHarvester(subject="https://example.org/record/3", http=HttpClient(session=session))
+    g, _metadata_obj = harvester.harvest_resolve("https://example.org/record/3")
+    assert len(g) == 2
+    assert session.requests.count("https://example.org/record/3") == 1
+    assert [link["rel"] for link in harvester.data["signposting_links"]] == ["cite-as"]
+
+    # The page is downloaded when the Signposting links do not lead to RDF
+    routes["https://example.org/record/2"] = (HTML, "text/html", '</missing.ttl>; rel="describedby"')
+    g, _metadata_obj = harvester.harvest_resolve("https://example.org/record/2")
+    assert len(g) == 2
+    assert session.requests[-3:] == [
+        "https://example.org/record/2",
+        "https://example.org/missing.ttl",
+        "https://example.org/record/2",
+    ]
+
+
+class DoiSession:
+    """Session returning turtle when doi.org is asked for the metadata of a DOI, otherwise the landing page"""
+
+    def __init__(self):
+        self.accepts = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        accept = (headers or {}).get("accept", "")
+        self.accepts.append(accept)
+        if accept == doi_accept:
+            return stream_response(TURTLE.encode(), "text/turtle")
+        return stream_response(HTML, "text/html")
+
+
+@pytest.mark.parametrize("mode", ["prefer", "merge", "off"])
+def test_harvest_doi(mode, monkeypatch):
+    monkeypatch.setattr("fair_test.config.settings.DOI_METADATA", mode)
+    subject = "https://doi.org/10.1594/PANGAEA.908011"
+    harvester = MetadataHarvester(subject=subject)
+    harvester.http = HttpClient(session=DoiSession())
+    g = harvester.retrieve_metadata(subject)
+    if mode == "prefer":
+        # The landing page is not resolved
+        assert harvester.data["harvest_strategy"] == "doi"
+        assert len(g) == 2
+        assert harvester.http.session.accepts == [doi_accept]
+    elif mode == "merge":
+        assert harvester.data["harvest_strategy"] == "resolve"
+        assert len(g) == 4
+    else:
+        assert harvester.data["harvest_strategy"] == "resolve"
+        assert doi_accept not in harvester.http.session.accepts
+
+
+class SlowDoiSession(DoiSession):
+    """Session answering slowly to the DOI registration agency requests, while the evaluation is cancelled"""
+
+    def __init__(self):
+        super().__init__()
+        self.doi_done = False
+
+    def request(self, method, url, headers=None, **kwargs):
+        if (headers or {}).get("accept") == doi_accept:
+            time.sleep(0.1)
+            self.doi_done = True
+            return super().request(method, url, headers=headers, **kwargs)
+        raise EvaluationCancelled()
+
+
+def test_harvest_doi_default():
+    # By default the landing page of a DOI is resolved, and the metadata of the registration agency is added to it
+    subject = "https://doi.org/10.1594/PANGAEA.908011"
+    harvester = MetadataHarvester(subject=subject, http=HttpClient(session=DoiSession()))
+    g = harvester.retrieve_metadata(subject)
+    assert harvester.data["harvest_strategy"] == "resolve"
+    assert len(g) == 4
+
+
+def test_harvest_doi_merge_cancelled(monkeypatch):
+    monkeypatch.setattr("fair_test.config.settings.DOI_METADATA", "merge")
+    subject = "https://doi.org/10.1594/PANGAEA.908011"
+    session = SlowDoiSession()
+    harvester = MetadataHarvester(subject=subject, http=HttpClient(session=session))
+    with pytest.raises(EvaluationCancelled):
+        harvester.retrieve_metadata(subject)
+    # The request to the registration agency does not outlive the harvest
+    assert session.doi_done
+
+
+def test_cancelled_evaluation():
+    token = CancelToken()
+    session = FakeSession(b"a" * 1000, "text/plain")
+    http = HttpClient(session=session, cancel_token=token)
+    r = http.get("https://example.org/data", stream=True)
+
+    def cancelled_chunks():
+        yield b"a"
+        token.cancel()
+        yield b"b"
+
+    r.iter_content = lambda chunk_size: cancelled_chunks()
+    with pytest.raises(EvaluationCancelled):
+        http.read(r)
+
+    # The next strategies are skipped, the cancellation is not caught by the harvester
+    harvester = MetadataHarvester(subject="https://example.org/dataset")
+    harvester.http = http
+    with pytest.raises(EvaluationCancelled):
+        harvester.retrieve_metadata("https://example.org/dataset")
+    assert len(session.requests) == 1
@@ -0,0 +1,111 @@
+import json
+import time
+
+import pytest
+import requests
+
+from fair_test import FairTestEvaluation
+from fair_test.reference_data import ReferenceDataCache
+
+# Test the reference datasets cache offline, with a fake HTTP client
+
+URL = "https://lov.linkeddata.es/dataset/lov/api/v2/vocabulary/list"
+
+
+class FakeHttp:
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        if self.data is None:
+            raise requests.ConnectionError("Upstream is down")
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps(self.data).encode()
+        return r
+
+
+def get_namespaces(data):
+    return [vocab["nsp"] for vocab in data]
+
+
+def test_reference_data_cache(tmp_path):
+    http = FakeHttp([{"nsp": "http://schema.org/"}])
+    cache = ReferenceDataCache(cache_dir=str(tmp_path), http=http)
+    assert cache.get(URL, preprocess=get_namespaces) == ["http://schema.org/"]
+    assert cache.get(URL) == ["http://schema.org/"]
+    assert http.calls == 1
+
+    # Cold start from the copy on disk, without downloading
+    offline = FakeHttp(None)
+    cache = ReferenceDataCache(cache_dir=str(tmp_path), http=offline)
+    assert cache.get(URL, preprocess=get_namespaces) == ["http://schema.org/"]
+    assert offline.calls == 0
+
+    # Serve the stale copy while refreshing in the background
+    cache.datasets[URL].ttl = 0
+    assert cache.get(URL) == ["http://schema.org/"]
+    for _ in range(100):
+        if not cache.datasets[URL].refreshing:
+            break
+        time.sleep(0.01)
+    assert offline.calls == 1
+    assert cache.status()[URL]["last_error"] == "Upstream is down"
+
+    http = FakeHttp([{"nsp": "http://schema.org/"}, {"nsp": "http://purl.org/dc/terms/"}])
+    cache.http = http
+    cache.refresh(cache.datasets[URL])
+    assert cache.get(URL) == ["http://schema.org/", "http://purl.org/dc/terms/"]
+    assert cache.status()[URL]["last_error"] is None
+
+
+def test_reference_data_unavailable(tmp_path):
+    cache = ReferenceDataCache(cache_dir=str(tmp_path), http=FakeHttp(None))
+    with pytest.raises(requests.ConnectionError):
+        cache.get(URL)
+
+
+def test_reference_data_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr("fair_test.reference_data.settings.REFERENCE_DATA_RETRY_DELAY", 60)
+    http = FakeHttp(None)
+    cache = ReferenceDataCache(cache_dir=str(tmp_path), http=http)
+    with pytest.raises(requests.ConnectionError):
+        cache.get(URL)
+    # Not downloaded again until the backoff delay is over
+    with pytest.raises(requests.ConnectionError, match="retrying in"):
+        cache.get(URL)
+    assert http.calls == 1
+
+    dataset = cache.datasets[URL]
+    dataset.failed_at -= 60
+    http.data = [{"nsp": "http://schema.org/"}]
+    assert cache.get(URL) == [{"nsp": "http://schema.org/"}]
+    assert http.calls == 2
+    assert dataset.failures == 0
+
+    # A stale copy is served without starting a new download after each failure
+    dataset.ttl = 0
+    http.data = None
+    cache.refresh(dataset)
+    assert cache.get(URL) == [{"nsp": "http://schema.org/"}]
+    assert not dataset.needs_refresh
+    assert http.calls == 3
+
+
+def test_reference_data_retry_budget(tmp_path):
+    cache = ReferenceDataCache(cache_dir=str(tmp_path))
+    assert cache.client().retry_budget is not cache.client().retry_budget
+
+
+def test_evaluation_reference_data(tmp_path, monkeypatch):
+    cache = ReferenceDataCache(cache_dir=str(tmp_path), http=FakeHttp(None))
+    monkeypatch.setattr("fair_test.fair_test_evaluation.reference_data", cache)
+    cache.preload(URL, preprocess=get_namespaces)
+    cache.set_value(cache.datasets[URL], [{"nsp": "http://schema.org/"}], time.time() - 10)
+    cache.datasets[URL].last_error = "Upstream is down"
+
+    evl = FairTestEvaluation("https://doi.org/10.1594/PANGAEA.908011", "i2-test")
+    assert evl.get_reference_data(URL) == ["http://schema.org/"]
+    assert "Could not refresh the reference dataset" in evl.comment[-1]
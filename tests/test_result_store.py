@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import time
+
+from fastapi.responses import JSONResponse
+
+from fair_test import FairTest, FairTestEvaluation, MetricInput
+from fair_test import fair_test as fair_test_module
+from fair_test.json_serializer import FairTestJSONResponse
+from fair_test.result_store import ResultStore
+
+# Test the evaluation results store offline, with a metric test which does not resolve the subject
+
+SUBJECT = "https://doi.org/10.1594/PANGAEA.908011"
+
+
+class CountingMetric(FairTest):
+    metric_path = "a1-count-evaluations"
+    applies_to_principle = "A1"
+    title = "Count evaluations"
+    description = "Test metric counting its evaluations"
+    metric_version = "0.1.0"
+    evaluations = []  # type: ignore
+
+    def evaluate(self, eval: FairTestEvaluation):
+        self.evaluations.append(eval.subject)
+        eval.success(f"Evaluation {len(self.evaluations)}")
+        return eval.response()
+
+
+def test_result_store(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "results.db"), ttl=3600)
+    monkeypatch.setattr(fair_test_module, "result_store", store)
+    metric = CountingMetric()
+
+    r = metric.do_evaluate(MetricInput(subject=SUBJECT))
+    assert r.headers["Cache-Control"] == "max-age=3600"
+    assert "Age" not in r.headers
+
+    stored = metric.do_evaluate(MetricInput(subject=SUBJECT))
+    assert len(metric.evaluations) == 1
+    assert stored.body == r.body
+    assert stored.headers["Age"] == "0"
+    assert json.loads(stored.body)[0]["http://semanticscience.org/resource/SIO_000300"][0]["@value"] == 1
+
+    metric.do_evaluate(MetricInput(subject=SUBJECT, force=True))
+    assert len(metric.evaluations) == 2
+
+    # Results of previous versions of the metric are not reused
+    metric.metric_version = "0.2.0"
+    metric.do_evaluate(MetricInput(subject=SUBJECT))
+    assert len(metric.evaluations) == 3
+
+
+class FailingMetric(CountingMetric):
+    metric_path = "a1-failing-evaluations"
+    evaluations = []  # type: ignore
+
+    def evaluate(self, eval: FairTestEvaluation):
+        self.evaluations.append(eval.subject)
+        return JSONResponse({"errorMessage": "Could not evaluate"})
+
+
+class JSONLDMetric(CountingMetric):
+    metric_path = "a1-jsonld-evaluations"
+    evaluations = []  # type: ignore
+
+    def evaluate(self, eval: FairTestEvaluation):
+        self.evaluations.append(eval.subject)
+        return JSONLDResponse(eval.to_jsonld())
+
+
+class JSONLDResponse(FairTestJSONResponse):
+    media_type = "application/ld+json"
+
+
+def test_result_store_completed(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "results.db"), ttl=3600)
+    monkeypatch.setattr(fair_test_module, "result_store", store)
+
+    # Errors returned with a 200 are not stored
+    metric = FailingMetric()
+    metric.do_evaluate(MetricInput(subject=SUBJECT))
+    metric.do_evaluate(MetricInput(subject=SUBJECT))
+    assert len(metric.evaluations) == 2
+
+    # The media type of the result is returned with the result stored
+    metric = JSONLDMetric()
+    metric.do_evaluate(MetricInput(subject=SUBJECT))
+    stored = metric.do_evaluate(MetricInput(subject=SUBJECT))
+    assert len(metric.evaluations) == 1
+    assert stored.media_type == "application/ld+json"
+
+
+def test_result_store_previous_schema(tmp_path):
+    path = str(tmp_path / "results.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE results (subject TEXT NOT NULL, metric_path TEXT NOT NULL, metric_version TEXT NOT NULL, "
+        "created_at REAL NOT NULL, content BLOB NOT NULL, PRIMARY KEY (subject, metric_path, metric_version))"
+    )
+    conn.execute("INSERT INTO results VALUES (?, ?, ?, ?, ?)", (SUBJECT, "a1-metric", "0.1.0", time.time(), b"[]"))
+    conn.commit()
+    conn.close()
+    assert ResultStore(path, ttl=60).get(SUBJECT, "a1-metric", "0.1.0").media_type == "application/json"
+
+
+def test_result_store_ttl(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), ttl=60)
+    store.set(SUBJECT, "a1-metric", "0.1.0", b"[]")
+    assert store.get(SUBJECT, "a1-metric", "0.1.0").content == b"[]"
+    assert store.get(SUBJECT, "a1-other-metric", "0.1.0") is None
+
+    store.ttl = 0
+    assert store.get(SUBJECT, "a1-metric", "0.1.0") is None
+    assert store.purge() == 1
+    assert not store.enabled
+    assert not ResultStore("").enabled